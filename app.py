@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request, render_template, redirect, url_for, flash, session
+from flask import Flask, jsonify, request, render_template, redirect, url_for, flash, session, Response
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import os
@@ -7,7 +7,17 @@ from functools import wraps
 from models import db, User, Wallet, Transaction, Game, Round, Bet, Outcome, Horse, HorseRunner, HorseResult
 from decimal import Decimal
 from werkzeug.utils import secure_filename
-from games import HorseRacing, Slots, Plinko, Blackjack
+from games import HorseRacing, Slots, Plinko, Blackjack, Roulette, Minesweeper
+from games.worker_lock import WorkerLock
+from games.race_scheduler import init_race_scheduler, race_lock_name
+from games.race_feed import RaceFeeds
+from games.hand_sweeper import init_hand_sweeper
+from games.board_sweeper import init_board_sweeper
+from games.horse_roster import roster as horse_roster
+from games.race_replay import get_replay_payload, replay_etag
+from games.blackjack_ev import load_ev_tables
+from games.plinko import check_multiplier_tables, stored_ball_path, plinko_boards
+from games.slot_rtp import check_slot_rtp
 from sqlalchemy.sql import text
 from sqlalchemy.orm import joinedload
 
@@ -26,6 +36,28 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')  # Ch
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'profile_pics')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Horse races open, close and run on a fixed cadence unless the scheduler is turned off
+app.config['HORSE_RACE_SCHEDULER'] = os.getenv('HORSE_RACE_SCHEDULER', 'true').lower() == 'true'
+app.config['HORSE_RACE_INTERVAL'] = int(os.getenv('HORSE_RACE_INTERVAL', '90'))    # seconds between race starts
+app.config['HORSE_BETTING_WINDOW'] = int(os.getenv('HORSE_BETTING_WINDOW', '60'))  # seconds betting stays open
+
+# Blackjack deals from a 6 or 8 deck shoe
+app.config['BLACKJACK_DECKS'] = int(os.getenv('BLACKJACK_DECKS', '6'))
+# Hands nobody acts on for this long are stood and settled by the sweeper
+app.config['BLACKJACK_HAND_SWEEPER'] = os.getenv('BLACKJACK_HAND_SWEEPER', 'true').lower() == 'true'
+app.config['BLACKJACK_HAND_TIMEOUT'] = int(os.getenv('BLACKJACK_HAND_TIMEOUT', '900'))  # seconds idle
+app.config['BLACKJACK_SWEEP_BATCH'] = int(os.getenv('BLACKJACK_SWEEP_BATCH', '200'))    # hands per commit
+
+# Minesweeper boards nobody touches for this long are cashed out (or void if untouched)
+app.config['MINESWEEPER_BOARD_SWEEPER'] = os.getenv('MINESWEEPER_BOARD_SWEEPER', 'true').lower() == 'true'
+app.config['MINESWEEPER_BOARD_TIMEOUT'] = int(os.getenv('MINESWEEPER_BOARD_TIMEOUT', '900'))  # seconds idle
+app.config['MINESWEEPER_SWEEP_BATCH'] = int(os.getenv('MINESWEEPER_SWEEP_BATCH', '200'))      # boards per commit
+
+# Progressive slots jackpot
+app.config['SLOT_JACKPOT_SHARDS'] = int(os.getenv('SLOT_JACKPOT_SHARDS', '16'))     # rows the pot is split over
+app.config['SLOT_JACKPOT_RATE'] = float(os.getenv('SLOT_JACKPOT_RATE', '0.01'))    # share of each stake
+app.config['SLOT_JACKPOT_SEED'] = int(os.getenv('SLOT_JACKPOT_SEED', '1000'))      # pot after a win
+
 # Ensure the upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -48,6 +80,43 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+race_scheduler = init_race_scheduler(app)
+race_feeds = RaceFeeds(app)
+hand_sweeper = init_hand_sweeper(app)
+board_sweeper = init_board_sweeper(app)
+# Map the blackjack EV tables now rather than on the first hint
+load_ev_tables(app.config['BLACKJACK_DECKS'])
+
+def check_plinko_tables():
+    """Refuse to start with a Plinko table that pays back more than the house edge allows"""
+    with app.app_context():
+        plinko_game = Plinko()
+        game = plinko_game.get_game()
+        if game is None:
+            # No database (or no Plinko) yet, e.g. while seeding
+            db.session.rollback()
+            return
+        check_multiplier_tables(plinko_game.risk_multipliers, float(game.house_edge))
+
+check_plinko_tables()
+
+def check_slot_paytable():
+    """Refuse to start with a slot paytable that pays back more than the house edge allows"""
+    with app.app_context():
+        slots_game = Slots()
+        game = slots_game.get_game()
+        if game is None:
+            # No database (or no slot machine) yet, e.g. while seeding
+            db.session.rollback()
+            return
+        stats = slots_game.get_statistics(game)
+        check_slot_rtp(stats, float(game.house_edge), slots_game.jackpot_return(stats, game))
+        if not slots_game.open_jackpot(game):
+            # Slots play without a jackpot until the table exists
+            print("Slots jackpot unavailable: run migrations/add_jackpot_shards.py")
+
+check_slot_paytable()
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -299,12 +368,17 @@ def wallet(wallet_id=None):
         flash(f'Error loading wallet: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
+def request_horse_racing():
+    """HorseRacing for the track named in the request (?track=CODE or a JSON 'track' field)"""
+    data = request.get_json(silent=True) or {}
+    return HorseRacing(request.args.get('track') or data.get('track'))
+
 @app.route('/horse-racing')
 @app.route('/horse-racing/<int:wallet_id>')
 @login_required
 def horse_racing(wallet_id=None):
     """Main horse racing game page"""
-    hr = HorseRacing()
+    hr = request_horse_racing()
     
     # Validate game setup
     validation = hr.validate_game_setup()
@@ -312,6 +386,16 @@ def horse_racing(wallet_id=None):
         flash(validation['message'], 'danger')
         return redirect(url_for('index'))
     
+    tracks = hr.get_tracks()
+    if not tracks:
+        flash('No race tracks are open. Even the horses went home.', 'danger')
+        return redirect(url_for('index'))
+    
+    track = hr.get_track()
+    if not track or not track.is_active:
+        flash('That track is closed. Here is one that is not.', 'warning')
+        return redirect(url_for('horse_racing', wallet_id=wallet_id, track=tracks[0].code))
+    
     # Get the specific wallet or default to primary wallet
     if wallet_id:
         wallet = Wallet.query.filter_by(wallet_id=wallet_id, user_id=current_user.user_id).first()
@@ -331,9 +415,7 @@ def horse_racing(wallet_id=None):
     recent_rounds = hr.get_recent_rounds()
     
     # Get all horses for name lookup
-    from models import Horse
-    all_horses = Horse.query.all()
-    horses_dict = {horse.horse_id: horse for horse in all_horses}
+    horses_dict = horse_roster.by_id()
     
     return render_template('horse_racing.html', 
                          game=horse_game, 
@@ -341,14 +423,23 @@ def horse_racing(wallet_id=None):
                          all_wallets=current_user.wallets,
                          active_round=active_round,
                          recent_rounds=recent_rounds,
-                         horses_dict=horses_dict)
+                         horses_dict=horses_dict,
+                         track=track,
+                         tracks=tracks,
+                         scheduled_races=app.config['HORSE_RACE_SCHEDULER'])
 
 @app.route('/horse-racing/start-race', methods=['POST'])
 @login_required
 def start_horse_race():
     """Start a new horse race round"""
-    hr = HorseRacing()
-    result = hr.start_new_race()
+    if app.config['HORSE_RACE_SCHEDULER']:
+        return jsonify({'success': False, 'message': 'Races start on their own schedule. Patience is a virtue.'})
+    
+    hr = request_horse_racing()
+    with WorkerLock(race_lock_name(hr.track_code)) as acquired:
+        if not acquired:
+            return jsonify({'success': False, 'message': 'Someone else is already starting a race'})
+        result = hr.start_new_race()
     return jsonify(result)
 
 @app.route('/horse-racing/place-bet', methods=['POST'])
@@ -372,7 +463,7 @@ def place_horse_bet():
         if not wallet:
             return jsonify({'success': False, 'message': 'No wallet found'})
     
-    hr = HorseRacing()
+    hr = request_horse_racing()
     result = hr.place_bet(current_user.user_id, horse_id, bet_amount, bet_type, wallet_id=wallet.wallet_id)
     return jsonify(result)
 
@@ -380,15 +471,49 @@ def place_horse_bet():
 @login_required
 def run_horse_race():
     """Execute the horse race and determine winner"""
-    hr = HorseRacing()
-    result = hr.run_race()
+    if app.config['HORSE_RACE_SCHEDULER']:
+        return jsonify({'success': False, 'message': 'The race runs when betting closes. Nobody is that impatient.'})
+    
+    hr = request_horse_racing()
+    with WorkerLock(race_lock_name(hr.track_code)) as acquired:
+        if not acquired:
+            return jsonify({'success': False, 'message': 'This race is already being run'})
+        result = hr.run_race()
     return jsonify(result)
 
+@app.route('/horse-racing/events')
+@login_required
+def horse_race_events():
+    """Server-Sent Events stream of one track's race lifecycle events"""
+    hr = request_horse_racing()
+    if not hr.get_track():
+        return jsonify({'success': False, 'message': 'Track not found'}), 404
+    
+    return Response(race_feeds.get(hr.track_code).stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # don't let nginx buffer the stream
+    })
+
+@app.route('/horse-racing/replay/<int:round_id>')
+def horse_race_replay(round_id):
+    """Binary position frames for a finished race (see games/race_replay.py)"""
+    payload = get_replay_payload(round_id)
+    if payload is None:
+        return jsonify({'success': False, 'message': 'No replay for this race'}), 404
+    
+    # Replays never change once written, so any cache may keep them
+    response = Response(payload, mimetype='application/octet-stream')
+    response.set_etag(replay_etag(payload))
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
 @app.route('/horse-racing/race-status')
 @login_required
 def horse_race_status():
     """Get current race status"""
-    hr = HorseRacing()
+    hr = request_horse_racing()
     result = hr.get_race_status(current_user.user_id)
     return jsonify(result)
 
@@ -396,7 +521,7 @@ def horse_race_status():
 @login_required
 def horse_betting_stats():
     """Get betting statistics for current race"""
-    hr = HorseRacing()
+    hr = request_horse_racing()
     result = hr.get_betting_stats()
     return jsonify(result)
 
@@ -438,13 +563,23 @@ def slots(wallet_id=None):
     game = slots_game.get_game()
     active_round = slots_game.get_active_round()
     symbols = slots_game.get_all_symbols()
+    engine = slots_game.get_engine(game)
+    
+    # Multi-line machines show line pays for each run length instead of the 3-reel paytable
+    line_pays = {}
+    if engine:
+        for symbol, pays in zip(engine.symbols, engine.pays.tolist()):
+            line_pays[symbol] = [(count, int(pay) if pay.is_integer() else pay) for count, pay in enumerate(pays) if pay]
     
     return render_template('slots.html', 
                          game=game, 
                          wallet=wallet,
                          all_wallets=current_user.wallets,
                          active_round=active_round,
-                         symbols=symbols)
+                         symbols=symbols,
+                         engine=engine,
+                         line_pays=line_pays,
+                         jackpot=slots_game.get_jackpot())
 
 @app.route('/api/slots/bet', methods=['POST'])
 @login_required
@@ -454,6 +589,7 @@ def slots_bet():
         data = request.get_json()
         bet_amount = Decimal(str(data.get('amount', 0)))
         wallet_id = data.get('wallet_id')
+        spins = int(data.get('spins', 1))
         
         if bet_amount <= 0:
             return jsonify({'success': False, 'message': 'Invalid bet amount'})
@@ -469,12 +605,120 @@ def slots_bet():
                 return jsonify({'success': False, 'message': 'No wallet found'})
         
         slots_game = Slots()
-        result = slots_game.place_bet(current_user.user_id, bet_amount, wallet_id=wallet.wallet_id)
+        result = slots_game.place_bet(current_user.user_id, bet_amount, wallet_id=wallet.wallet_id, spins=spins)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/slots/jackpot')
+def slots_jackpot():
+    """The progressive jackpot, as of the last couple of seconds"""
+    return jsonify({'success': True, 'jackpot': float(Slots().get_jackpot())})
+
+@app.route('/api/roulette/bet', methods=['POST'])
+@login_required
+def roulette_bet():
+    """Put chips on the roulette table and spin"""
+    try:
+        data = request.get_json()
+        chips = data.get('chips') or []
+        wallet_id = data.get('wallet_id')
+        
+        roulette_game = Roulette()
+        validation = roulette_game.validate_game_setup()
+        if not validation['valid']:
+            return jsonify({'success': False, 'message': validation['message']})
+        
+        # Get the specified wallet or default to primary wallet
+        if wallet_id:
+            wallet = Wallet.query.filter_by(wallet_id=wallet_id, user_id=current_user.user_id).first()
+            if not wallet:
+                return jsonify({'success': False, 'message': 'Wallet not found'})
+        else:
+            wallet = current_user.get_primary_wallet() if current_user.wallets else None
+            if not wallet:
+                return jsonify({'success': False, 'message': 'No wallet found'})
+        
+        result = roulette_game.place_bet(current_user.user_id, chips, wallet_id=wallet.wallet_id)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/roulette/layout')
+def roulette_layout():
+    """Wheel order, pocket colors and what each bet pays"""
+    return jsonify(Roulette().get_layout())
+
+@app.route('/api/minesweeper/bet', methods=['POST'])
+@login_required
+def minesweeper_bet():
+    """Place a Minesweeper bet and open a board"""
+    try:
+        data = request.get_json()
+        bet_amount = Decimal(str(data.get('amount', 0)))
+        mines = data.get('mines')
+        wallet_id = data.get('wallet_id')
+        
+        if bet_amount <= 0:
+            return jsonify({'success': False, 'message': 'Invalid bet amount'})
+        
+        minesweeper = Minesweeper()
+        validation = minesweeper.validate_game_setup()
+        if not validation['valid']:
+            return jsonify({'success': False, 'message': validation['message']})
+        
+        # Get the specified wallet or default to primary wallet
+        if wallet_id:
+            wallet = Wallet.query.filter_by(wallet_id=wallet_id, user_id=current_user.user_id).first()
+            if not wallet:
+                return jsonify({'success': False, 'message': 'Wallet not found'})
+        else:
+            wallet = current_user.get_primary_wallet() if current_user.wallets else None
+            if not wallet:
+                return jsonify({'success': False, 'message': 'No wallet found'})
+        
+        result = minesweeper.place_bet(current_user.user_id, bet_amount, mines=mines, wallet_id=wallet.wallet_id)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/minesweeper/reveal', methods=['POST'])
+@login_required
+def minesweeper_reveal():
+    """Reveal one cell of a Minesweeper board"""
+    try:
+        data = request.get_json()
+        bet_id = data.get('bet_id')
+        cell = data.get('cell')
+        
+        if not bet_id or cell is None:
+            return jsonify({'success': False, 'message': 'Missing bet_id or cell'})
+        
+        result = Minesweeper().reveal(bet_id, cell, user_id=current_user.user_id)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/minesweeper/cashout', methods=['POST'])
+@login_required
+def minesweeper_cashout():
+    """Cash out a Minesweeper board at its current multiplier"""
+    try:
+        data = request.get_json()
+        bet_id = data.get('bet_id')
+        
+        if not bet_id:
+            return jsonify({'success': False, 'message': 'Missing bet_id'})
         
-        if result['success']:
-            # Update wallet balance in response - use the specific wallet
-            result['wallet_balance'] = float(wallet.balance)
-            result['wallet_currency'] = wallet.currency
+        result = Minesweeper().cash_out(bet_id, user_id=current_user.user_id)
         
         return jsonify(result)
         
@@ -487,12 +731,11 @@ def slots_bet():
 def plinko(wallet_id=None):
     """Plinko game page"""
     try:
-        from games.plinko import Plinko
-        
-        plinko_game = Plinko()
+        # Every risk level's board is inlined, so switching risk needs no request
+        boards = {risk: board['board'] for risk, board in plinko_boards().items()}
         
         # Get default board data (high risk)
-        board_data = plinko_game.get_board_data('high')
+        board_data = boards['high']
         
         # Get the specific wallet or default to primary wallet
         if wallet_id:
@@ -509,6 +752,7 @@ def plinko(wallet_id=None):
         
         return render_template('plinko.html', 
                              board_data=board_data, 
+                             boards=boards,
                              wallet=wallet,
                              all_wallets=current_user.wallets)
         
@@ -527,8 +771,9 @@ def api_plinko_bet():
         bet_amount = float(data.get('amount', 0))
         risk_level = data.get('risk_level', 'high')
         wallet_id = data.get('wallet_id')
+        balls = int(data.get('balls', 1))
         
-        print(f"🎰 PLINKO BET: User {current_user.username} betting {bet_amount} at {risk_level} risk")
+        print(f"🎰 PLINKO BET: User {current_user.username} betting {bet_amount} x {balls} at {risk_level} risk")
         
         if bet_amount <= 0:
             print(f"❌ Invalid bet amount: {bet_amount}")
@@ -549,9 +794,9 @@ def api_plinko_bet():
         print(f"💰 Current wallet balance: {wallet.balance} {wallet.currency}")
         
         plinko = Plinko()
-        result = plinko.place_bet(current_user.user_id, bet_amount, risk_level, wallet_id=wallet.wallet_id)
+        result = plinko.place_bet(current_user.user_id, bet_amount, risk_level, wallet_id=wallet.wallet_id, balls=balls)
         
-        print(f"🎲 Bet result: {result}")
+        print(f"🎲 Bet result: {result.get('message') or result.get('wallet_balance')}")
         
         return jsonify(result)
         
@@ -563,20 +808,17 @@ def api_plinko_bet():
 @login_required
 def api_plinko_board_data():
     """Get board data for a specific risk level"""
-    try:
-        from games.plinko import Plinko
-        
-        risk_level = request.args.get('risk', 'high')
-        plinko = Plinko()
-        board_data = plinko.get_board_data(risk_level)
-        
-        return jsonify({
-            'success': True,
-            'board_data': board_data
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    risk_level = request.args.get('risk', 'high')
+    board = plinko_boards().get(risk_level)
+    if board is None:
+        return jsonify({'success': False, 'message': 'Unknown risk level'})
+    
+    # Boards only change with a deploy; the ETag catches that once max_age runs out
+    response = Response(board['payload'], mimetype='application/json')
+    response.set_etag(board['etag'])
+    response.cache_control.private = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 @app.route('/blackjack')
 @app.route('/blackjack/<int:wallet_id>')
@@ -638,7 +880,8 @@ def api_blackjack_bet():
                 return jsonify({'success': False, 'message': 'No wallet found'})
         
         blackjack = Blackjack()
-        result = blackjack.place_bet(current_user.user_id, bet_amount, wallet_id=wallet.wallet_id)
+        result = blackjack.place_bet(current_user.user_id, bet_amount, wallet_id=wallet.wallet_id,
+                                     hint=bool(data.get('hint')))
         
         return jsonify(result)
         
@@ -660,7 +903,8 @@ def api_blackjack_action():
             return jsonify({'success': False, 'message': 'Missing bet_id or action'})
         
         blackjack = Blackjack()
-        result = blackjack.player_action(bet_id, action)
+        result = blackjack.player_action(bet_id, action, user_id=current_user.user_id,
+                                         hint=bool(data.get('hint')))
         
         return jsonify(result)
         
@@ -737,10 +981,19 @@ def admin_user_detail(user_id):
                                 joinedload(Bet.outcome))\
                         .order_by(Bet.placed_at.desc()).limit(20).all()
         
+        # Plinko bets store their path as a mask; expand it for display
+        plinko_paths = {
+            bet.bet_id: ''.join('R' if step['direction'] == 'right' else 'L'
+                                for step in stored_ball_path(bet.choice_data or {}))
+            for bet in bets
+            if bet.round and bet.round.game and bet.round.game.code == 'PLINKO'
+        }
+        
         return render_template('admin/user_detail.html', 
                              user=user, 
                              transactions=transactions[:50],  # Limit to 50 most recent
-                             bets=bets)
+                             bets=bets,
+                             plinko_paths=plinko_paths)
     
     except Exception as e:
         flash(f'Error loading user details: {str(e)}', 'danger')
@@ -867,7 +1120,9 @@ def admin_analytics():
         'game_revenue': [],
         'horse_racing': [],
         'transaction_patterns': [],
-        'betting_behavior': []
+        'betting_behavior': [],
+        'plinko_tables': [],
+        'slot_paytables': []
     }
     
     # Query 1: User Performance Analytics
@@ -974,27 +1229,18 @@ def admin_analytics():
             h.name,
             h.age,
             h.temperament,
-            COUNT(hr.round_id) as races_run,
-            COUNT(CASE WHEN hr.finish_place = 1 THEN 1 END) as wins,
-            COUNT(CASE WHEN hr.finish_place <= 3 THEN 1 END) as top3_finishes,
-            ROUND(AVG(hr.finish_place)::NUMERIC, 2) as avg_finish_position,
-            ROUND(MIN(hr.race_time_sec)::NUMERIC, 2) as best_time,
-            ROUND(AVG(hr.race_time_sec)::NUMERIC, 2) as avg_time,
-            CASE 
-                WHEN COUNT(hr.round_id) > 0 THEN 
-                    ROUND((COUNT(CASE WHEN hr.finish_place = 1 THEN 1 END)::NUMERIC / COUNT(hr.round_id) * 100), 1)
-                ELSE 0 
-            END as win_percentage,
-            CASE 
-                WHEN COUNT(hr.round_id) > 0 THEN 
-                    ROUND((COUNT(CASE WHEN hr.finish_place <= 3 THEN 1 END)::NUMERIC / COUNT(hr.round_id) * 100), 1)
-                ELSE 0 
-            END as top3_percentage
-        FROM horses h
-        LEFT JOIN horse_results hr ON h.horse_id = hr.horse_id
-        GROUP BY h.horse_id, h.name, h.age, h.temperament
-        HAVING COUNT(hr.round_id) > 0
-        ORDER BY COUNT(CASE WHEN hr.finish_place = 1 THEN 1 END) DESC, AVG(hr.finish_place) ASC;
+            hf.races_run,
+            hf.wins,
+            hf.top3_finishes,
+            ROUND(hf.total_finish_places::NUMERIC / hf.races_run, 2) as avg_finish_position,
+            ROUND(hf.best_time::NUMERIC, 2) as best_time,
+            ROUND(hf.total_race_time::NUMERIC / hf.races_run, 2) as avg_time,
+            ROUND(hf.wins::NUMERIC / hf.races_run * 100, 1) as win_percentage,
+            ROUND(hf.top3_finishes::NUMERIC / hf.races_run * 100, 1) as top3_percentage
+        FROM horse_form hf
+        JOIN horses h ON h.horse_id = hf.horse_id
+        WHERE hf.races_run > 0
+        ORDER BY hf.wins DESC, hf.total_finish_places::NUMERIC / hf.races_run ASC;
         """
         
         result = db.session.execute(text(horse_racing_sql))
@@ -1205,6 +1451,20 @@ def admin_analytics():
         db.session.rollback()
         analytics_results['betting_behavior'] = []
 
+    # Exact Plinko returns, from the board's walk rather than the bet history
+    try:
+        analytics_results['plinko_tables'] = Plinko().get_rtp_report()
+    except Exception as e:
+        print(f"Error in Plinko RTP report: {str(e)}")
+        db.session.rollback()
+
+    # Exact slot returns, from the reels and paytable rather than the bet history
+    try:
+        analytics_results['slot_paytables'] = Slots().get_rtp_report()
+    except Exception as e:
+        print(f"Error in slot RTP report: {str(e)}")
+        db.session.rollback()
+
     return render_template('admin/analytics.html', analytics=analytics_results)
 
 # Debug route for horse racing query
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Blackjack House Edge Simulator
+==============================
+Plays millions of BJ21 hands with a basic-strategy player and reports the
+game's measured RTP (with a confidence interval) and hands/sec.
+
+The hands follow the rules in games/blackjack.py: the same card codes and
+values, a shoe of BLACKJACK_DECKS decks reshuffled at SHOE_PENETRATION,
+four-card deal, dealer drawing to DEALER_STANDS_ON, and hit/stand as the
+only player actions. Hands are played thousands at a time as numpy arrays
+(one shoe per lane) across a process pool. --verify replays a sample of the
+simulated hands through Blackjack.determine_winner and fails if any payout
+disagrees, so the vectorized rules can't drift from the engine's.
+
+The run also works as a guard: with --expect-edge it exits non-zero when
+the expected house edge falls outside the measured confidence interval
+widened by --tolerance, e.g. after a rule change.
+
+No database is needed.
+
+Usage:
+    python benchmarks/blackjack_simulator.py
+    python benchmarks/blackjack_simulator.py --hands 10000000 --workers 8 --decks 8
+    python benchmarks/blackjack_simulator.py --expect-edge 0.024 --tolerance 0.002
+"""
+
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from games.blackjack import (Blackjack, CARD_TABLE, CARD_VALUES, DEALER_STANDS_ON,
+                             DEFAULT_SHOE_DECKS, SHOE_DECKS, SHOE_PENETRATION)
+
+RESULTS = ('win', 'lose', 'push', 'blackjack')
+PAYOUTS = {'win': 2.0, 'lose': 0.0, 'push': 1.0, 'blackjack': 2.5}
+
+# Hard value of each card code (aces as 1) and which codes are aces
+HARD_VALUES = np.array([1 if value == 11 else value for value in CARD_VALUES], dtype=np.int16)
+IS_ACE = np.array([value == 11 for value in CARD_VALUES])
+UPCARD_VALUES = np.array(CARD_VALUES, dtype=np.int16)
+
+# Upper bound on draws after the deal: a hand stops by hard 21, which takes at most 11 cards
+MAX_DRAWS = 12
+
+
+def basic_strategy():
+    """
+    Hit/stand basic strategy for a game without doubling or splitting
+
+    Returns:
+        ndarray: bool, indexed [soft, player total, dealer upcard value]; True to hit
+    """
+    hit = np.zeros((2, 32, 12), dtype=bool)
+    for upcard in range(2, 12):
+        for total in range(4, 22):
+            if total <= 11:
+                hit[0, total, upcard] = True
+            elif total == 12:
+                hit[0, total, upcard] = upcard not in (4, 5, 6)
+            elif total <= 16:
+                hit[0, total, upcard] = upcard >= 7
+        for total in range(12, 22):
+            if total <= 17:
+                hit[1, total, upcard] = True
+            elif total == 18:
+                hit[1, total, upcard] = upcard >= 9
+    return hit
+
+
+STRATEGY = basic_strategy()
+
+
+def hand_totals(hard, has_ace):
+    """Best totals and softness, counting one ace as 11 where it doesn't bust"""
+    soft = has_ace & (hard + 10 <= 21)
+    return hard + 10 * soft, soft
+
+
+class Tables:
+    """`lanes` blackjack tables, each dealing one hand per round from its own shoe"""
+
+    def __init__(self, lanes, decks, rng):
+        self.lanes = lanes
+        self.rng = rng
+        self.shoe_size = decks * len(CARD_TABLE)
+        self.cut = int(self.shoe_size * SHOE_PENETRATION)
+        self.base = np.tile(np.arange(len(CARD_TABLE), dtype=np.int16), decks)
+        self.shoes = self.rng.permuted(np.broadcast_to(self.base, (lanes, self.shoe_size)), axis=1)
+        self.position = np.zeros(lanes, dtype=np.int64)
+        self.index = np.arange(lanes)
+
+    def reshuffle_spent_shoes(self):
+        """New shoes for the tables whose cut card has come out"""
+        spent = np.flatnonzero(self.position >= self.cut)
+        if spent.size:
+            self.shoes[spent] = self.rng.permuted(
+                np.broadcast_to(self.base, (spent.size, self.shoe_size)), axis=1)
+            self.position[spent] = 0
+
+    def draw(self, mask=None):
+        """Next card at each table; tables outside mask don't draw (their card is ignored)"""
+        cards = self.shoes[self.index, np.minimum(self.position, self.shoe_size - 1)]
+        self.position += 1 if mask is None else mask
+        return cards
+
+    def play_round(self, record=False):
+        """
+        Play one hand at every table
+
+        Returns:
+            tuple: (payout multiplier per table, result index per table, and
+            when record is set the (player, dealer) card code lists per table)
+        """
+        self.reshuffle_spent_shoes()
+        first, second, third, fourth = (self.draw() for _ in range(4))
+        player_cards, dealer_cards = [first, third], [second, fourth]
+
+        player_hard = HARD_VALUES[first] + HARD_VALUES[third]
+        player_ace = IS_ACE[first] | IS_ACE[third]
+        dealer_hard = HARD_VALUES[second] + HARD_VALUES[fourth]
+        dealer_ace = IS_ACE[second] | IS_ACE[fourth]
+        upcard = UPCARD_VALUES[second]
+
+        player_total, _ = hand_totals(player_hard, player_ace)
+        dealer_total, _ = hand_totals(dealer_hard, dealer_ace)
+        player_blackjack = player_total == 21
+        dealer_blackjack = dealer_total == 21
+
+        # A blackjack on either side ends the hand at the deal
+        acting = ~(player_blackjack | dealer_blackjack)
+        for _ in range(MAX_DRAWS):
+            player_total, soft = hand_totals(player_hard, player_ace)
+            acting &= STRATEGY[soft.astype(np.int8), np.minimum(player_total, 31), upcard]
+            if not acting.any():
+                break
+            card = self.draw(acting)
+            player_hard += HARD_VALUES[card] * acting
+            player_ace |= IS_ACE[card] & acting
+            if record:
+                player_cards.append(np.where(acting, card, -1))
+            acting &= player_hard <= 21
+        player_total, _ = hand_totals(player_hard, player_ace)
+
+        # The dealer always plays out, as Blackjack.dealer_play does
+        for _ in range(MAX_DRAWS):
+            drawing = dealer_total < DEALER_STANDS_ON
+            if not drawing.any():
+                break
+            card = self.draw(drawing)
+            dealer_hard += HARD_VALUES[card] * drawing
+            dealer_ace |= IS_ACE[card] & drawing
+            dealer_total, _ = hand_totals(dealer_hard, dealer_ace)
+            if record:
+                dealer_cards.append(np.where(drawing, card, -1))
+
+        # Same precedence as Blackjack.determine_winner
+        player_bust = player_total > 21
+        dealer_bust = dealer_total > 21
+        result = np.select(
+            [player_bust,
+             dealer_bust & player_blackjack,
+             dealer_bust,
+             player_blackjack & dealer_blackjack,
+             player_blackjack,
+             dealer_blackjack,
+             player_total > dealer_total,
+             player_total < dealer_total],
+            [RESULTS.index('lose'), RESULTS.index('blackjack'), RESULTS.index('win'),
+             RESULTS.index('push'), RESULTS.index('blackjack'), RESULTS.index('lose'),
+             RESULTS.index('win'), RESULTS.index('lose')],
+            default=RESULTS.index('push'))
+        payout = np.array([PAYOUTS[name] for name in RESULTS])[result]
+
+        if not record:
+            return payout, result
+        hands = [([int(card[lane]) for card in player_cards if card[lane] >= 0],
+                  [int(card[lane]) for card in dealer_cards if card[lane] >= 0])
+                 for lane in range(self.lanes)]
+        return payout, result, hands
+
+
+def simulate_chunk(hands, lanes, decks, seed):
+    """
+    Play `hands` hands (rounded up to whole rounds across the lanes)
+
+    Returns:
+        tuple: (hands played, sum of payouts, sum of squared payouts, count per result)
+    """
+    tables = Tables(lanes, decks, np.random.default_rng(seed))
+    played = 0
+    total = 0.0
+    total_sq = 0.0
+    counts = np.zeros(len(RESULTS), dtype=np.int64)
+    while played < hands:
+        payout, result = tables.play_round()
+        played += lanes
+        total += payout.sum()
+        total_sq += np.square(payout).sum()
+        counts += np.bincount(result, minlength=len(RESULTS))
+    return played, total, total_sq, counts
+
+
+def verify_rules(hands, decks, seed):
+    """
+    Check simulated payouts against Blackjack.determine_winner
+
+    Returns:
+        int: Number of hands whose payout disagreed
+    """
+    game = Blackjack()
+    tables = Tables(hands, decks, np.random.default_rng(seed))
+    payout, _, played = tables.play_round(record=True)
+    mismatches = 0
+    for lane, (player_hand, dealer_hand) in enumerate(played):
+        # The dealer must have stopped at the first total of DEALER_STANDS_ON or more
+        dealer_values = [game._calculate_hand_value(dealer_hand[:count]) for count in range(2, len(dealer_hand) + 1)]
+        dealer_ok = all(value < DEALER_STANDS_ON for value in dealer_values[:-1]) and dealer_values[-1] >= DEALER_STANDS_ON
+        expected = game.determine_winner(player_hand, dealer_hand, [])['payout_multiplier']
+        if not dealer_ok or expected != payout[lane]:
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the BJ21 house edge with a basic-strategy player')
+    parser.add_argument('--hands', type=int, default=2_000_000, help='Hands to play')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--lanes', type=int, default=4096, help='Tables played in parallel per worker')
+    parser.add_argument('--decks', type=int, default=DEFAULT_SHOE_DECKS, choices=SHOE_DECKS, help='Decks per shoe')
+    parser.add_argument('--seed', type=int, default=21, help='Random seed')
+    parser.add_argument('--verify', type=int, default=20000, help='Hands to cross-check against Blackjack.determine_winner (0 to skip)')
+    parser.add_argument('--expect-edge', type=float, help='Fail unless the measured edge is consistent with this one')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='Slack added to the confidence interval for --expect-edge')
+    args = parser.parse_args()
+
+    print("🃏 BLACKJACK HOUSE EDGE SIMULATOR")
+    print("=" * 80)
+    print(f"   {args.decks} decks, cut at {SHOE_PENETRATION:.0%}, dealer stands on {DEALER_STANDS_ON}, "
+          f"blackjack pays 3:2, hit/stand only")
+
+    if args.verify:
+        mismatches = verify_rules(args.verify, args.decks, args.seed)
+        print(f"   Rules check: {args.verify} hands vs Blackjack.determine_winner, {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+    seeds = np.random.SeedSequence(args.seed).spawn(args.workers)
+    per_worker = -(-args.hands // args.workers)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunks = list(pool.map(simulate_chunk, [per_worker] * args.workers, [args.lanes] * args.workers,
+                               [args.decks] * args.workers, seeds))
+    elapsed = time.perf_counter() - start
+
+    played = sum(chunk[0] for chunk in chunks)
+    total = sum(chunk[1] for chunk in chunks)
+    total_sq = sum(chunk[2] for chunk in chunks)
+    counts = sum(chunk[3] for chunk in chunks)
+
+    rtp = total / played
+    std_error = np.sqrt((total_sq / played - rtp ** 2) / played)
+    low, high = rtp - 1.96 * std_error, rtp + 1.96 * std_error
+
+    print("-" * 80)
+    print(f"   Hands played:    {played:>14,}   ({args.workers} workers x {args.lanes} tables)")
+    print(f"   Elapsed:         {elapsed:>14.2f}s")
+    print(f"   Hands/sec:       {played / elapsed:>14,.0f}")
+    print("-" * 80)
+    for name, count in zip(RESULTS, counts):
+        print(f"   {name:<16} {count / played:>14.4%}")
+    print("-" * 80)
+    print(f"   RTP:             {rtp:>14.4%}   95% CI [{low:.4%}, {high:.4%}]")
+    print(f"   House edge:      {1 - rtp:>14.4%}   95% CI [{1 - high:.4%}, {1 - low:.4%}]")
+
+    if args.expect_edge is not None:
+        consistent = 1 - high - args.tolerance <= args.expect_edge <= 1 - low + args.tolerance
+        print(f"   Expected edge {args.expect_edge:.4%} (±{args.tolerance:.4%}): "
+              f"{'consistent' if consistent else 'OUT OF RANGE'}")
+        if not consistent:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
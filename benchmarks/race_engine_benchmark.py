@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Race Engine Benchmark
+=====================
+Compares races/sec of the original pure-Python race loop with the
+vectorized engine in games.race_engine, both one race per call (the
+/horse-racing/run-race path) and K races per call (the seeding path).
+
+No database is needed; the benchmark uses the seeded stable's stats.
+
+Usage:
+    python benchmarks/race_engine_benchmark.py
+    python benchmarks/race_engine_benchmark.py --legacy-races 20 --batch-size 2000
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from games.race_engine import (simulate_races, TEMPERAMENT_EFFECTS, DEFAULT_EFFECTS,
+                               RACE_DISTANCE, age_modifier)
+
+# Same 24 horses created by seeding/comprehensive_seed.py
+STABLE = [
+    ("Lightning Bolt", 3, 9.2, "confident"), ("Thunder Strike", 4, 8.8, "aggressive"),
+    ("Wind Runner", 2, 9.0, "nervous"), ("Fire Dash", 5, 8.5, "calm"),
+    ("Storm Chaser", 6, 8.3, "confident"), ("Star Galloper", 7, 8.1, "calm"),
+    ("Midnight Express", 8, 7.8, "unpredictable"), ("Golden Arrow", 9, 7.5, "calm"),
+    ("Silver Streak", 10, 7.2, "aggressive"), ("Old Thunder", 12, 6.8, "calm"),
+    ("Wise Runner", 11, 7.0, "confident"), ("Iron Will", 13, 6.5, "unpredictable"),
+    ("Chaos Theory", 4, 8.9, "unpredictable"), ("Zen Master", 6, 8.0, "calm"),
+    ("Hot Head", 5, 8.7, "aggressive"), ("Rising Star", 3, 8.4, "nervous"),
+    ("Dream Chaser", 4, 8.6, "confident"), ("Night Fury", 5, 8.2, "aggressive"),
+    ("Phoenix Rising", 7, 7.9, "confident"), ("Desert Storm", 8, 7.6, "unpredictable"),
+    ("Arctic Wind", 6, 8.1, "calm"), ("Volcanic Ash", 9, 7.3, "aggressive"),
+    ("Lucky Charm", 10, 6.9, "nervous"), ("Dark Horse", 11, 7.1, "unpredictable"),
+]
+HORSES = [SimpleNamespace(horse_id=i, name=name, age=age, base_speed=speed, temperament=temperament)
+          for i, (name, age, speed, temperament) in enumerate(STABLE, 1)]
+
+
+def legacy_simulate_race(horses):
+    """The original 1 ms pure-Python race loop from HorseRacing._simulate_race_times"""
+    horses_data = {}
+    for horse in horses:
+        effects = TEMPERAMENT_EFFECTS.get(horse.temperament.lower(), DEFAULT_EFFECTS)
+        horses_data[horse.horse_id] = {
+            'base_speed': (15.0 + float(horse.base_speed)) * age_modifier(horse.age),
+            'stability': effects['stability'],
+            'variance': effects['variance'],
+            'position': 0.0,
+            'finished': False,
+        }
+
+    current_time = 0.0
+    time_step = 0.001
+    finish_times = {}
+    while len(finish_times) < len(horses) and current_time < 30.0:
+        current_time += time_step
+        for horse_id, data in horses_data.items():
+            if not data['finished']:
+                speed_variation = random.uniform(-data['variance'], data['variance'])
+                current_speed = data['base_speed'] * (data['stability'] + speed_variation)
+                data['position'] += current_speed * time_step
+                if data['position'] >= RACE_DISTANCE:
+                    data['finished'] = True
+                    finish_times[horse_id] = round(current_time, 3)
+
+    for horse_id in horses_data:
+        if horse_id not in finish_times:
+            finish_times[horse_id] = round(30.0 + random.uniform(0.1, 1.0), 3)
+    return finish_times
+
+
+def timed(label, num_races, func):
+    """Run func once and print races/sec"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<34} {num_races:>7} races  {elapsed:8.3f}s  {num_races / elapsed:>10.1f} races/sec")
+    return num_races / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the horse race engine')
+    parser.add_argument('--legacy-races', type=int, default=10, help='Races to run with the legacy loop')
+    parser.add_argument('--single-races', type=int, default=200, help='Races to run one call at a time')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Races per call for the batch run')
+    parser.add_argument('--seed', type=int, default=306, help='Random seed for lineup selection')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    print("🏇 RACE ENGINE BENCHMARK")
+    print("=" * 80)
+
+    legacy_lineups = [random.sample(HORSES, 6) for _ in range(args.legacy_races)]
+    single_lineups = [random.sample(HORSES, 6) for _ in range(args.single_races)]
+    batch_lineups = [random.sample(HORSES, 6) for _ in range(args.batch_size)]
+
+    legacy = timed('legacy loop (1 race / call)', args.legacy_races,
+                   lambda: [legacy_simulate_race(lineup) for lineup in legacy_lineups])
+    single = timed('vectorized (1 race / call)', args.single_races,
+                   lambda: [simulate_races([lineup], rng) for lineup in single_lineups])
+    batch = timed(f'vectorized ({args.batch_size} races / call)', args.batch_size,
+                  lambda: simulate_races(batch_lineups, rng))
+
+    print("-" * 80)
+    print(f"   Speedup per race request: {single / legacy:8.1f}x")
+    print(f"   Speedup for batch seeding: {batch / legacy:8.1f}x")
+
+    # Sanity check: both engines should agree on typical finish times
+    lineup = HORSES[:6]
+    legacy_times = np.array([[legacy_simulate_race(lineup)[horse.horse_id] for horse in lineup]
+                             for _ in range(3)]).mean(axis=0)
+    engine_times = simulate_races([lineup] * 3, rng).mean(axis=0)
+    print("\n   Mean finish times, first six horses (legacy vs vectorized):")
+    for horse, old, new in zip(lineup, legacy_times, engine_times):
+        print(f"   {horse.name:<18} {old:7.3f}s  {new:7.3f}s")
+
+
+if __name__ == '__main__':
+    main()
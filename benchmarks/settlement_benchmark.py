@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Horse Race Settlement Benchmark
+===============================
+Measures how long it takes to settle a horse race with 10k and 100k bets
+using the set-based HorseRacing._settle_bets path, and compares it with
+the original per-bet ORM loop for the smaller sizes.
+
+The benchmark writes to the database configured by DATABASE_URL (the same
+one the app uses), so run it against a development database:
+
+    docker-compose exec web python benchmarks/settlement_benchmark.py
+    docker-compose exec web python benchmarks/settlement_benchmark.py --bets 10000 100000 --legacy-max 10000
+
+Every row it creates (benchmark users, wallets, rounds, bets, outcomes and
+transactions) is removed again when it finishes.
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, delete
+from app import app, db
+from models import Game, Round, Outcome, Bet, Wallet, Transaction, User, Horse, HorseRunner
+from games.horse_racing import HorseRacing
+
+BENCH_PREFIX = 'settle_bench_'
+
+
+def create_bench_users(num_users):
+    """Create throwaway users, each with a USD wallet"""
+    users = []
+    for i in range(num_users):
+        user = User(username=f'{BENCH_PREFIX}{i}', email=f'{BENCH_PREFIX}{i}@example.com', pw_hash='x')
+        db.session.add(user)
+        users.append(user)
+    db.session.flush()
+
+    wallets = []
+    for user in users:
+        wallet = Wallet(user_id=user.user_id, currency='USD', balance=Decimal('1000000'), is_primary=True)
+        db.session.add(wallet)
+        wallets.append(wallet)
+    db.session.commit()
+    return [(user.user_id, wallet.wallet_id) for user, wallet in zip(users, wallets)]
+
+
+def create_bench_race(game, horses, accounts, num_bets):
+    """Create a finished race with num_bets open bets and return (round, outcome, finish_order)"""
+    race = Round(game_id=game.game_id, started_at=datetime.now(), rng_seed='settlement_benchmark')
+    db.session.add(race)
+    db.session.flush()
+
+    for lane, horse in enumerate(horses, 1):
+        db.session.add(HorseRunner(round_id=race.round_id, horse_id=horse.horse_id, lane_no=lane, odds=Decimal('3.5')))
+
+    finish_order = [horse.horse_id for horse in random.sample(horses, len(horses))]
+    outcome = Outcome(round_id=race.round_id, payout_multiplier=Decimal('2.5'),
+                      outcome_data={'winner_horse_id': finish_order[0], 'finish_order': finish_order})
+    db.session.add(outcome)
+    db.session.flush()
+
+    rows = []
+    for _ in range(num_bets):
+        user_id, wallet_id = random.choice(accounts)
+        horse = random.choice(horses)
+        rows.append({
+            'round_id': race.round_id,
+            'user_id': user_id,
+            'amount': Decimal(random.randint(1, 100)),
+            'choice_data': {
+                'bet_type': random.choice(['win', 'place', 'show']),
+                'horse_id': horse.horse_id,
+                'lane_no': horses.index(horse) + 1,
+                'odds': 3.5,
+                'wallet_id': wallet_id
+            },
+            'placed_at': datetime.now()
+        })
+    db.session.execute(insert(Bet), rows)
+    db.session.commit()
+    return race, outcome, finish_order
+
+
+def legacy_settle(round_id, outcome_id, finish_order):
+    """The original per-bet settlement loop from HorseRacing.run_race"""
+    bets = Bet.query.filter_by(round_id=round_id).all()
+    for bet in bets:
+        bet.settled_at = datetime.now()
+        bet.outcome_id = outcome_id
+
+        bet_horse_id = bet.choice_data['horse_id']
+        bet_type = bet.choice_data.get('bet_type', 'win')
+        won = ((bet_type == 'win' and bet_horse_id == finish_order[0]) or
+               (bet_type == 'place' and bet_horse_id in finish_order[:2]) or
+               (bet_type == 'show' and bet_horse_id in finish_order[:3]))
+
+        if won:
+            payout = bet.amount * Decimal(str(bet.choice_data.get('odds', 2.5)))
+            bet.payout_amount = payout
+            wallet = Wallet.query.filter_by(user_id=bet.user_id).first()
+            wallet.balance += payout
+            db.session.add(Transaction(wallet_id=wallet.wallet_id, amount=payout, txn_type='win'))
+        else:
+            bet.payout_amount = Decimal('0')
+    db.session.commit()
+    return len(bets)
+
+
+def bulk_settle(round_id, outcome_id, finish_order):
+    """The set-based settlement path"""
+    total_bets, _ = HorseRacing()._settle_bets(round_id, outcome_id, finish_order)
+    db.session.commit()
+    return total_bets
+
+
+def timed_settlement(label, settle, game, horses, accounts, num_bets, rounds):
+    """Build a race with num_bets bets, settle it and print the latency"""
+    race, outcome, finish_order = create_bench_race(game, horses, accounts, num_bets)
+    rounds.append(race.round_id)
+
+    start = time.perf_counter()
+    settled = settle(race.round_id, outcome.outcome_id, finish_order)
+    elapsed = time.perf_counter() - start
+
+    print(f"   {label:<10} {num_bets:>8} bets  {elapsed * 1000:10.1f} ms  {settled / elapsed:>12.0f} bets/sec")
+    return elapsed
+
+
+def cleanup(rounds):
+    """Remove everything the benchmark created"""
+    db.session.rollback()
+    bench_users = [user_id for (user_id,) in db.session.query(User.user_id).filter(User.username.like(f'{BENCH_PREFIX}%'))]
+    bench_wallets = [wallet_id for (wallet_id,) in db.session.query(Wallet.wallet_id).filter(Wallet.user_id.in_(bench_users))]
+
+    db.session.execute(delete(Transaction).where(Transaction.wallet_id.in_(bench_wallets)))
+    db.session.execute(delete(Bet).where(Bet.round_id.in_(rounds)))
+    db.session.execute(delete(Outcome).where(Outcome.round_id.in_(rounds)))
+    db.session.execute(delete(HorseRunner).where(HorseRunner.round_id.in_(rounds)))
+    db.session.execute(delete(Round).where(Round.round_id.in_(rounds)))
+    db.session.execute(delete(Wallet).where(Wallet.wallet_id.in_(bench_wallets)))
+    db.session.execute(delete(User).where(User.user_id.in_(bench_users)))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark horse race bet settlement')
+    parser.add_argument('--bets', type=int, nargs='+', default=[10000, 100000], help='Bets per race')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='Largest race to settle with the legacy loop')
+    parser.add_argument('--users', type=int, default=500, help='Number of benchmark bettors')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    with app.app_context():
+        game = Game.query.filter_by(code='HORSE').first()
+        horses = Horse.query.limit(6).all()
+        if not game or len(horses) < 6:
+            print("❌ Seed the games and horses first (seeding/seed_games.py, seeding/seed_horses.py)")
+            return 1
+
+        print("🏁 SETTLEMENT BENCHMARK")
+        print(f"   Database: {db.engine.url.render_as_string(hide_password=True)}")
+        print("=" * 80)
+
+        rounds = []
+        try:
+            accounts = create_bench_users(args.users)
+            for num_bets in args.bets:
+                bulk = timed_settlement('bulk', bulk_settle, game, horses, accounts, num_bets, rounds)
+                if num_bets <= args.legacy_max:
+                    legacy = timed_settlement('legacy', legacy_settle, game, horses, accounts, num_bets, rounds)
+                    print(f"   {'speedup':<10} {num_bets:>8} bets  {legacy / bulk:10.1f}x")
+                print("-" * 80)
+        finally:
+            cleanup(rounds)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
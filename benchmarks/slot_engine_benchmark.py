@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Slot Engine Benchmark
+=====================
+Measures spins/sec of the multi-line slot engine in games.slot_engine for
+the SLOT catalogue rules (5 reels, 20 paylines), one spin per call (the
+/api/slots/bet path) and K spins per call (autospin), against the original
+3-reel single-line machine and a pure-Python 20-line evaluator.
+
+A verify pass replays sample spins through the pure-Python evaluator and
+checks every line pay matches the engine's.
+
+No database is needed.
+
+Usage:
+    python benchmarks/slot_engine_benchmark.py
+    python benchmarks/slot_engine_benchmark.py --batch-size 100000 --verify 5000
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from games.slots import SYMBOLS
+from games.slot_engine import compile_slot_engine, MIN_RUN
+
+# payout_rule_json of SLOT in seeding/seed_games.py
+SLOT_RULES = {"reels": 5, "paylines": 20, "rtp": 96}
+
+
+def legacy_spin():
+    """The original Slots._spin_reels and _calculate_payout: 3 reels, one line"""
+    symbols_list = []
+    for symbol, data in SYMBOLS.items():
+        symbols_list.extend([symbol] * data['weight'])
+    reels = [random.choice(symbols_list) for _ in range(3)]
+
+    if len(set(reels)) == 1:
+        return SYMBOLS[reels[0]]['payout']
+    if len(set(reels)) == 2:
+        for symbol in set(reels):
+            if reels.count(symbol) == 2:
+                return SYMBOLS[symbol]['payout'] / 2
+    return 0
+
+
+def python_line_pays(engine, stops):
+    """Pay each line of one spin with plain Python loops"""
+    strips = engine.strips.tolist()
+    lengths = engine.strip_lengths.tolist()
+    window = [[strips[reel][(stops[reel] + row) % lengths[reel]] for reel in range(engine.reels)]
+              for row in range(engine.rows)]
+    pays = []
+    for line in engine.lines.tolist():
+        symbols = [window[row][reel] for reel, row in enumerate(line)]
+        run = 1
+        while run < len(symbols) and symbols[run] == symbols[0]:
+            run += 1
+        pays.append(float(engine.pays[symbols[0], run]) if run >= MIN_RUN else 0.0)
+    return pays
+
+
+def timed(label, num_spins, func):
+    """Run func once and print spins/sec"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<36} {num_spins:>8} spins  {elapsed:8.3f}s  {num_spins / elapsed:>12.1f} spins/sec")
+    return num_spins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the multi-line slot engine')
+    parser.add_argument('--legacy-spins', type=int, default=100000, help='Spins of the original 3-reel machine')
+    parser.add_argument('--python-spins', type=int, default=5000, help='Spins of the pure-Python 20-line evaluator')
+    parser.add_argument('--single-spins', type=int, default=5000, help='Engine spins run one call at a time')
+    parser.add_argument('--batch-size', type=int, default=100000, help='Engine spins per call for the batch run')
+    parser.add_argument('--verify', type=int, default=2000, help='Spins to check against the pure-Python evaluator')
+    parser.add_argument('--seed', type=int, default=2020, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    engine = compile_slot_engine(SLOT_RULES, SYMBOLS)
+
+    print("🎰 SLOT ENGINE BENCHMARK")
+    print(f"   {engine.reels} reels x {engine.rows} rows, {engine.paylines} paylines, "
+          f"strips of {engine.strip_lengths.tolist()}")
+    print("=" * 88)
+
+    timed('legacy 3-reel, 1 line (1 / call)', args.legacy_spins,
+          lambda: [legacy_spin() for _ in range(args.legacy_spins)])
+    python_stops = rng.integers(0, engine.strip_lengths, size=(args.python_spins, engine.reels)).tolist()
+    python = timed('pure Python, 20 lines (1 / call)', args.python_spins,
+                   lambda: [python_line_pays(engine, stops) for stops in python_stops])
+    single = timed('engine, 20 lines (1 / call)', args.single_spins,
+                   lambda: [engine.spin(1, rng) for _ in range(args.single_spins)])
+    batch_result = {}
+    batch = timed(f'engine, 20 lines ({args.batch_size} / call)', args.batch_size,
+                  lambda: batch_result.update(engine.spin(args.batch_size, rng)))
+
+    print("-" * 88)
+    print(f"   Engine vs pure Python, one spin per call: {single / python:8.1f}x")
+    print(f"   Engine vs pure Python, batched:           {batch / python:8.1f}x")
+
+    multipliers = batch_result['multipliers']
+    print(f"\n   Batch RTP {multipliers.mean():.4f}, hit rate {(multipliers > 0).mean():.4f}, "
+          f"std dev {multipliers.std():.3f}")
+
+    if args.verify:
+        checked = engine.spin(args.verify, rng)
+        mismatches = sum(
+            not np.allclose(python_line_pays(engine, stops), line_pays)
+            for stops, line_pays in zip(checked['stops'].tolist(), checked['line_pays'])
+        )
+        print(f"   Verified {args.verify} spins against the pure-Python evaluator: {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
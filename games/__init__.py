@@ -7,6 +7,8 @@ Each game is implemented as a separate class with standardized methods.
 Available Games:
 - HorseRacing: Horse racing game with betting and race simulation
 - Slots: Classic 3-reel slot machine with standard symbols
+- Roulette: European single-zero roulette with every inside and outside bet
+- Minesweeper: 5x5 mines board kept as 25-bit masks, with cash-out multipliers
 
 Usage:
     from games.horse_racing import HorseRacing
@@ -15,18 +17,18 @@ Usage:
 
 Future Games:
 - Blackjack
-- Roulette
 - Plinko
-- Minesweeper
 """
 
 from .horse_racing import HorseRacing
 from .slots import Slots
 from .plinko import Plinko
 from .blackjack import Blackjack
+from .roulette import Roulette
+from .minesweeper import Minesweeper
 
 # Export all available games
-__all__ = ['HorseRacing', 'Slots', 'Plinko', 'Blackjack']
+__all__ = ['HorseRacing', 'Slots', 'Plinko', 'Blackjack', 'Roulette', 'Minesweeper']
 
 # Game registry for dynamic loading
 AVAILABLE_GAMES = {
@@ -34,9 +36,9 @@ AVAILABLE_GAMES = {
     'SLOT': Slots,
     'PLINKO': Plinko,
     'BJ21': Blackjack,
+    'ROULETTE': Roulette,
+    'MINESWEEP': Minesweeper,
     # Future games will be added here
-    # 'ROULETTE': Roulette,
-    # 'MINESWEEP': Minesweeper,
 }
 
 def get_game_class(game_code):
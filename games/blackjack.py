@@ -1,65 +1,145 @@
 import random
 import os
+import secrets
 from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
+from flask import current_app
 from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User
+from .hand_store import hand_store
+from .worker_lock import WorkerLock
+
+# Attempts at an action before giving up on a hand that keeps changing underneath us
+MAX_ACTION_ATTEMPTS = 3
+
+SUITS = ('hearts', 'diamonds', 'clubs', 'spades')
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+
+# Shoe sizes a table can be configured with (BLACKJACK_DECKS)
+SHOE_DECKS = (6, 8)
+DEFAULT_SHOE_DECKS = 6
+# A natural pays 3:2
+BLACKJACK_PAYS = 1.5
+# Dealer draws to this total and stands on it, soft or hard
+DEALER_STANDS_ON = 17
+# Share of the shoe dealt before the cut card comes out and the round moves to a new shoe
+SHOE_PENETRATION = 0.75
+
+# Held while a worker retires a round whose shoe is done and opens the next
+SHOE_CHANGE_LOCK_NAME = 'blackjack-shoe-change'
+
+
+def _card_image(rank, suit):
+    """Image filename for a card - the version without the "2" suffix"""
+    if rank == 'A':
+        return f'ace_of_{suit}.png'
+    if rank in ('J', 'Q', 'K'):
+        return f'{rank.lower()}_of_{suit}.png'
+    return f'{rank}_of_{suit}.png'
+
+
+# A card is stored as its code, suit index * 13 + rank index (0-51); this is
+# the display metadata for each code, built once per process
+CARD_TABLE = tuple(
+    {
+        'rank': rank,
+        'suit': suit,
+        'image': _card_image(rank, suit),
+        'display_name': f'{rank} of {suit.title()}'
+    }
+    for suit in SUITS for rank in RANKS
+)
+
+# Blackjack value of each card code, aces counted as 11
+CARD_VALUES = tuple(
+    11 if card['rank'] == 'A' else 10 if card['rank'] in ('J', 'Q', 'K') else int(card['rank'])
+    for card in CARD_TABLE
+)
+
+_CARD_CODES = {(card['rank'], card['suit']): code for code, card in enumerate(CARD_TABLE)}
+
+
+def card_code(card):
+    """Code for a card; also accepts the dicts stored by hands dealt before cards were encoded"""
+    if isinstance(card, int):
+        return card
+    return _CARD_CODES[(card['rank'], card['suit'])]
+
+
+def render_card(card):
+    """Display metadata (rank, suit, image, display_name) for a card"""
+    return CARD_TABLE[card_code(card)]
+
+
+def render_hand(hand):
+    """Display metadata for every card in a hand"""
+    return [render_card(card) for card in hand]
+
+
+@lru_cache(maxsize=16)
+def shoe_order(seed, decks):
+    """
+    The order a round's shoe deals in
+    
+    The shoe is a shuffle of `decks` full decks seeded by the round's
+    rng_seed, so any worker can rebuild it; only the dealing position is
+    stored.
+    
+    Returns:
+        tuple: decks * 52 card codes, top of the shoe first
+    """
+    cards = list(range(len(CARD_TABLE))) * decks
+    random.Random(seed).shuffle(cards)
+    return tuple(cards)
+
 
 class Blackjack:
     """
     Blackjack Game Implementation
     
     Features:
-    - Standard 52-card deck
+    - 6 or 8 deck shoe (BLACKJACK_DECKS), reshuffled at the cut card
     - Dealer stands on 17
     - Blackjack pays 3:2
     - Hit, Stand, Double Down actions
     - Proper card value calculations
     - Ace handling (1 or 11)
+    
+    Hands in play live in the hand store (games/hand_store.py), not in the
+    Bet row: the Bet is written when the hand is dealt and when it settles.
+    
+    Cards are card codes (0-51) everywhere they are dealt or stored;
+    render_card turns them into display dicts for API responses.
+    
+    Each round is one shoe. Its order comes from the round's rng_seed and
+    its dealing position is kept in the hand store, so every worker deals
+    from the same shoe. New hands move to a fresh round once the cut card
+    is reached; hands already in play finish from the old shoe.
     """
     
     def __init__(self):
         self.game_code = 'BJ21'
-        self.deck = self._create_deck()
-        self.card_values = {
-            'A': [1, 11], '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, 
-            '10': 10, 'J': 10, 'Q': 10, 'K': 10
-        }
-        
-    def _create_deck(self):
-        """Create a standard 52-card deck"""
-        suits = ['hearts', 'diamonds', 'clubs', 'spades']
-        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-        
-        deck = []
-        for suit in suits:
-            for rank in ranks:
-                # Map card to image filename - use the version without "2" suffix
-                if rank == 'A':
-                    filename = f'ace_of_{suit}.png'
-                elif rank in ['J', 'Q', 'K']:
-                    filename = f'{rank.lower()}_of_{suit}.png'
-                else:
-                    filename = f'{rank}_of_{suit}.png'
-                
-                deck.append({
-                    'rank': rank,
-                    'suit': suit,
-                    'image': filename,
-                    'display_name': f'{rank} of {suit.title()}'
-                })
-        
-        return deck
     
-    def _shuffle_deck(self):
-        """Shuffle the deck"""
-        random.shuffle(self.deck)
+    def shoe_decks(self):
+        """Decks in a new shoe"""
+        decks = current_app.config.get('BLACKJACK_DECKS', DEFAULT_SHOE_DECKS)
+        return decks if decks in SHOE_DECKS else DEFAULT_SHOE_DECKS
     
-    def _deal_card(self):
-        """Deal a card from the deck"""
-        if not self.deck:
-            self.deck = self._create_deck()
-            self._shuffle_deck()
-        return self.deck.pop()
+    def _deal_cards(self, round_id, count):
+        """
+        Deal the next cards from a round's shoe
+        
+        If the shoe is gone (the temp directory was cleared) or has run dry
+        under hands still in play, cards come from a freshly shuffled deck
+        instead, so the hand can still finish.
+        """
+        reserved = hand_store.take_from_shoe(round_id, count)
+        if reserved is not None:
+            position, seed, decks = reserved
+            shoe = shoe_order(seed, decks)
+            if position + count <= len(shoe):
+                return list(shoe[position:position + count])
+        return [secrets.randbelow(len(CARD_TABLE)) for _ in range(count)]
     
     def _calculate_hand_value(self, hand):
         """Calculate the value of a hand, handling Aces properly"""
@@ -67,12 +147,10 @@ class Blackjack:
         aces = 0
         
         for card in hand:
-            rank = card['rank']
-            if rank == 'A':
-                aces += 1
-                total += 11  # Start with 11 for Ace
-            else:
-                total += self.card_values[rank]
+            value = CARD_VALUES[card_code(card)]
+            if value == 11:
+                aces += 1  # Aces start at 11
+            total += value
         
         # Adjust for Aces if total is over 21
         while total > 21 and aces > 0:
@@ -102,7 +180,8 @@ class Blackjack:
             game = self.get_game()
             if not game:
                 return None
-            return Round.query.filter_by(game_id=game.game_id).filter(Round.ended_at.is_(None)).first()
+            return Round.query.filter_by(game_id=game.game_id).filter(Round.ended_at.is_(None))\
+                              .order_by(Round.round_id.desc()).first()
         except Exception as e:
             return None
     
@@ -131,15 +210,7 @@ class Blackjack:
             if not game:
                 return {'success': False, 'message': 'Game not found'}
             
-            # Shuffle deck for new round
-            self._shuffle_deck()
-            
-            round = Round(
-                game_id=game.game_id,
-                started_at=datetime.now(),
-                rng_seed=str(random.randint(1000000, 9999999))
-            )
-            db.session.add(round)
+            round = self._open_round(game)
             db.session.commit()
             
             return {'success': True, 'round_id': round.round_id}
@@ -148,16 +219,73 @@ class Blackjack:
             db.session.rollback()
             return {'success': False, 'message': f'Error starting round: {str(e)}'}
     
-    def deal_initial_hand(self):
-        """Deal initial 2 cards to player and dealer"""
-        try:
-            # Ensure we have a fresh deck
-            self.deck = self._create_deck()
-            self._shuffle_deck()
+    def _open_round(self, game):
+        """Add a round and open its shoe (the caller commits)"""
+        round = Round(
+            game_id=game.game_id,
+            started_at=datetime.now(),
+            rng_seed=secrets.token_hex(16)
+        )
+        db.session.add(round)
+        db.session.flush()
+        
+        # The shoe has to exist before any other worker can see the round
+        hand_store.open_shoe(round.round_id, round.rng_seed, self.shoe_decks())
+        return round
+    
+    def _shoe_in_play(self, round):
+        """Whether a round's shoe exists and hasn't reached the cut card"""
+        dealt = hand_store.shoe_position(round.round_id)
+        return dealt is not None and dealt[0] < int(dealt[1] * len(CARD_TABLE) * SHOE_PENETRATION)
+    
+    def _round_for_new_hand(self):
+        """
+        Get the round whose shoe deals the next hand
+        
+        Once the active round's shoe is past the cut card (or its shoe has
+        been lost), the round is retired and a new round opens a new shoe.
+        Retiring and opening happen in one commit under the shoe change
+        WorkerLock, so two workers can't both open a round; a worker that
+        finds the lock taken deals from whichever round is open, the old
+        shoe until the new round commits.
+        """
+        active_round = self.get_active_round()
+        if active_round and self._shoe_in_play(active_round):
+            return active_round
+        
+        with WorkerLock(SHOE_CHANGE_LOCK_NAME) as acquired:
+            if not acquired:
+                return self.get_active_round()
+            
+            # Another worker may have changed the shoe before we took the lock
+            active_round = self.get_active_round()
+            if active_round and self._shoe_in_play(active_round):
+                return active_round
             
-            # Deal 2 cards to player, 2 to dealer
-            player_hand = [self._deal_card(), self._deal_card()]
-            dealer_hand = [self._deal_card(), self._deal_card()]
+            game = self.get_game()
+            if not game:
+                return None
+            try:
+                if active_round:
+                    active_round.ended_at = datetime.now()
+                new_round = self._open_round(game)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                return None
+        
+        if active_round:
+            # Hands still in play finish from the retired shoe; older shoes are done
+            hand_store.close_shoes_before(active_round.round_id)
+        return new_round
+    
+    def deal_initial_hand(self, round_id):
+        """Deal initial 2 cards to player and dealer from the round's shoe"""
+        try:
+            # Deal 2 cards to player, 2 to dealer, alternating as at the table
+            cards = self._deal_cards(round_id, 4)
+            player_hand = [cards[0], cards[2]]
+            dealer_hand = [cards[1], cards[3]]
             
             return {
                 'success': True,
@@ -171,10 +299,10 @@ class Blackjack:
         except Exception as e:
             return {'success': False, 'message': f'Error dealing cards: {str(e)}'}
     
-    def hit(self, hand):
-        """Add a card to the hand"""
+    def hit(self, round_id, hand):
+        """Add a card from the round's shoe to the hand"""
         try:
-            new_card = self._deal_card()
+            new_card = self._deal_cards(round_id, 1)[0]
             hand.append(new_card)
             
             return {
@@ -187,13 +315,13 @@ class Blackjack:
         except Exception as e:
             return {'success': False, 'message': f'Error hitting: {str(e)}'}
     
-    def dealer_play(self, dealer_hand):
+    def dealer_play(self, round_id, dealer_hand):
         """Play dealer's hand according to rules (stand on 17)"""
         try:
             actions = []
             
-            while self._calculate_hand_value(dealer_hand) < 17:
-                new_card = self._deal_card()
+            while self._calculate_hand_value(dealer_hand) < DEALER_STANDS_ON:
+                new_card = self._deal_cards(round_id, 1)[0]
                 dealer_hand.append(new_card)
                 actions.append({
                     'action': 'hit',
@@ -235,7 +363,7 @@ class Blackjack:
         elif dealer_bust:
             if player_blackjack:
                 result = 'blackjack'
-                payout_multiplier = 2.5  # 3:2 payout
+                payout_multiplier = 1 + BLACKJACK_PAYS
             else:
                 result = 'win'
                 payout_multiplier = 2
@@ -244,7 +372,7 @@ class Blackjack:
             payout_multiplier = 1
         elif player_blackjack:
             result = 'blackjack'
-            payout_multiplier = 2.5  # 3:2 payout
+            payout_multiplier = 1 + BLACKJACK_PAYS
         elif dealer_blackjack:
             result = 'lose'
             payout_multiplier = 0
@@ -269,8 +397,8 @@ class Blackjack:
             'dealer_bust': dealer_bust
         }
     
-    def place_bet(self, user_id, bet_amount, wallet_id=None):
-        """Place a bet and start a new hand"""
+    def place_bet(self, user_id, bet_amount, wallet_id=None, hint=False):
+        """Place a bet and start a new hand; with hint, include the EV of hitting and standing"""
         try:
             if bet_amount <= 0:
                 return {'success': False, 'message': 'Bet amount must be positive'}
@@ -287,13 +415,10 @@ class Blackjack:
             if bet_amount < game.min_bet or bet_amount > game.max_bet:
                 return {'success': False, 'message': f'Bet must be between ${game.min_bet} and ${game.max_bet}'}
             
-            # Get or create active round
-            active_round = self.get_active_round()
+            # Get the round dealing from the current shoe
+            active_round = self._round_for_new_hand()
             if not active_round:
-                result = self.start_new_round()
-                if not result['success']:
-                    return result
-                active_round = self.get_active_round()
+                return {'success': False, 'message': 'Error starting round'}
             
             # Get user's wallet
             user = User.query.get(user_id)
@@ -312,7 +437,7 @@ class Blackjack:
                 return {'success': False, 'message': 'Insufficient funds'}
             
             # Deal initial hand
-            deal_result = self.deal_initial_hand()
+            deal_result = self.deal_initial_hand(active_round.round_id)
             if not deal_result['success']:
                 return deal_result
             
@@ -327,7 +452,7 @@ class Blackjack:
             # Check for immediate blackjack
             if deal_result['player_blackjack'] or deal_result['dealer_blackjack']:
                 # Complete the game immediately
-                dealer_result = self.dealer_play(deal_result['dealer_hand'].copy())
+                dealer_result = self.dealer_play(active_round.round_id, deal_result['dealer_hand'].copy())
                 winner_result = self.determine_winner(
                     deal_result['player_hand'], 
                     dealer_result['dealer_hand'],
@@ -345,7 +470,8 @@ class Blackjack:
                 choice_data={
                     'initial_hand': deal_result['player_hand'],
                     'dealer_hand': deal_result['dealer_hand'],  # Store dealer hand in bet
-                    'actions': []
+                    'actions': [],
+                    'wallet_id': wallet.wallet_id
                 },
                 settled_at=datetime.now() if game_state['game_complete'] else None
             )
@@ -411,11 +537,15 @@ class Blackjack:
             
             db.session.commit()
             
+            # The hand is played out of the hand store from here on
+            if not game_state['game_complete']:
+                hand_store.create(bet.bet_id, self._new_hand_state(bet, wallet.wallet_id))
+            
             response = {
                 'success': True,
                 'bet_id': bet.bet_id,
-                'player_hand': deal_result['player_hand'],
-                'dealer_hand': [deal_result['dealer_hand'][0]],  # Only show first card
+                'player_hand': render_hand(deal_result['player_hand']),
+                'dealer_hand': render_hand(deal_result['dealer_hand'][:1]),  # Only show first card
                 'dealer_hidden_card': True,
                 'player_value': deal_result['player_value'],
                 'dealer_showing': deal_result['dealer_showing'],
@@ -429,13 +559,15 @@ class Blackjack:
             # Add result info if game is complete
             if game_state['game_complete']:
                 response.update({
-                    'dealer_hand': game_state['dealer_final_hand'],
+                    'dealer_hand': render_hand(game_state['dealer_final_hand']),
                     'dealer_hidden_card': False,
                     'dealer_value': game_state['result']['dealer_value'],
                     'result': game_state['result']['result'],
                     'payout_multiplier': game_state['result']['payout_multiplier'],
                     'win_amount': float(bet.payout_amount) if bet.payout_amount else 0
                 })
+            elif hint:
+                response['hint'] = self.hint(deal_result['player_hand'], deal_result['dealer_hand'][0])
             
             return response
             
@@ -443,146 +575,327 @@ class Blackjack:
             db.session.rollback()
             return {'success': False, 'message': f'Error placing bet: {str(e)}'}
     
-    def player_action(self, bet_id, action):
-        """Handle player action (hit, stand, double)"""
+    def _new_hand_state(self, bet, wallet_id):
+        """Build the hand store snapshot for a freshly dealt hand"""
+        return {
+            'user_id': bet.user_id,
+            'wallet_id': wallet_id,
+            'round_id': bet.round_id,
+            'amount': str(bet.amount),
+            'player_hand': [card_code(card) for card in bet.choice_data['initial_hand']],
+            'dealer_hand': [card_code(card) for card in bet.choice_data['dealer_hand']],
+            'actions': [],
+            'status': 'playing'
+        }
+    
+    def _lost_hand(self, bet_id, user_id=None):
+        """
+        Answer an action on a hand the hand store doesn't have
+        
+        A hand the store has lost (e.g. the temp directory was cleared)
+        can't be played on: its Bet only holds the two dealt cards, so every
+        hit since the deal is gone with it. Its Bet is settled as void and
+        the stake returned, rather than rebuilding the hand from the deal.
+        
+        Returns:
+            dict: An error, with the refund if the hand was still open
+        """
+        bet = Bet.query.get(bet_id)
+        if not bet or (user_id is not None and bet.user_id != user_id):
+            return {'success': False, 'message': 'Bet not found'}
+        if bet.settled_at:
+            return {'success': False, 'message': 'Game already completed'}
+        
+        voided = self.void_hands([bet_id])
+        db.session.commit()
+        if bet_id not in voided:
+            return {'success': False, 'message': 'Game already completed'}
+        return dict(voided[bet_id], success=False, game_complete=True,
+                    message='This hand was lost, so your stake has been returned')
+    
+    def _finish_hand(self, state, reason):
+        """Play out the dealer and mark the hand ready to settle"""
+        dealer_result = self.dealer_play(state['round_id'], list(state['dealer_hand']))
+        state['status'] = 'settling'
+        state['reason'] = reason
+        state['dealer_final_hand'] = dealer_result['dealer_hand']
+        state['dealer_actions'] = dealer_result['dealer_actions']
+    
+    def hint(self, player_hand, dealer_upcard):
+        """EV of hitting and of standing, from the precomputed tables (games/blackjack_ev.py)"""
+        from .blackjack_ev import ev_hint
+        return ev_hint(player_hand, dealer_upcard, self.shoe_decks())
+    
+    def player_action(self, bet_id, action, user_id=None, hint=False):
+        """
+        Handle player action (hit, stand)
+        
+        Each action is applied to the hand store snapshot with compare-and-set;
+        if the hand changed since it was read, the action is retried against
+        the latest snapshot.
+        
+        Args:
+            bet_id (int): The hand's bet
+            action (str): 'hit' or 'stand'
+            user_id (int, optional): Only act on this user's hands
+            hint (bool): Include the EV of hitting and standing for the next
+                decision while the hand is still in play
+            
+        Returns:
+            dict: The action's result, plus the settlement once the hand is over
+        """
         try:
-            # Get the bet
-            bet = Bet.query.get(bet_id)
-            if not bet:
-                return {'success': False, 'message': 'Bet not found'}
-            
-            if bet.settled_at:
-                return {'success': False, 'message': 'Game already completed'}
-            
-            # Reconstruct game state from stored data
-            player_hand = bet.choice_data['initial_hand'].copy()
-            dealer_hand = bet.choice_data['dealer_hand'].copy()  # Get original dealer hand
-            actions = bet.choice_data.get('actions', [])
-            
-            # Apply previous actions to rebuild player hand
-            for prev_action in actions:
-                if prev_action['action'] == 'hit':
-                    player_hand.append(prev_action['card'])
+            if action not in ('hit', 'stand'):
+                return {'success': False, 'message': 'Invalid action'}
             
-            if action == 'hit':
-                hit_result = self.hit(player_hand.copy())
-                if not hit_result['success']:
-                    return hit_result
-                
-                # Record the action
-                actions.append({
-                    'action': 'hit',
-                    'card': hit_result['new_card']
-                })
-                
-                # Update bet choice_data
-                bet.choice_data = {
-                    'initial_hand': bet.choice_data['initial_hand'],
-                    'dealer_hand': bet.choice_data['dealer_hand'],  # Preserve dealer hand
-                    'actions': actions
-                }
-                
-                response = {
-                    'success': True,
-                    'action': 'hit',
-                    'new_card': hit_result['new_card'],
-                    'player_hand': hit_result['hand'],
-                    'player_value': hit_result['hand_value'],
-                    'is_bust': hit_result['is_bust'],
-                    'game_complete': hit_result['is_bust']
-                }
-                
-                # If bust, complete the game
-                if hit_result['is_bust']:
-                    response.update(self._complete_game(bet, hit_result['hand'], dealer_hand, 'bust'))
+            for attempt in range(MAX_ACTION_ATTEMPTS):
+                loaded = hand_store.get(bet_id, fresh=attempt > 0)
+                if loaded is None:
+                    return self._lost_hand(bet_id, user_id)
+                version, state = loaded
                 
-                db.session.commit()
-                return response
+                if user_id is not None and state['user_id'] != user_id:
+                    return {'success': False, 'message': 'Bet not found'}
                 
-            elif action == 'stand':
-                # Complete the game
-                actions.append({'action': 'stand'})
-                bet.choice_data = {
-                    'initial_hand': bet.choice_data['initial_hand'],
-                    'dealer_hand': bet.choice_data['dealer_hand'],  # Preserve dealer hand
-                    'actions': actions
-                }
+                # An earlier request finished the hand but didn't get to settle it
+                if state['status'] == 'settling':
+                    response = {'success': True, 'action': action, 'game_complete': True}
+                    response.update(self._settle_hand(bet_id, state))
+                    db.session.commit()
+                    hand_store.delete(bet_id)
+                    return response
                 
-                response = {
-                    'success': True,
-                    'action': 'stand',
-                    'game_complete': True
-                }
-                response.update(self._complete_game(bet, player_hand, dealer_hand, 'stand'))
+                if action == 'hit':
+                    new_card = self._deal_cards(state['round_id'], 1)[0]
+                    state['player_hand'].append(new_card)
+                    state['actions'].append({'action': 'hit', 'card': new_card})
+                    hand_value = self._calculate_hand_value(state['player_hand'])
+                    is_bust = hand_value > 21
+                    if is_bust:
+                        self._finish_hand(state, 'bust')
+                    
+                    if not hand_store.compare_and_set(bet_id, version, state):
+                        continue
+                    
+                    response = {
+                        'success': True,
+                        'action': 'hit',
+                        'new_card': render_card(new_card),
+                        'player_hand': render_hand(state['player_hand']),
+                        'player_value': hand_value,
+                        'is_bust': is_bust,
+                        'game_complete': is_bust
+                    }
+                    if hint and not is_bust:
+                        response['hint'] = self.hint(state['player_hand'], state['dealer_hand'][0])
+                else:
+                    state['actions'].append({'action': 'stand'})
+                    self._finish_hand(state, 'stand')
+                    
+                    if not hand_store.compare_and_set(bet_id, version, state):
+                        continue
+                    
+                    response = {
+                        'success': True,
+                        'action': 'stand',
+                        'game_complete': True
+                    }
                 
-                db.session.commit()
+                if state['status'] == 'settling':
+                    response.update(self._settle_hand(bet_id, state))
+                    db.session.commit()
+                    hand_store.delete(bet_id)
                 return response
             
-            else:
-                return {'success': False, 'message': 'Invalid action'}
+            return {'success': False, 'message': 'This hand is changing faster than you can click. Try again.'}
                 
         except Exception as e:
             db.session.rollback()
             return {'success': False, 'message': f'Error processing action: {str(e)}'}
     
-    def _complete_game(self, bet, player_hand, original_dealer_hand, reason):
-        """Complete the game and determine winner using the original dealer hand"""
+    def time_out_hand(self, bet_id):
+        """
+        Stand an abandoned hand, playing out the dealer as a stand would
+        
+        Returns:
+            dict: The hand's state, ready to settle, or None if the hand is
+            gone or someone acted on it meanwhile
+        """
+        loaded = hand_store.get(bet_id)
+        if loaded is None:
+            return None
+        version, state = loaded
+        if state['status'] == 'playing':
+            state['actions'].append({'action': 'stand'})
+            self._finish_hand(state, 'timeout')
+            if not hand_store.compare_and_set(bet_id, version, state):
+                return None
+        return state
+    
+    def _settle_hand(self, bet_id, state):
+        """
+        Settle a finished hand: the only write to its Bet after the deal
+        
+        The caller commits.
+        """
         try:
-            # Use the original dealer hand and play it out according to rules
-            dealer_hand = original_dealer_hand.copy()
-            dealer_result = self.dealer_play(dealer_hand)
-            
-            # Determine winner
-            winner_result = self.determine_winner(player_hand, dealer_result['dealer_hand'], bet.choice_data['actions'])
+            settled = self.settle_hands({bet_id: state})
+            if bet_id not in settled:
+                return {'success': False, 'message': 'Game already completed'}
+            return settled[bet_id]
             
-            # Create outcome
-            outcome = Outcome(
+        except Exception as e:
+            raise Exception(f'Error completing game: {str(e)}')
+    
+    def settle_hands(self, hands):
+        """
+        Settle a batch of finished hands
+        
+        The caller commits. The Bet rows are locked so a hand settles once
+        even if two requests race to settle it; hands whose Bet has already
+        settled are skipped. Each winning hand still gets its own Outcome
+        and win Transaction, but the bets, outcomes, wallets and
+        transactions of the whole batch are each read or written in one go.
+        
+        Args:
+            hands (dict): bet_id -> hand state with status 'settling'
+            
+        Returns:
+            dict: bet_id -> settlement details, for the hands settled here
+        """
+        bets = Bet.query.filter(Bet.bet_id.in_(list(hands)), Bet.settled_at.is_(None))\
+                        .order_by(Bet.bet_id).with_for_update().all()
+        if not bets:
+            return {}
+        
+        # Winnings go back to the wallet the stake came from
+        wallet_ids = sorted({hands[bet.bet_id]['wallet_id'] for bet in bets})
+        wallets = {wallet.wallet_id: wallet for wallet in
+                   Wallet.query.filter(Wallet.wallet_id.in_(wallet_ids)).order_by(Wallet.wallet_id).with_for_update()}
+        
+        # Determine winners and create outcomes
+        winners = {}
+        outcomes = {}
+        for bet in bets:
+            state = hands[bet.bet_id]
+            winner_result = self.determine_winner(state['player_hand'], state['dealer_final_hand'], state['actions'])
+            winners[bet.bet_id] = winner_result
+            outcomes[bet.bet_id] = Outcome(
                 round_id=bet.round_id,
                 outcome_data={
-                    'player_hand': player_hand,
-                    'dealer_hand': dealer_result['dealer_hand'],
+                    'player_hand': state['player_hand'],
+                    'dealer_hand': state['dealer_final_hand'],
                     'result': winner_result['result'],
                     'player_value': winner_result['player_value'],
                     'dealer_value': winner_result['dealer_value'],
-                    'reason': reason
+                    'reason': state['reason']
                 },
                 payout_multiplier=Decimal(str(winner_result['payout_multiplier']))
             )
-            db.session.add(outcome)
-            db.session.flush()
-            
-            # Update bet
-            bet.outcome_id = outcome.outcome_id
-            bet.settled_at = datetime.now()
+        db.session.add_all(outcomes.values())
+        db.session.flush()
+        
+        # Update bets, recording each whole hand, and credit winnings
+        settled_at = datetime.now()
+        bet_wallets = {}
+        for bet in bets:
+            state = hands[bet.bet_id]
+            winner_result = winners[bet.bet_id]
+            bet.choice_data = {
+                'initial_hand': state['player_hand'][:2],
+                'dealer_hand': state['dealer_hand'],
+                'actions': state['actions'],
+                'wallet_id': state['wallet_id']
+            }
+            bet.outcome_id = outcomes[bet.bet_id].outcome_id
+            bet.settled_at = settled_at
             bet.payout_amount = bet.amount * Decimal(str(winner_result['payout_multiplier']))
             
-            # Handle winnings
+            wallet = wallets.get(state['wallet_id']) or bet.user.get_primary_wallet()
+            bet_wallets[bet.bet_id] = wallet
             if winner_result['payout_multiplier'] > 0:
-                wallet = bet.user.get_primary_wallet()
-                win_amount = bet.amount * Decimal(str(winner_result['payout_multiplier']))
-                wallet.balance += win_amount
+                wallet.balance += bet.payout_amount
                 
                 # Create win transaction
-                win_transaction = Transaction(
+                db.session.add(Transaction(
                     wallet_id=wallet.wallet_id,
-                    amount=win_amount,
+                    amount=bet.payout_amount,
                     txn_type='win'
-                )
-                db.session.add(win_transaction)
-            
-            return {
-                'dealer_hand': dealer_result['dealer_hand'],
-                'dealer_value': winner_result['dealer_value'],
-                'dealer_actions': dealer_result['dealer_actions'],
-                'result': winner_result['result'],
-                'payout_multiplier': winner_result['payout_multiplier'],
+                ))
+        
+        return {
+            bet.bet_id: {
+                'dealer_hand': render_hand(hands[bet.bet_id]['dealer_final_hand']),
+                'dealer_value': winners[bet.bet_id]['dealer_value'],
+                'dealer_actions': [
+                    dict(dealer_action, card=render_card(dealer_action['card'])) if 'card' in dealer_action else dealer_action
+                    for dealer_action in hands[bet.bet_id]['dealer_actions']
+                ],
+                'result': winners[bet.bet_id]['result'],
+                'payout_multiplier': winners[bet.bet_id]['payout_multiplier'],
                 'win_amount': float(bet.payout_amount) if bet.payout_amount else 0,
-                'wallet_balance': float(bet.user.wallets[0].balance),
-                'player_value': winner_result['player_value']
+                'wallet_balance': float(bet_wallets[bet.bet_id].balance),
+                'player_value': winners[bet.bet_id]['player_value']
             }
-            
-        except Exception as e:
-            raise Exception(f'Error completing game: {str(e)}')
+            for bet in bets
+        }
+    
+    def void_hands(self, bet_ids):
+        """
+        Settle open hands the hand store has lost as void, returning each stake
+        
+        The caller commits. Like settle_hands, the Bet rows are locked and
+        bets that have already settled are skipped.
+        
+        Args:
+            bet_ids (list): The hands' bets
+            
+        Returns:
+            dict: bet_id -> settlement details, for the hands voided here
+        """
+        bets = Bet.query.filter(Bet.bet_id.in_(list(bet_ids)), Bet.settled_at.is_(None))\
+                        .order_by(Bet.bet_id).with_for_update().all()
+        if not bets:
+            return {}
+        
+        # Stakes go back to the wallet they came from
+        stake_wallets = {bet.bet_id: bet.choice_data.get('wallet_id') or bet.user.get_primary_wallet().wallet_id
+                         for bet in bets}
+        wallet_ids = sorted(set(stake_wallets.values()))
+        wallets = {wallet.wallet_id: wallet for wallet in
+                   Wallet.query.filter(Wallet.wallet_id.in_(wallet_ids)).order_by(Wallet.wallet_id).with_for_update()}
+        
+        outcomes = {
+            bet.bet_id: Outcome(
+                round_id=bet.round_id,
+                outcome_data={
+                    'player_hand': bet.choice_data['initial_hand'],
+                    'result': 'void',
+                    'reason': 'lost'
+                },
+                payout_multiplier=Decimal('1')
+            )
+            for bet in bets
+        }
+        db.session.add_all(outcomes.values())
+        db.session.flush()
+        
+        settled_at = datetime.now()
+        voided = {}
+        for bet in bets:
+            wallet = wallets[stake_wallets[bet.bet_id]]
+            bet.outcome_id = outcomes[bet.bet_id].outcome_id
+            bet.settled_at = settled_at
+            bet.payout_amount = bet.amount
+            wallet.balance += bet.amount
+            db.session.add(Transaction(wallet_id=wallet.wallet_id, amount=bet.amount, txn_type='win'))
+            voided[bet.bet_id] = {
+                'result': 'void',
+                'payout_multiplier': 1,
+                'win_amount': float(bet.amount),
+                'wallet_balance': float(wallet.balance)
+            }
+        return voided
     
     def get_game_status(self):
         """Get current game status"""
@@ -611,8 +924,9 @@ class Blackjack:
                 'max_bet': float(game.max_bet),
                 'house_edge': float(game.house_edge * 100),
                 'blackjack_payout': '3:2',
-                'dealer_rule': 'Stands on 17',
-                'deck_size': 52
+                'dealer_rule': f'Stands on {DEALER_STANDS_ON}',
+                'decks': self.shoe_decks(),
+                'deck_size': self.shoe_decks() * len(CARD_TABLE)
             }
         except Exception as e:
             return {'error': f'Error getting statistics: {str(e)}'} 
\ No newline at end of file
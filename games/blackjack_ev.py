@@ -0,0 +1,204 @@
+"""
+Blackjack EV Tables
+
+Expected value of hitting and of standing for every player hand against
+every dealer upcard, used for the optional "hint" in blackjack responses.
+
+Two tables are built per rule set (decks in the shoe, the dealer's stand
+total and the blackjack payout):
+- dealer: probability of each final dealer total for each upcard, given the
+  dealer doesn't have blackjack (a dealer blackjack ends the hand at the
+  deal, so any hand still being played has seen that it isn't one)
+- player: EV of standing and of hitting (then playing on perfectly) for
+  each hard total / ace / upcard, in units of the stake
+
+The dealer's draws are taken without replacement from the shoe less the
+upcard; the player's draws use the same composition without further
+removal, which is within a fraction of a percent for 6 and 8 deck shoes.
+
+Building the tables walks every dealer draw sequence (tens of
+milliseconds), far too slow to repeat per request, so they are written once
+to the temp directory and every worker memory-maps the files when it starts
+(load_ev_tables); a hint is then a couple of array lookups.
+
+Usage:
+    from games.blackjack_ev import load_ev_tables, ev_hint
+
+    load_ev_tables(decks)                                   # at startup
+    hint = ev_hint(player_hand, dealer_upcard, decks)       # {'hit', 'stand', 'best'}
+"""
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from .blackjack import CARD_VALUES, DEALER_STANDS_ON, BLACKJACK_PAYS, card_code
+
+# Bump when the way the tables are computed changes, so stale files are ignored
+EV_TABLE_VERSION = 1
+
+EV_TABLE_DIR = tempfile.gettempdir()
+
+# Card values 2-11 (ace as 11) and how many of each are in one deck
+DRAW_VALUES = tuple(range(2, 12))
+DECK_COUNTS = tuple(16 if value == 10 else 4 for value in DRAW_VALUES)
+
+# Dealer table columns: final totals 0-21, then bust
+DEALER_BUST = 22
+# Player table axes: [stand/hit, has an ace, hard total, upcard value]
+STAND, HIT = 0, 1
+MAX_HARD = 31
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _best_total(hard, has_ace):
+    return hard + 10 if has_ace and hard + 10 <= 21 else hard
+
+
+def _dealer_finals(hard, has_ace, counts, memo):
+    """Final-total distribution for a dealer hand, drawing from `counts` without replacement"""
+    total = _best_total(hard, has_ace)
+    if total > 21:
+        finals = np.zeros(DEALER_BUST + 1)
+        finals[DEALER_BUST] = 1.0
+        return finals
+    if total >= DEALER_STANDS_ON:
+        finals = np.zeros(DEALER_BUST + 1)
+        finals[total] = 1.0
+        return finals
+
+    key = (hard, has_ace, counts)
+    if key in memo:
+        return memo[key]
+    remaining = sum(counts)
+    finals = np.zeros(DEALER_BUST + 1)
+    for index, value in enumerate(DRAW_VALUES):
+        if counts[index]:
+            after = counts[:index] + (counts[index] - 1,) + counts[index + 1:]
+            finals += counts[index] / remaining * _dealer_finals(
+                hard + (1 if value == 11 else value), has_ace or value == 11, after, memo)
+    memo[key] = finals
+    return finals
+
+
+def build_dealer_table(decks):
+    """
+    Dealer final-total probabilities for each upcard, given no dealer blackjack
+
+    Returns:
+        ndarray: (12, 23); row = upcard value, column = final total or DEALER_BUST
+    """
+    table = np.zeros((12, DEALER_BUST + 1))
+    memo = {}
+    for up_index, upcard in enumerate(DRAW_VALUES):
+        counts = tuple(count * decks - (index == up_index) for index, count in enumerate(DECK_COUNTS))
+        up_hard = 1 if upcard == 11 else upcard
+
+        # The hole card can't make blackjack with the upcard
+        holes = [(index, value) for index, value in enumerate(DRAW_VALUES)
+                 if counts[index] and upcard + value != 21]
+        hole_total = sum(counts[index] for index, _ in holes)
+        for index, value in holes:
+            after = counts[:index] + (counts[index] - 1,) + counts[index + 1:]
+            table[upcard] += counts[index] / hole_total * _dealer_finals(
+                up_hard + (1 if value == 11 else value), upcard == 11 or value == 11, after, memo)
+    return table
+
+
+def build_player_table(dealer_table, decks):
+    """
+    EV of standing and of hitting for each player hand and upcard
+
+    Returns:
+        ndarray: (2, 2, 32, 12) indexed [STAND/HIT, has ace, hard total, upcard value]
+    """
+    player = np.full((2, 2, MAX_HARD + 1, 12), -1.0)
+    totals = np.arange(DEALER_BUST + 1)
+
+    for upcard in DRAW_VALUES:
+        finals = dealer_table[upcard]
+        counts = np.array([count * decks - (value == upcard) for value, count in zip(DRAW_VALUES, DECK_COUNTS)],
+                          dtype=float)
+        draw_odds = counts / counts.sum()
+
+        best = np.full((2, MAX_HARD + 1), -1.0)
+        for hard in range(21, 1, -1):
+            for has_ace in (0, 1):
+                total = _best_total(hard, has_ace)
+                player[STAND, has_ace, hard, upcard] = (
+                    finals[totals < total].sum() + finals[DEALER_BUST] - finals[total + 1:DEALER_BUST].sum())
+                player[HIT, has_ace, hard, upcard] = sum(
+                    odds * best[int(has_ace or value == 11), min(hard + (1 if value == 11 else value), MAX_HARD)]
+                    for value, odds in zip(DRAW_VALUES, draw_odds))
+                best[has_ace, hard] = max(player[STAND, has_ace, hard, upcard],
+                                          player[HIT, has_ace, hard, upcard])
+    return player
+
+
+def _table_path(kind, decks):
+    rule_set = f'd{decks}-s{DEALER_STANDS_ON}-bj{BLACKJACK_PAYS}-v{EV_TABLE_VERSION}'
+    return os.path.join(EV_TABLE_DIR, f'sarcastic-casino-bj-{kind}-{rule_set}.npy')
+
+
+def _save(path, table):
+    """Write a table so other workers never map a half-written file"""
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'wb') as handle:
+        np.save(handle, table)
+    os.replace(partial, path)
+
+
+def load_ev_tables(decks):
+    """
+    Memory-map the EV tables for a shoe size, building them on first use
+
+    Returns:
+        tuple: (dealer table, player table)
+    """
+    tables = _tables.get(decks)
+    if tables is not None:
+        return tables
+    with _tables_lock:
+        if decks in _tables:
+            return _tables[decks]
+        dealer_path, player_path = _table_path('dealer', decks), _table_path('player', decks)
+        try:
+            tables = np.load(dealer_path, mmap_mode='r'), np.load(player_path, mmap_mode='r')
+        except (OSError, ValueError):
+            dealer = build_dealer_table(decks)
+            _save(dealer_path, dealer)
+            _save(player_path, build_player_table(dealer, decks))
+            tables = np.load(dealer_path, mmap_mode='r'), np.load(player_path, mmap_mode='r')
+        _tables[decks] = tables
+        return tables
+
+
+def ev_hint(player_hand, dealer_upcard, decks):
+    """
+    EV of hitting and of standing on a hand
+
+    Args:
+        player_hand (list): The player's card codes
+        dealer_upcard (int): The dealer's face-up card code
+        decks (int): Decks in the shoe
+
+    Returns:
+        dict: hit and stand EV per unit staked, and the better action
+    """
+    _, player = load_ev_tables(decks)
+    values = [CARD_VALUES[card_code(card)] for card in player_hand]
+    hard = sum(1 if value == 11 else value for value in values)
+    has_ace = int(11 in values)
+    upcard = CARD_VALUES[card_code(dealer_upcard)]
+
+    hit = float(player[HIT, has_ace, min(hard, MAX_HARD), upcard])
+    stand = float(player[STAND, has_ace, min(hard, MAX_HARD), upcard])
+    return {
+        'hit': round(hit, 4),
+        'stand': round(stand, 4),
+        'best': 'hit' if hit > stand else 'stand'
+    }
@@ -0,0 +1,193 @@
+"""
+Minesweeper Board Store
+
+Holds every Minesweeper board in play, keyed by bet_id, as a handful of
+integers: the 25-bit mine mask, the 25-bit revealed mask, the mine count
+and who is playing for how much. A board is a few dozen bytes, so tens of
+thousands of them in play at once are nothing, and a click never loads or
+rewrites JSON.
+
+A reveal is one UPDATE that ORs the cell's bit into the revealed mask and
+works out the board's new status from the old masks in the same statement
+(`mines & bit` for a mine, `revealed | bit | mines == every cell` for a
+cleared board). It only matches a board still in play whose cell is still
+hidden, so a double-click or a second tab can't reveal the same cell
+twice, and there is no version to compare or retry.
+
+Like the blackjack hand store, the boards live in a SQLite file in the temp
+directory shared by every worker on the host. The Bet row is written when
+the board is opened and again when it settles, and nowhere in between.
+
+Board status:
+- playing: the player can reveal or cash out
+- lost, cleared, cashing: finished (hit a mine, revealed every safe cell,
+  cashed out) and waiting for its Bet to settle
+- void: abandoned before any reveal and timed out by the board sweeper,
+  which returns the stake (an abandoned board with reveals is cashed out)
+
+Usage:
+    from games.board_store import board_store
+
+    board_store.open(bet_id, user_id, wallet_id, round_id, amount, mines, mine_count)
+    board = board_store.reveal(bet_id, 1 << cell)     # None if it didn't apply
+    board = board_store.cash_out(bet_id)
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+BOARD_STORE_PATH = os.path.join(tempfile.gettempdir(), 'sarcastic-casino-boards.sqlite3')
+
+# Columns every read returns, in Board order
+BOARD_COLUMNS = 'bet_id, user_id, wallet_id, round_id, amount, mines, mine_count, revealed, status'
+
+
+class BoardStore:
+    """Minesweeper boards as mine and revealed bitmasks"""
+
+    def __init__(self, path=BOARD_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """One SQLite connection per thread, created on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS boards (
+                    bet_id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    wallet_id INTEGER NOT NULL,
+                    round_id INTEGER NOT NULL,
+                    amount TEXT NOT NULL,
+                    mines INTEGER NOT NULL,
+                    mine_count INTEGER NOT NULL,
+                    revealed INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'playing',
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _board(row):
+        return dict(zip(BOARD_COLUMNS.split(', '), row)) if row else None
+
+    def open(self, bet_id, user_id, wallet_id, round_id, amount, mines, mine_count):
+        """
+        Store a new board with every cell hidden
+
+        Args:
+            bet_id (int): The board's bet
+            user_id (int): The player
+            wallet_id (int): Wallet the stake came from and any win goes to
+            round_id (int): The bet's round
+            amount (Decimal): The stake
+            mines (int): Mine mask, bit n set for a mine on cell n
+            mine_count (int): Number of mines
+        """
+        self._connection().execute(
+            'INSERT OR REPLACE INTO boards (bet_id, user_id, wallet_id, round_id, amount, mines, mine_count, '
+            'revealed, status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, 0, \'playing\', ?)',
+            (bet_id, user_id, wallet_id, round_id, str(amount), mines, mine_count, time.time())
+        )
+
+    def get(self, bet_id):
+        """A board, or None if the store has no such board"""
+        return self._board(self._connection().execute(
+            f'SELECT {BOARD_COLUMNS} FROM boards WHERE bet_id = ?', (bet_id,)
+        ).fetchone())
+
+    def reveal(self, bet_id, bit, full_mask):
+        """
+        Reveal one cell of a board in play
+
+        Args:
+            bet_id (int): The board's bet
+            bit (int): The cell's bit
+            full_mask (int): Every cell's bit, to spot a cleared board
+
+        Returns:
+            dict: The board after the reveal (status 'lost' on a mine,
+            'cleared' once every safe cell is revealed), or None if the
+            board isn't in play or the cell was already revealed
+        """
+        return self._board(self._connection().execute(
+            f"""
+            UPDATE boards SET
+                revealed = revealed | :bit,
+                status = CASE WHEN mines & :bit THEN 'lost'
+                              WHEN (revealed | :bit | mines) = :full THEN 'cleared'
+                              ELSE 'playing' END,
+                updated_at = :now
+            WHERE bet_id = :bet_id AND status = 'playing' AND revealed & :bit = 0
+            RETURNING {BOARD_COLUMNS}
+            """,
+            {'bit': bit, 'full': full_mask, 'now': time.time(), 'bet_id': bet_id}
+        ).fetchone())
+
+    def cash_out(self, bet_id):
+        """
+        Stop a board in play that has at least one cell revealed
+
+        Returns:
+            dict: The board, now 'cashing', or None if it couldn't cash out
+        """
+        return self._board(self._connection().execute(
+            f"""
+            UPDATE boards SET status = 'cashing', updated_at = ?
+            WHERE bet_id = ? AND status = 'playing' AND revealed != 0
+            RETURNING {BOARD_COLUMNS}
+            """,
+            (time.time(), bet_id)
+        ).fetchone())
+
+    def time_out(self, bet_id, idle_before):
+        """
+        Finish a board in play that hasn't changed since idle_before
+
+        Returns:
+            dict: The board, now 'cashing' if any cell was revealed or
+            'void' if not, or None if it isn't in play or isn't idle
+        """
+        return self._board(self._connection().execute(
+            f"""
+            UPDATE boards SET
+                status = CASE WHEN revealed != 0 THEN 'cashing' ELSE 'void' END,
+                updated_at = ?
+            WHERE bet_id = ? AND status = 'playing' AND updated_at <= ?
+            RETURNING {BOARD_COLUMNS}
+            """,
+            (time.time(), bet_id, idle_before)
+        ).fetchone())
+
+    def last_updated(self, bet_ids):
+        """
+        When each of a set of boards last changed
+
+        Args:
+            bet_ids (list): The boards' bets
+
+        Returns:
+            dict: bet_id -> unix time of the last update, for the boards in the store
+        """
+        if not bet_ids:
+            return {}
+        placeholders = ', '.join('?' * len(bet_ids))
+        return dict(self._connection().execute(
+            f'SELECT bet_id, updated_at FROM boards WHERE bet_id IN ({placeholders})', list(bet_ids)
+        ).fetchall())
+
+    def delete(self, bet_id):
+        """Drop a board once it has settled"""
+        self._connection().execute('DELETE FROM boards WHERE bet_id = ?', (bet_id,))
+
+
+board_store = BoardStore()
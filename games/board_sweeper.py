@@ -0,0 +1,182 @@
+"""
+Minesweeper Board Sweeper
+
+A Minesweeper board whose player walks away never settles on its own: its
+Bet stays open with the stake already taken. The sweeper finds boards
+nobody has touched for MINESWEEPER_BOARD_TIMEOUT seconds and settles them,
+MINESWEEPER_SWEEP_BATCH boards per commit:
+- a board with safe cells revealed is cashed out at its current multiplier
+- a board with nothing revealed is void and its stake returned (the
+  player took no risk, and the cash-out table pays 1 at no reveals)
+- a finished board that never got to settle is settled as it stands
+- a board the board store has lost is void and its stake returned
+
+Candidates come from the partial index on open bets (ix_bets_unsettled_placed):
+a board can't have been idle for longer than it has existed, so only bets
+placed before the timeout are looked at (in UTC, as placed_at is stored).
+Their last move time comes from the board store's updated_at; boards the
+store has lost count as idle since they were placed.
+
+A board that fails to settle is rolled back and logged on its own; the rest
+of its batch still settles.
+
+Every worker runs a sweeper thread, but a sweep only happens under the
+'minesweeper-board-sweeper' WorkerLock, so workers never sweep side by
+side. Timing out is one UPDATE that only matches a board still in play and
+unchanged since the cutoff, so a player who comes back mid-sweep wins the
+race and keeps playing.
+
+The thread is started lazily on the first request, so scripts that import
+the app (seeding, migrations) never sweep.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from models import db, Bet, Round
+from .minesweeper import Minesweeper
+from .board_store import board_store
+from .worker_lock import WorkerLock
+
+BOARD_SWEEP_LOCK_NAME = 'minesweeper-board-sweeper'
+
+# Seconds between sweeps
+BOARD_SWEEP_INTERVAL = 60
+
+
+class BoardSweeper:
+    """Background thread that settles abandoned Minesweeper boards"""
+
+    def __init__(self, app, poll_interval=BOARD_SWEEP_INTERVAL):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._started = threading.Lock()
+
+    def start(self):
+        """Start the sweeper thread once per process"""
+        with self._started:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='minesweeper-board-sweeper', daemon=True)
+                self._thread.start()
+
+    def sweep(self, now=None):
+        """
+        Cash out or void every board idle past the timeout
+
+        Must be called inside an app context.
+
+        Args:
+            now (datetime, optional): Current time (naive means local time)
+
+        Returns:
+            int: Boards settled, or None if another worker is sweeping
+        """
+        # placed_at is a timestamptz, so compare in UTC
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        timeout = self.app.config['MINESWEEPER_BOARD_TIMEOUT']
+        batch_size = self.app.config['MINESWEEPER_SWEEP_BATCH']
+        idle_before = now.timestamp() - timeout
+
+        minesweeper = Minesweeper()
+        game = minesweeper.get_game()
+        if not game:
+            return 0
+
+        with WorkerLock(BOARD_SWEEP_LOCK_NAME) as acquired:
+            if not acquired:
+                return None
+
+            settled = 0
+            last_bet_id = 0
+            while True:
+                bets = db.session.execute(
+                    db.select(Bet)
+                    .join(Round, Round.round_id == Bet.round_id)
+                    .where(Bet.settled_at.is_(None),
+                           Bet.placed_at < now - timedelta(seconds=timeout),
+                           Round.game_id == game.game_id,
+                           Bet.bet_id > last_bet_id)
+                    .order_by(Bet.bet_id)
+                    .limit(batch_size)
+                ).scalars().all()
+                if not bets:
+                    break
+                last_bet_id = bets[-1].bet_id
+
+                updated = board_store.last_updated([bet.bet_id for bet in bets])
+                boards = []
+                for bet in bets:
+                    if bet.bet_id not in updated:
+                        if 'mine_mask' in (bet.choice_data or {}):
+                            boards.append(minesweeper.void_board(bet))
+                        continue
+                    if updated[bet.bet_id] > idle_before:
+                        continue
+                    board = minesweeper.time_out_board(bet.bet_id, idle_before)
+                    if board is not None:
+                        boards.append(board)
+
+                settled += self._settle(minesweeper, boards)
+
+            return settled
+
+    def _settle(self, minesweeper, boards):
+        """
+        Settle a batch of finished boards in one commit
+
+        If the batch fails it is rolled back and retried a board at a time,
+        so one bad board is logged and skipped rather than failing the
+        whole batch on every sweep.
+
+        Returns:
+            int: Boards settled
+        """
+        if not boards:
+            return 0
+        try:
+            swept = [minesweeper.record_settlement(board) for board in boards]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if len(boards) == 1:
+                self.app.logger.exception(f'Could not settle Minesweeper board {boards[0]["bet_id"]}')
+                return 0
+            return sum(self._settle(minesweeper, [board]) for board in boards)
+
+        for board in boards:
+            board_store.delete(board['bet_id'])
+        return sum(1 for settlement in swept if settlement['success'])
+
+    def _run(self):
+        """Sweeper loop"""
+        while True:
+            try:
+                with self.app.app_context():
+                    settled = self.sweep()
+                    if settled:
+                        self.app.logger.info(f'Settled {settled} abandoned Minesweeper boards')
+            except Exception:
+                self.app.logger.exception('Minesweeper board sweep failed')
+            time.sleep(self.poll_interval)
+
+
+def init_board_sweeper(app):
+    """
+    Start the board sweeper on the first request if MINESWEEPER_BOARD_SWEEPER is on
+
+    Args:
+        app (Flask): The application
+
+    Returns:
+        BoardSweeper: The sweeper (not yet started)
+    """
+    sweeper = BoardSweeper(app)
+
+    @app.before_request
+    def start_board_sweeper():
+        if app.config.get('MINESWEEPER_BOARD_SWEEPER'):
+            sweeper.start()
+
+    return sweeper
@@ -0,0 +1,228 @@
+"""
+Blackjack Hand State Store
+
+Holds the live state of every blackjack hand in play, keyed by bet_id, so a
+hit or stand doesn't have to reload the Bet, replay every earlier action out
+of choice_data and rewrite the whole JSON blob. The Bet row is written when
+the hand is dealt and again when it settles, and nowhere in between.
+
+Each hand is a small versioned snapshot. Writers use compare-and-set: an
+update only lands if the stored version is still the one the writer read,
+so two requests acting on the same hand (a double-click, two tabs, two
+workers) can't both apply.
+
+Storage has two levels:
+- an in-process LRU, so a worker that served the last action answers the
+  next one without touching the backing store
+- a SQLite file in the temp directory, shared by every worker on the host,
+  which is the source of truth. A stale LRU entry is caught by the version
+  check and reloaded.
+
+The same file holds each blackjack round's shoe cursor (shoes table): the
+shoe itself is a permutation derived from the round's seed, so the only
+shuffle state that has to be shared between workers is its seed and how
+many cards have been dealt from it. Cards are reserved with a single
+UPDATE ... RETURNING, so two workers never deal the same card.
+
+Usage:
+    from games.hand_store import hand_store
+
+    hand_store.create(bet_id, state)
+    version, state = hand_store.get(bet_id)
+    if not hand_store.compare_and_set(bet_id, version, new_state):
+        ...  # someone else changed the hand; reload and try again
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Hands kept in the per-process cache
+HAND_CACHE_SIZE = 1024
+
+HAND_STORE_PATH = os.path.join(tempfile.gettempdir(), 'sarcastic-casino-hands.sqlite3')
+
+
+class HandStore:
+    """Versioned blackjack hand snapshots with compare-and-set updates"""
+
+    def __init__(self, path=HAND_STORE_PATH, cache_size=HAND_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        """One SQLite connection per thread, created on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS hands (
+                    bet_id INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS shoes (
+                    round_id INTEGER PRIMARY KEY,
+                    seed TEXT NOT NULL,
+                    decks INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    opened_at REAL NOT NULL
+                )
+            """)
+            self._local.connection = connection
+        return connection
+
+    def _remember(self, bet_id, version, state):
+        with self._cache_lock:
+            self._cache[bet_id] = (version, state)
+            self._cache.move_to_end(bet_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, bet_id):
+        with self._cache_lock:
+            self._cache.pop(bet_id, None)
+
+    def get(self, bet_id, fresh=False):
+        """
+        Get a hand's latest snapshot
+
+        Args:
+            bet_id (int): The hand's bet
+            fresh (bool): Skip the in-process cache (e.g. after a failed update)
+
+        Returns:
+            tuple: (version, state dict), or None if the store has no such hand
+        """
+        if not fresh:
+            with self._cache_lock:
+                cached = self._cache.get(bet_id)
+                if cached is not None:
+                    self._cache.move_to_end(bet_id)
+                    return cached[0], json.loads(json.dumps(cached[1]))
+
+        row = self._connection().execute(
+            'SELECT version, state FROM hands WHERE bet_id = ?', (bet_id,)
+        ).fetchone()
+        if row is None:
+            self._forget(bet_id)
+            return None
+
+        version, state = row[0], json.loads(row[1])
+        self._remember(bet_id, version, state)
+        return version, json.loads(row[1])
+
+    def create(self, bet_id, state):
+        """
+        Store a newly dealt hand
+
+        Returns:
+            int: The hand's version (always 1)
+        """
+        self._connection().execute(
+            'INSERT OR REPLACE INTO hands (bet_id, version, state, updated_at) VALUES (?, 1, ?, ?)',
+            (bet_id, json.dumps(state), time.time())
+        )
+        self._remember(bet_id, 1, state)
+        return 1
+
+    def compare_and_set(self, bet_id, expected_version, state):
+        """
+        Replace a hand's snapshot if nobody has changed it since it was read
+
+        Args:
+            bet_id (int): The hand's bet
+            expected_version (int): Version the caller read
+            state (dict): The new snapshot
+
+        Returns:
+            bool: True if the update landed; False if the hand has moved on
+            (or no longer exists) and the caller must reload it
+        """
+        updated = self._connection().execute(
+            'UPDATE hands SET version = version + 1, state = ?, updated_at = ? '
+            'WHERE bet_id = ? AND version = ?',
+            (json.dumps(state), time.time(), bet_id, expected_version)
+        ).rowcount
+        if updated:
+            self._remember(bet_id, expected_version + 1, state)
+            return True
+        self._forget(bet_id)
+        return False
+
+    def last_updated(self, bet_ids):
+        """
+        When each of a set of hands last changed
+
+        Args:
+            bet_ids (list): The hands' bets
+
+        Returns:
+            dict: bet_id -> unix time of the last update, for the hands in the store
+        """
+        if not bet_ids:
+            return {}
+        placeholders = ', '.join('?' * len(bet_ids))
+        return dict(self._connection().execute(
+            f'SELECT bet_id, updated_at FROM hands WHERE bet_id IN ({placeholders})', list(bet_ids)
+        ).fetchall())
+
+    def delete(self, bet_id):
+        """Drop a hand once it has settled"""
+        self._connection().execute('DELETE FROM hands WHERE bet_id = ?', (bet_id,))
+        self._forget(bet_id)
+
+    def open_shoe(self, round_id, seed, decks):
+        """Start dealing a round's shoe from the top"""
+        self._connection().execute(
+            'INSERT OR IGNORE INTO shoes (round_id, seed, decks, position, opened_at) VALUES (?, ?, ?, 0, ?)',
+            (round_id, seed, decks, time.time())
+        )
+
+    def take_from_shoe(self, round_id, count):
+        """
+        Reserve the next cards of a round's shoe
+
+        Args:
+            round_id (int): The round whose shoe to deal from
+            count (int): Number of cards
+
+        Returns:
+            tuple: (position of the first reserved card, the shoe's seed,
+            decks in the shoe), or None if the store has no shoe for the round
+        """
+        return self._connection().execute(
+            'UPDATE shoes SET position = position + ? WHERE round_id = ? '
+            'RETURNING position - ?, seed, decks',
+            (count, round_id, count)
+        ).fetchone()
+
+    def shoe_position(self, round_id):
+        """
+        Get how far a round's shoe has been dealt
+
+        Returns:
+            tuple: (cards dealt, decks in the shoe), or None if there is no shoe
+        """
+        return self._connection().execute(
+            'SELECT position, decks FROM shoes WHERE round_id = ?', (round_id,)
+        ).fetchone()
+
+    def close_shoes_before(self, round_id):
+        """Drop the shoes of every round older than this one"""
+        self._connection().execute('DELETE FROM shoes WHERE round_id < ?', (round_id,))
+
+
+hand_store = HandStore()
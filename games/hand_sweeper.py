@@ -0,0 +1,183 @@
+"""
+Blackjack Hand Sweeper
+
+A blackjack hand whose player walks away after the deal never settles on
+its own: its Bet stays open with the stake already taken. The sweeper
+finds hands nobody has acted on for BLACKJACK_HAND_TIMEOUT seconds, stands
+them (the dealer plays out exactly as on a normal stand) and settles them,
+BLACKJACK_SWEEP_BATCH hands per commit.
+
+Candidates come from the partial index on open bets (ix_bets_unsettled_placed):
+a hand can't have been idle for longer than it has existed, so only bets
+placed before the timeout are looked at (in UTC, as placed_at is stored).
+Their last action time comes from the hand store. Hands the store has lost
+are settled as void and their stakes returned, since their Bet only holds
+the deal.
+
+A hand that fails to settle (e.g. its wallet is gone) is rolled back and
+logged on its own; the rest of its batch still settles.
+
+Every worker runs a sweeper thread, but a sweep only happens under the
+'blackjack-hand-sweeper' WorkerLock, so workers never sweep side by side.
+Standing goes through the hand store's compare-and-set, so a player who
+comes back mid-sweep wins the race and keeps playing.
+
+The thread is started lazily on the first request, so scripts that import
+the app (seeding, migrations) never sweep.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from models import db, Bet, Round
+from .blackjack import Blackjack
+from .hand_store import hand_store
+from .worker_lock import WorkerLock
+
+HAND_SWEEP_LOCK_NAME = 'blackjack-hand-sweeper'
+
+# Seconds between sweeps
+HAND_SWEEP_INTERVAL = 60
+
+
+class HandSweeper:
+    """Background thread that stands and settles abandoned blackjack hands"""
+
+    def __init__(self, app, poll_interval=HAND_SWEEP_INTERVAL):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._started = threading.Lock()
+
+    def start(self):
+        """Start the sweeper thread once per process"""
+        with self._started:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='blackjack-hand-sweeper', daemon=True)
+                self._thread.start()
+
+    def sweep(self, now=None):
+        """
+        Stand and settle every hand idle past the timeout, and void every
+        open hand the hand store has lost
+
+        Must be called inside an app context.
+
+        Args:
+            now (datetime, optional): Current time (naive means local time)
+
+        Returns:
+            int: Hands settled, or None if another worker is sweeping
+        """
+        # placed_at is a timestamptz, so compare in UTC
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        timeout = self.app.config['BLACKJACK_HAND_TIMEOUT']
+        batch_size = self.app.config['BLACKJACK_SWEEP_BATCH']
+        idle_before = now.timestamp() - timeout
+
+        blackjack = Blackjack()
+        game = blackjack.get_game()
+        if not game:
+            return 0
+
+        with WorkerLock(HAND_SWEEP_LOCK_NAME) as acquired:
+            if not acquired:
+                return None
+
+            settled = 0
+            last_bet_id = 0
+            while True:
+                bet_ids = db.session.execute(
+                    db.select(Bet.bet_id)
+                    .join(Round, Round.round_id == Bet.round_id)
+                    .where(Bet.settled_at.is_(None),
+                           Bet.placed_at < now - timedelta(seconds=timeout),
+                           Round.game_id == game.game_id,
+                           Bet.bet_id > last_bet_id)
+                    .order_by(Bet.bet_id)
+                    .limit(batch_size)
+                ).scalars().all()
+                if not bet_ids:
+                    break
+                last_bet_id = bet_ids[-1]
+
+                updated = hand_store.last_updated(bet_ids)
+                lost = [bet_id for bet_id in bet_ids if bet_id not in updated]
+                hands = {}
+                for bet_id in bet_ids:
+                    if bet_id not in updated or updated[bet_id] > idle_before:
+                        continue
+                    try:
+                        state = blackjack.time_out_hand(bet_id)
+                    except Exception:
+                        self.app.logger.exception(f'Could not time out blackjack hand {bet_id}')
+                        continue
+                    if state is not None:
+                        hands[bet_id] = state
+
+                settled += self._settle(blackjack, hands, lost)
+
+            return settled
+
+    def _settle(self, blackjack, hands, lost):
+        """
+        Settle timed-out hands and void lost ones in one commit
+
+        If the batch fails it is rolled back and retried a hand at a time,
+        so one bad hand is logged and skipped rather than failing the
+        whole batch on every sweep.
+
+        Returns:
+            int: Hands settled
+        """
+        if not hands and not lost:
+            return 0
+        try:
+            swept = blackjack.settle_hands(hands) if hands else {}
+            voided = blackjack.void_hands(lost) if lost else {}
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if len(hands) + len(lost) == 1:
+                bet_id = next(iter(hands)) if hands else lost[0]
+                self.app.logger.exception(f'Could not settle blackjack hand {bet_id}')
+                return 0
+            return (sum(self._settle(blackjack, {bet_id: state}, []) for bet_id, state in hands.items())
+                    + sum(self._settle(blackjack, {}, [bet_id]) for bet_id in lost))
+
+        for bet_id in hands:
+            hand_store.delete(bet_id)
+        return len(swept) + len(voided)
+
+    def _run(self):
+        """Sweeper loop"""
+        while True:
+            try:
+                with self.app.app_context():
+                    settled = self.sweep()
+                    if settled:
+                        self.app.logger.info(f'Settled {settled} abandoned blackjack hands')
+            except Exception:
+                self.app.logger.exception('Blackjack hand sweep failed')
+            time.sleep(self.poll_interval)
+
+
+def init_hand_sweeper(app):
+    """
+    Start the hand sweeper on the first request if BLACKJACK_HAND_SWEEPER is on
+
+    Args:
+        app (Flask): The application
+
+    Returns:
+        HandSweeper: The sweeper (not yet started)
+    """
+    sweeper = HandSweeper(app)
+
+    @app.before_request
+    def start_hand_sweeper():
+        if app.config.get('BLACKJACK_HAND_SWEEPER'):
+            sweeper.start()
+
+    return sweeper
@@ -0,0 +1,117 @@
+"""
+Horse Form Rollup
+
+Keeps one horse_form row per horse with its career record (races run, wins,
+top-3 finishes, best and total race time) and its last FORM_WINDOW finishes,
+so the horse list and the admin analytics read form in one query instead of
+scanning horse_results per horse.
+
+The rollup is updated incrementally by HorseRacing.run_race in the same
+transaction that writes the HorseResult rows. Each row remembers the last
+round it counted, so applying a race twice is a no-op. History written
+outside run_race (seeders, manual fixes) is picked up by rebuild_horse_form:
+
+    python seeding/backfill_horse_form.py
+"""
+
+from decimal import Decimal
+
+from sqlalchemy import select, func
+
+from models import db, HorseForm, HorseResult
+
+FORM_WINDOW = 5
+
+
+def average_finish(form):
+    """Average finish over the recent form window, or None if unraced"""
+    if not form or not form.recent_finishes:
+        return None
+    return round(sum(form.recent_finishes) / len(form.recent_finishes), 2)
+
+
+def record_results(round_id, results):
+    """
+    Fold one race's results into the form rollup
+
+    Must be called inside the transaction that writes the results; the
+    caller commits.
+
+    Args:
+        round_id (int): The race round
+        results (list): (horse_id, finish_place, race_time_sec) tuples
+    """
+    horse_ids = [horse_id for horse_id, _, _ in results]
+    forms = {form.horse_id: form for form in
+             HorseForm.query.filter(HorseForm.horse_id.in_(horse_ids)).with_for_update().all()}
+
+    for horse_id, finish_place, race_time in results:
+        race_time = Decimal(str(race_time))
+        form = forms.get(horse_id)
+        if form is None:
+            form = HorseForm(horse_id=horse_id, races_run=0, wins=0, top3_finishes=0,
+                             total_finish_places=0, total_race_time=Decimal('0'), recent_finishes=[])
+            db.session.add(form)
+        elif form.last_round_id is not None and form.last_round_id >= round_id:
+            continue
+
+        form.races_run += 1
+        form.wins += 1 if finish_place == 1 else 0
+        form.top3_finishes += 1 if finish_place <= 3 else 0
+        form.total_finish_places += finish_place
+        form.total_race_time += race_time
+        form.best_time = race_time if form.best_time is None else min(form.best_time, race_time)
+        # Reassign rather than mutate so the JSON column is marked dirty
+        form.recent_finishes = ([finish_place] + list(form.recent_finishes))[:FORM_WINDOW]
+        form.last_round_id = round_id
+
+
+def rebuild_horse_form():
+    """
+    Recompute every horse's form from horse_results
+
+    Returns:
+        int: Number of horses with form
+    """
+    totals = db.session.execute(
+        select(
+            HorseResult.horse_id,
+            func.count().label('races_run'),
+            func.sum(db.case((HorseResult.finish_place == 1, 1), else_=0)).label('wins'),
+            func.sum(db.case((HorseResult.finish_place <= 3, 1), else_=0)).label('top3_finishes'),
+            func.sum(HorseResult.finish_place).label('total_finish_places'),
+            func.min(HorseResult.race_time_sec).label('best_time'),
+            func.sum(HorseResult.race_time_sec).label('total_race_time'),
+            func.max(HorseResult.round_id).label('last_round_id'),
+        ).group_by(HorseResult.horse_id)
+    ).all()
+
+    ranked = select(
+        HorseResult.horse_id,
+        HorseResult.finish_place,
+        func.row_number().over(partition_by=HorseResult.horse_id,
+                               order_by=HorseResult.round_id.desc()).label('recency'),
+    ).subquery()
+    recent = {}
+    for horse_id, finish_place, _ in db.session.execute(
+            select(ranked).where(ranked.c.recency <= FORM_WINDOW)
+                          .order_by(ranked.c.horse_id, ranked.c.recency)):
+        recent.setdefault(horse_id, []).append(finish_place)
+
+    HorseForm.query.delete()
+    db.session.add_all(
+        HorseForm(
+            horse_id=row.horse_id,
+            races_run=row.races_run,
+            wins=row.wins,
+            top3_finishes=row.top3_finishes,
+            total_finish_places=row.total_finish_places,
+            best_time=row.best_time,
+            total_race_time=row.total_race_time,
+            recent_finishes=recent.get(row.horse_id, []),
+            last_round_id=row.last_round_id,
+        )
+        for row in totals
+    )
+    db.session.commit()
+    return len(totals)
@@ -0,0 +1,130 @@
+"""
+Horse Racing Odds Engine
+
+Prices a six-horse lineup from the race simulator itself rather than from
+hand-tuned factors. Each lineup is raced many thousands of times in one
+batch, the win/place/show probability of every runner is measured, and the
+posted decimal odds are the fair odds less the game's house edge:
+
+    odds = (1 - house_edge) / probability
+
+Odds are rounded down to the cent so rounding never eats into the edge.
+When a runner is so likely to finish in the money that its odds would fall
+below MIN_ODDS, that market is taken off the board (posted as
+OFF_BOARD_ODDS) and HorseRacing refuses bets on it.
+
+Prices are cached per process by lineup, so a lineup is only simulated the
+first time it is seen.
+
+Usage:
+    from games.horse_odds import lineup_odds
+
+    odds = lineup_odds(horses, game.house_edge)
+    odds[0]['win'], odds[0]['place'], odds[0]['show']  # Decimal odds for lane 1
+"""
+
+import threading
+from collections import OrderedDict
+from decimal import Decimal, ROUND_DOWN
+
+import numpy as np
+
+from .race_engine import sample_lineup
+
+
+# Number of races simulated per lineup
+ODDS_SIMULATIONS = 20000
+
+# Finishing places that pay out for each bet type
+PAYING_PLACES = {'win': 1, 'place': 2, 'show': 3}
+
+# Posted odds limits
+MIN_ODDS = Decimal('1.01')
+MAX_ODDS = Decimal('100.00')
+OFF_BOARD_ODDS = Decimal('1.00')  # A winning bet would only return the stake
+
+# Lineups kept in the per-process cache
+ODDS_CACHE_SIZE = 512
+
+_odds_cache = OrderedDict()
+_odds_cache_lock = threading.Lock()
+
+
+def lineup_probabilities(horses, num_races=ODDS_SIMULATIONS, rng=None):
+    """
+    Estimate win/place/show probabilities for a lineup by simulation
+
+    Ties are broken by lane order, as they are in HorseRacing.run_race.
+    Counts are Laplace-smoothed so no runner is ever priced at exactly 0 or 1.
+
+    Args:
+        horses (list): The horses in lane order
+        num_races (int): Number of races to simulate
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        dict: bet_type -> float array of probabilities, in lane order
+    """
+    times = sample_lineup(horses, num_races, rng)
+    finish_place = np.argsort(np.argsort(times, axis=1, kind='stable'), axis=1)
+
+    return {
+        bet_type: (np.count_nonzero(finish_place < places, axis=0) + 1) / (num_races + 2)
+        for bet_type, places in PAYING_PLACES.items()
+    }
+
+
+def price(probability, house_edge):
+    """
+    Convert a probability into posted decimal odds
+
+    Args:
+        probability (float): Chance the bet wins
+        house_edge (Decimal): Game house edge, e.g. Decimal('0.06')
+
+    Returns:
+        Decimal: Posted odds, or OFF_BOARD_ODDS if the market can't be offered
+    """
+    odds = (Decimal('1') - Decimal(str(house_edge))) / Decimal(str(probability))
+    odds = odds.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    if odds < MIN_ODDS:
+        return OFF_BOARD_ODDS
+    return min(odds, MAX_ODDS)
+
+
+def lineup_odds(horses, house_edge):
+    """
+    Get posted win/place/show odds for every runner in a lineup
+
+    Args:
+        horses (list): The horses in lane order
+        house_edge (Decimal): Game house edge
+
+    Returns:
+        list: One dict per runner, in lane order, mapping bet_type -> Decimal odds
+    """
+    key = (tuple((horse.horse_id, horse.age, str(horse.base_speed), horse.temperament.lower())
+                 for horse in horses), str(house_edge))
+
+    with _odds_cache_lock:
+        if key in _odds_cache:
+            _odds_cache.move_to_end(key)
+            return _odds_cache[key]
+
+    probabilities = lineup_probabilities(horses)
+    odds = [
+        {bet_type: price(probabilities[bet_type][lane], house_edge) for bet_type in PAYING_PLACES}
+        for lane in range(len(horses))
+    ]
+
+    with _odds_cache_lock:
+        _odds_cache[key] = odds
+        if len(_odds_cache) > ODDS_CACHE_SIZE:
+            _odds_cache.popitem(last=False)
+    return odds
+
+
+def clear_odds_cache():
+    """Drop all cached lineup prices (e.g. after horse stats change)"""
+    with _odds_cache_lock:
+        _odds_cache.clear()
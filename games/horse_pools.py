@@ -0,0 +1,111 @@
+"""
+Pari-mutuel Pool Maths for Horse Racing
+
+In pari-mutuel betting every stake goes into a pool for its bet type. The
+house takes its edge off the top and the rest is shared by the winning
+tickets, so odds are set by the bettors rather than the house.
+
+Pools are kept as a dict mapping (bet_type, horse_id) -> total staked.
+Everything here is O(runners); nothing touches the bets table.
+
+Payout rules (per 1 staked, stake included):
+- win:   net_pool / winner_pool
+- place/show: the stakes on the k horses that finish in the money are
+  returned first, the remaining net pool is split into one share per paying
+  horse, and each share is divided among the tickets on that horse:
+      1 + (net_pool - sum(paying pools)) / (paying horses * horse_pool)
+
+Every bet type has a floor of 1 (the stake back) when the pool is short,
+e.g. a win pool with nearly all of its money on the winner.
+
+Payouts are rounded down to the cent per 1 staked (breakage). A pool with
+no tickets on any paying horse is kept by the house.
+"""
+
+from decimal import Decimal, ROUND_DOWN
+
+from .horse_odds import PAYING_PLACES
+
+
+def pool_totals(pools):
+    """Total staked per bet type"""
+    totals = {bet_type: Decimal('0') for bet_type in PAYING_PLACES}
+    for (bet_type, _), amount in pools.items():
+        totals[bet_type] += amount
+    return totals
+
+
+def _breakage(multiplier):
+    """Round a payout per 1 staked down to the cent"""
+    return multiplier.quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+
+
+def _multiplier(bet_type, horse_pool, paying_pools, net_pool):
+    """Payout per 1 staked for a horse that finished in the money"""
+    if bet_type == 'win':
+        return _breakage(max(Decimal('1'), net_pool / horse_pool))
+    profit = (net_pool - sum(paying_pools)) / (len(paying_pools) * horse_pool)
+    return _breakage(max(Decimal('1'), 1 + profit))
+
+
+def live_odds(pools, horse_ids, house_edge):
+    """
+    Estimate current pari-mutuel odds for every runner
+
+    Win odds are exact for the current pools. Place and show odds assume the
+    other horses in the money carry an average share of the pool.
+
+    Args:
+        pools (dict): (bet_type, horse_id) -> total staked
+        horse_ids (list): Runners in the race
+        house_edge (Decimal): Game house edge
+
+    Returns:
+        dict: horse_id -> {bet_type: Decimal odds, or None if nothing is staked on it}
+    """
+    keep = 1 - Decimal(str(house_edge))
+    totals = pool_totals(pools)
+    odds = {horse_id: {} for horse_id in horse_ids}
+
+    for bet_type, places in PAYING_PLACES.items():
+        net_pool = totals[bet_type] * keep
+        for horse_id in horse_ids:
+            horse_pool = pools.get((bet_type, horse_id), Decimal('0'))
+            if horse_pool <= 0:
+                odds[horse_id][bet_type] = None
+                continue
+            others = (totals[bet_type] - horse_pool) / max(1, len(horse_ids) - 1)
+            paying_pools = [horse_pool] + [others] * (min(places, len(horse_ids)) - 1)
+            odds[horse_id][bet_type] = _multiplier(bet_type, horse_pool, paying_pools, net_pool)
+
+    return odds
+
+
+def settlement_payouts(pools, finish_order, house_edge):
+    """
+    Final payout per 1 staked for every winning (bet_type, horse_id)
+
+    Args:
+        pools (dict): (bet_type, horse_id) -> total staked
+        finish_order (list): Horse IDs in finishing order
+        house_edge (Decimal): Game house edge
+
+    Returns:
+        dict: (bet_type, horse_id) -> Decimal payout per 1 staked. Combinations
+        that are missing pay nothing.
+    """
+    keep = 1 - Decimal(str(house_edge))
+    totals = pool_totals(pools)
+    payouts = {}
+
+    for bet_type, places in PAYING_PLACES.items():
+        paying = [horse_id for horse_id in finish_order[:places]
+                  if pools.get((bet_type, horse_id), Decimal('0')) > 0]
+        if not paying:
+            continue
+        net_pool = totals[bet_type] * keep
+        paying_pools = [pools[(bet_type, horse_id)] for horse_id in paying]
+        for horse_id, horse_pool in zip(paying, paying_pools):
+            payouts[(bet_type, horse_id)] = _multiplier(bet_type, horse_pool, paying_pools, net_pool)
+
+    return payouts
@@ -2,7 +2,23 @@ import random
 import json
 from datetime import datetime, timedelta
 from decimal import Decimal
-from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User, Horse, HorseRunner, HorseResult
+from flask import current_app
+from sqlalchemy import update, insert, select, case, cast, func, literal, Integer, Numeric
+from sqlalchemy.orm import aliased, joinedload
+from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User, Horse, HorseRunner, HorseResult, HorsePool, HorseForm, HorseReplay, HorseTrack
+from .race_engine import simulate_races, simulate_replay, race_times_by_horse, REPLAY_FPS
+from .horse_odds import lineup_odds, PAYING_PLACES, MIN_ODDS
+from .horse_pools import live_odds, settlement_payouts
+from .horse_form import record_results, average_finish
+from .horse_roster import roster
+from .race_replay import encode_replay
+from .worker_lock import WorkerLock
+
+# Track used when a request doesn't name one
+DEFAULT_TRACK_CODE = 'MAIN'
+
+# Serializes runner draws across all tracks
+RUNNER_DRAW_LOCK_NAME = 'horse-runner-draw'
 
 
 class HorseRacing:
@@ -13,128 +29,213 @@ class HorseRacing:
     - Starting new races with real horse data
     - Managing betting on specific horses
     - Running races and determining winners based on horse stats
-    - Calculating payouts based on odds
+    - Calculating payouts from fixed odds or pari-mutuel pools
     - Race status management with detailed horse information
+    
+    Each instance works on one track. Tracks run independently: each has its
+    own open round, runners, pools, betting window and schedule.
     """
     
-    def __init__(self):
+    def __init__(self, track_code=DEFAULT_TRACK_CODE):
         self.game_code = 'HORSE'
         self.num_horses = 6
+        self.track_code = (track_code or DEFAULT_TRACK_CODE).upper()
+        self._track = None
         
     def get_game(self):
         """Get the horse racing game from database"""
         return Game.query.filter_by(code=self.game_code).first()
     
+    def get_track(self):
+        """Get this instance's track from database"""
+        if self._track is None:
+            self._track = HorseTrack.query.filter_by(code=self.track_code).first()
+        return self._track
+    
+    @staticmethod
+    def get_tracks():
+        """Get every active track, in track order"""
+        return HorseTrack.query.filter_by(is_active=True).order_by(HorseTrack.track_id).all()
+    
     def get_active_round(self):
-        """Get the currently active race round"""
+        """Get the currently active race round on this track"""
         game = self.get_game()
-        if not game:
+        track = self.get_track()
+        if not game or not track:
             return None
-        return Round.query.filter_by(game_id=game.game_id, ended_at=None).first()
+        return Round.query.filter_by(game_id=game.game_id, track_id=track.track_id, ended_at=None).first()
     
     def get_recent_rounds(self, limit=10):
-        """Get recent completed race rounds"""
+        """Get recent completed race rounds on this track"""
         game = self.get_game()
-        if not game:
+        track = self.get_track()
+        if not game or not track:
             return []
-        return Round.query.filter_by(game_id=game.game_id)\
+        return Round.query.filter_by(game_id=game.game_id, track_id=track.track_id)\
                          .filter(Round.ended_at.isnot(None))\
                          .order_by(Round.ended_at.desc())\
                          .limit(limit).all()
     
-    def _calculate_horse_odds(self, horse):
+    def race_interval(self):
+        """Time between race starts on this track"""
+        track = self.get_track()
+        seconds = track.race_interval_sec if track and track.race_interval_sec else current_app.config['HORSE_RACE_INTERVAL']
+        return timedelta(seconds=seconds)
+    
+    def betting_window(self):
+        """How long betting stays open on this track's scheduled races"""
+        track = self.get_track()
+        seconds = track.betting_window_sec if track and track.betting_window_sec else current_app.config['HORSE_BETTING_WINDOW']
+        return timedelta(seconds=seconds)
+    
+    def local_time(self, timestamp):
+        """Convert a database timestamp to a naive local datetime comparable with datetime.now()"""
+        if timestamp is not None and timestamp.tzinfo is not None:
+            return timestamp.astimezone().replace(tzinfo=None)
+        return timestamp
+    
+    def betting_closes_at(self, race_round):
         """
-        Calculate odds for a horse based on their stats
+        Get when betting closes for a round
+        
+        Only scheduled races have a betting window; manual races take bets
+        until someone runs them.
         
         Args:
-            horse (Horse): Horse model instance
+            race_round (Round): The race round
             
         Returns:
-            Decimal: Calculated odds
+            datetime: Local time betting closes, or None if it stays open
         """
-        # Base odds calculation based on horse stats
-        base_odds = Decimal('2.0')
-        
-        # Age factor (younger horses have slightly better odds in general)
-        age_factor = Decimal('1.0')
-        if horse.age <= 4:
-            age_factor = Decimal('0.9')  # Better odds for young horses
-        elif horse.age >= 10:
-            age_factor = Decimal('1.2')  # Worse odds for older horses
-            
-        # Speed factor (higher speed = better odds)
-        speed_factor = Decimal('1.0')
-        if horse.base_speed >= Decimal('8.0'):
-            speed_factor = Decimal('0.8')  # Better odds for fast horses
-        elif horse.base_speed <= Decimal('5.0'):
-            speed_factor = Decimal('1.3')  # Worse odds for slow horses
-            
-        # Temperament factor
-        temperament_factors = {
-            'calm': Decimal('0.9'),
-            'aggressive': Decimal('1.1'),
-            'nervous': Decimal('1.2'),
-            'confident': Decimal('0.8'),
-            'unpredictable': Decimal('1.3')
-        }
-        temperament_factor = temperament_factors.get(horse.temperament.lower(), Decimal('1.0'))
-        
-        # Add some randomness (±0.3)
-        random_factor = Decimal(str(random.uniform(0.7, 1.3)))
+        if not current_app.config.get('HORSE_RACE_SCHEDULER'):
+            return None
+        return self.local_time(race_round.started_at) + self.betting_window()
+    
+    def is_pari_mutuel(self, game):
+        """Check whether the game's payout rules call for pari-mutuel pools"""
+        return (game.payout_rule_json or {}).get('type') == 'pari-mutuel'
+    
+    def get_pools(self, round_id):
+        """
+        Get the pari-mutuel pool totals for a round
         
-        # Calculate final odds
-        odds = base_odds * age_factor * speed_factor * temperament_factor * random_factor
+        Args:
+            round_id (int): Race round ID
+            
+        Returns:
+            dict: (bet_type, horse_id) -> total staked, or None if the round has no pools
+        """
+        rows = self._get_pool_rows(round_id)
+        if not rows:
+            return None
+        return self._pools_from_rows(rows)
+    
+    def _get_pool_rows(self, round_id):
+        """Get the raw pool rows (bet_type, horse_id, total_amount, bet_count) for a round"""
+        return db.session.query(HorsePool.bet_type, HorsePool.horse_id,
+                                HorsePool.total_amount, HorsePool.bet_count)\
+                         .filter_by(round_id=round_id).all()
+    
+    def _pools_from_rows(self, rows):
+        """Map pool rows to (bet_type, horse_id) -> total staked"""
+        return {(row.bet_type, row.horse_id): Decimal(str(row.total_amount)) for row in rows}
+    
+    def _odds_for_bet(self, horse_runner, bet_type):
+        """
+        Get the posted odds for a bet type on a runner
         
-        # Ensure odds are within reasonable range (1.2 to 8.0)
-        odds = max(Decimal('1.2'), min(odds, Decimal('8.0')))
+        Runners from before place/show odds were posted fall back to their win odds.
         
-        return round(odds, 2)
+        Args:
+            horse_runner (HorseRunner): The runner being backed
+            bet_type (str): 'win', 'place' or 'show'
+            
+        Returns:
+            Decimal: Posted odds
+        """
+        odds = {
+            'win': horse_runner.odds,
+            'place': horse_runner.place_odds,
+            'show': horse_runner.show_odds
+        }[bet_type]
+        return odds if odds is not None else horse_runner.odds
     
     def start_new_race(self):
         """
         Start a new horse race round with real horses
         
+        Runner draws are serialized across tracks so two tracks opening at
+        the same moment can't both draw the same horse.
+        
         Returns:
             dict: Success status and round_id or error message
         """
+        with WorkerLock(RUNNER_DRAW_LOCK_NAME) as acquired:
+            if not acquired:
+                return {'success': False, 'message': 'Another track is drawing its runners. Try again in a moment.'}
+            return self._start_new_race()
+    
+    def _start_new_race(self):
+        """Open a round on this track and draw its runners (caller holds the draw lock)"""
         try:
             game = self.get_game()
             if not game:
                 return {'success': False, 'message': 'Horse racing game not found'}
             
+            track = self.get_track()
+            if not track or not track.is_active:
+                return {'success': False, 'message': 'Track not found'}
+            
             # Check if there's already an active round
             active_round = self.get_active_round()
             if active_round:
                 return {'success': False, 'message': 'Race already in progress'}
             
-            # Get available horses from database
-            available_horses = Horse.query.all()
-            if len(available_horses) < self.num_horses:
-                return {'success': False, 'message': f'Not enough horses in database. Need {self.num_horses}, found {len(available_horses)}'}
+            # A horse can only run on one track at a time
+            busy_horses = set(db.session.scalars(
+                select(HorseRunner.horse_id)
+                .join(Round, Round.round_id == HorseRunner.round_id)
+                .where(Round.game_id == game.game_id, Round.ended_at.is_(None))
+            ))
             
-            # Select random horses for this race
-            race_horses = random.sample(available_horses, self.num_horses)
+            # Select random horses for this race from the cached roster
+            race_horses = roster.sample(self.num_horses, exclude=busy_horses)
+            if race_horses is None:
+                available = len(roster.entries()) - len(busy_horses)
+                return {'success': False, 'message': f'Not enough horses available. Need {self.num_horses}, found {available}'}
             
             # Create new round
             new_round = Round(
                 game_id=game.game_id,
+                track_id=track.track_id,
                 started_at=datetime.now(),
                 rng_seed=f"horse_seed_{random.randint(100000, 999999)}"
             )
             db.session.add(new_round)
             db.session.flush()  # Get the round_id
             
+            # Price the lineup from the race simulator
+            lineup_prices = lineup_odds(race_horses, game.house_edge)
+            
             # Create horse runners for this race
-            for i, horse in enumerate(race_horses, 1):
-                odds = self._calculate_horse_odds(horse)
-                
+            for i, (horse, odds) in enumerate(zip(race_horses, lineup_prices), 1):
                 horse_runner = HorseRunner(
                     round_id=new_round.round_id,
                     horse_id=horse.horse_id,
                     lane_no=i,
-                    odds=odds
+                    odds=odds['win'],
+                    place_odds=odds['place'],
+                    show_odds=odds['show']
                 )
                 db.session.add(horse_runner)
+            db.session.flush()
+            
+            # Open an empty pool for every runner and bet type
+            db.session.execute(insert(HorsePool), [
+                {'round_id': new_round.round_id, 'horse_id': horse.horse_id, 'bet_type': bet_type,
+                 'total_amount': Decimal('0'), 'bet_count': 0}
+                for horse in race_horses for bet_type in PAYING_PLACES
+            ])
             
             db.session.commit()
             
@@ -162,6 +263,9 @@ class HorseRacing:
             if bet_amount <= 0:
                 return {'success': False, 'message': 'Bet amount must be positive'}
             
+            if bet_type not in PAYING_PLACES:
+                return {'success': False, 'message': 'Bet type must be win, place or show'}
+            
             # Get game and check limits
             game = self.get_game()
             if not game:
@@ -175,6 +279,10 @@ class HorseRacing:
             if not active_round:
                 return {'success': False, 'message': 'No active race'}
             
+            closes_at = self.betting_closes_at(active_round)
+            if closes_at and datetime.now() >= closes_at:
+                return {'success': False, 'message': 'Betting is closed for this race'}
+            
             # Validate that the horse is actually running in this race
             horse_runner = HorseRunner.query.filter_by(
                 round_id=active_round.round_id,
@@ -184,6 +292,18 @@ class HorseRacing:
             if not horse_runner:
                 return {'success': False, 'message': 'Selected horse is not running in this race'}
             
+            pools = self.get_pools(active_round.round_id) if self.is_pari_mutuel(game) else None
+            if pools is not None:
+                # Pari-mutuel odds aren't fixed; record the current estimate for reference
+                # Estimated over the whole field, as get_race_status shows it
+                runner_ids = [runner.horse_id for runner in
+                              HorseRunner.query.filter_by(round_id=active_round.round_id).all()]
+                odds = live_odds(pools, runner_ids, game.house_edge)[horse_id][bet_type]
+            else:
+                odds = self._odds_for_bet(horse_runner, bet_type)
+                if odds < MIN_ODDS:
+                    return {'success': False, 'message': f'That {bet_type} market is off the board - even the bookies know how this one ends'}
+            
             # Get user's wallet
             user = User.query.get(user_id)
             if not user or not user.wallets:
@@ -226,11 +346,23 @@ class HorseRacing:
                     'bet_type': bet_type, 
                     'horse_id': horse_id,
                     'lane_no': horse_runner.lane_no,
-                    'odds': float(horse_runner.odds)
+                    'odds': float(odds) if odds is not None else None,
+                    'wallet_id': wallet.wallet_id
                 },
                 placed_at=datetime.now()
             )
             db.session.add(bet)
+            
+            # Add the stake to its pool atomically so concurrent bets can't lose updates
+            db.session.execute(
+                update(HorsePool)
+                .where(HorsePool.round_id == active_round.round_id,
+                       HorsePool.horse_id == horse_id,
+                       HorsePool.bet_type == bet_type)
+                .values(total_amount=HorsePool.total_amount + bet_amount,
+                        bet_count=HorsePool.bet_count + 1)
+                .execution_options(synchronize_session=False)
+            )
             db.session.commit()
             
             return {'success': True, 'message': 'Bet placed successfully'}
@@ -244,95 +376,40 @@ class HorseRacing:
         Simulate a live horse race where horses run simultaneously 
         and we record the exact timestamp when each horse crosses the finish line
         
+        The race itself is run by the vectorized engine in games.race_engine.
+        
         Args:
             horse_runners (list): List of HorseRunner objects
             
         Returns:
             dict: horse_id -> finish_timestamp mapping
         """
-        import time
-        
-        # Race parameters
-        race_distance = 200  # meters (shorter sprint race for more realistic times)
-        simulation_speed = 1000  # Speed up simulation (1000x faster than real time)
+        times = simulate_races([[runner.horse for runner in horse_runners]])[0]
+        return race_times_by_horse([runner.horse_id for runner in horse_runners], times)
+    
+    def _simulate_race_replay(self, horse_runners):
+        """
+        Run the race and record it for the track animation
         
-        # Calculate each horse's running speed in meters per second
-        horses_data = {}
-        for runner in horse_runners:
-            horse = runner.horse
-            
-            # Base speed calculation (convert horse.base_speed to m/s)
-            # Assume base_speed is on a scale of 1-10, convert to realistic horse speeds (15-25 m/s)
-            base_speed_ms = 15.0 + (float(horse.base_speed) * 1.0)  # 15-25 m/s range
-            
-            # Temperament affects speed consistency during the race
-            temperament_effects = {
-                'calm': {'stability': 0.95, 'variance': 0.02},       # Very consistent
-                'confident': {'stability': 0.98, 'variance': 0.015}, # Most consistent  
-                'aggressive': {'stability': 0.85, 'variance': 0.08}, # Fast but erratic
-                'nervous': {'stability': 0.80, 'variance': 0.12},    # Very inconsistent
-                'unpredictable': {'stability': 0.75, 'variance': 0.15} # Extremely variable
-            }
+        Args:
+            horse_runners (list): List of HorseRunner objects
             
-            effects = temperament_effects.get(horse.temperament.lower(), 
-                                            {'stability': 0.90, 'variance': 0.05})
-            
-            # Age affects overall performance
-            age_modifier = 1.0
-            if horse.age < 3:
-                age_modifier = 0.85  # Young horses not at peak
-            elif horse.age <= 6:
-                age_modifier = 1.0   # Prime age
-            elif horse.age <= 9:
-                age_modifier = 0.95  # Slightly past prime
-            else:
-                age_modifier = 0.80  # Older horses slower
-            
-            horses_data[runner.horse_id] = {
-                'base_speed': base_speed_ms * age_modifier,
-                'stability': effects['stability'],
-                'variance': effects['variance'],
-                'position': 0.0,  # Current position in meters
-                'finished': False,
-                'finish_time': None
-            }
-        
-        # Simulate the race step by step
-        current_time = 0.0
-        time_step = 0.001  # 1 millisecond steps for precision
-        finish_times = {}
-        
-        while len(finish_times) < len(horse_runners) and current_time < 30.0:  # Max 30 seconds
-            current_time += time_step
-            
-            for horse_id, data in horses_data.items():
-                if not data['finished']:
-                    # Calculate current speed with random variation
-                    speed_variation = random.uniform(-data['variance'], data['variance'])
-                    current_speed = data['base_speed'] * (data['stability'] + speed_variation)
-                    
-                    # Move horse forward
-                    data['position'] += current_speed * time_step
-                    
-                    # Check if horse crossed finish line
-                    if data['position'] >= race_distance:
-                        data['finished'] = True
-                        data['finish_time'] = current_time
-                        finish_times[horse_id] = round(current_time, 3)
-        
-        # Handle any horses that didn't finish (shouldn't happen with realistic parameters)
-        for horse_id, data in horses_data.items():
-            if horse_id not in finish_times:
-                # Assign a time based on how far they got
-                estimated_time = 30.0 + random.uniform(0.1, 1.0)
-                finish_times[horse_id] = round(estimated_time, 3)
-        
-        return finish_times
+        Returns:
+            tuple: (horse_id -> finish time mapping, encoded replay payload)
+        """
+        horse_runners = sorted(horse_runners, key=lambda runner: runner.lane_no)
+        horse_ids = [runner.horse_id for runner in horse_runners]
+        times, frames = simulate_replay([runner.horse for runner in horse_runners])
+        return race_times_by_horse(horse_ids, times), encode_replay(horse_ids, frames, REPLAY_FPS)
 
-    def run_race(self):
+    def run_race(self, require_bets=True):
         """
         Execute the horse race and determine winner based on horse stats
         
+        Args:
+            require_bets (bool): Refuse to run a race nobody has bet on. The
+                race scheduler turns this off so every scheduled race runs.
+        
         Returns:
             dict: Race results including winner, order, and round_id
         """
@@ -347,17 +424,25 @@ class HorseRacing:
                 return {'success': False, 'message': 'No active race'}
             
             # Check if there are any bets
-            bets = Bet.query.filter_by(round_id=active_round.round_id).all()
-            if not bets:
+            pools = self.get_pools(active_round.round_id)
+            if pools is not None:
+                has_bets = any(total > 0 for total in pools.values())
+            else:
+                has_bets = db.session.query(
+                    Bet.query.filter_by(round_id=active_round.round_id).exists()
+                ).scalar()
+            if require_bets and not has_bets:
                 return {'success': False, 'message': 'No bets placed'}
             
             # Get horse runners for this race
-            horse_runners = HorseRunner.query.filter_by(round_id=active_round.round_id).all()
+            horse_runners = HorseRunner.query.options(joinedload(HorseRunner.horse))\
+                                       .filter_by(round_id=active_round.round_id).all()
             if not horse_runners:
                 return {'success': False, 'message': 'No horses in this race'}
             
-            # Simulate the race
-            race_times = self._simulate_race_times(horse_runners)
+            # Simulate the race, keeping the frames for the replay
+            race_times, replay = self._simulate_race_replay(horse_runners)
+            db.session.add(HorseReplay(round_id=active_round.round_id, fps=REPLAY_FPS, payload=replay))
             
             # Sort horses by race time (fastest first)
             sorted_results = sorted(race_times.items(), key=lambda x: x[1])
@@ -375,6 +460,11 @@ class HorseRacing:
                 )
                 db.session.add(horse_result)
             
+            # Keep the form rollup in step with the results
+            record_results(active_round.round_id,
+                           [(horse_id, position, race_time)
+                            for position, (horse_id, race_time) in enumerate(sorted_results, 1)])
+            
             # Create outcome with race order
             winner_horse_id = sorted_results[0][0]
             outcome_data = {
@@ -383,10 +473,23 @@ class HorseRacing:
                 'race_times': race_times
             }
             
+            # Pari-mutuel races pay from the pools; fixed-odds races pay each bet's odds
+            payout_table = None
+            payout_multiplier = Decimal('2.5')  # Base multiplier, will be adjusted per bet
+            if pools is not None and self.is_pari_mutuel(game):
+                payout_table = settlement_payouts(pools, outcome_data['finish_order'], game.house_edge)
+                payout_multiplier = payout_table.get(('win', winner_horse_id), Decimal('0'))
+                outcome_data['pool_payouts'] = {
+                    bet_type: {str(horse_id): float(multiplier)
+                               for (paid_type, horse_id), multiplier in payout_table.items()
+                               if paid_type == bet_type}
+                    for bet_type in PAYING_PLACES
+                }
+            
             outcome = Outcome(
                 round_id=active_round.round_id,
                 outcome_data=outcome_data,
-                payout_multiplier=Decimal('2.5')  # Base multiplier, will be adjusted per bet
+                payout_multiplier=payout_multiplier
             )
             db.session.add(outcome)
             db.session.flush()  # Get outcome ID
@@ -394,55 +497,9 @@ class HorseRacing:
             # End the round
             active_round.ended_at = datetime.now()
             
-            # Process all bets and calculate payouts
-            winners = []
-            for bet in bets:
-                bet.settled_at = datetime.now()
-                bet.outcome_id = outcome.outcome_id
-                
-                # Check if bet won based on bet type
-                bet_horse_id = bet.choice_data['horse_id']
-                bet_type = bet.choice_data.get('bet_type', 'win')
-                
-                won = False
-                if bet_type == 'win':
-                    # Horse must finish first
-                    won = (bet_horse_id == winner_horse_id)
-                elif bet_type == 'place':
-                    # Horse must finish in top 2
-                    won = (bet_horse_id in outcome_data['finish_order'][:2])
-                elif bet_type == 'show':
-                    # Horse must finish in top 3
-                    won = (bet_horse_id in outcome_data['finish_order'][:3])
-                
-                if won:
-                    # Calculate payout based on original odds from the bet
-                    original_odds = Decimal(str(bet.choice_data.get('odds', 2.5)))
-                    payout = bet.amount * original_odds
-                    bet.payout_amount = payout
-                    
-                    # Add to wallet
-                    wallet = Wallet.query.filter_by(user_id=bet.user_id).first()
-                    wallet.balance += payout
-                    
-                    # Create transaction
-                    transaction = Transaction(
-                        wallet_id=wallet.wallet_id,
-                        amount=payout,
-                        txn_type='win'
-                    )
-                    db.session.add(transaction)
-                    
-                    winners.append({
-                        'user_id': bet.user_id,
-                        'horse_id': bet_horse_id,
-                        'lane_no': bet.choice_data.get('lane_no'),
-                        'bet_amount': float(bet.amount),
-                        'payout': float(payout),
-                        'odds': float(original_odds)
-                    })
-                else:
-                    bet.payout_amount = Decimal('0')
+            # Settle every bet for the round in bulk
+            total_bets, winners = self._settle_bets(active_round.round_id, outcome.outcome_id,
+                                                    outcome_data['finish_order'], payout_table)
             
             db.session.commit()
             
@@ -453,13 +510,117 @@ class HorseRacing:
                 'race_times': outcome_data['race_times'],
                 'round_id': active_round.round_id,
                 'winners': winners,
-                'total_bets': len(bets)
+                'total_bets': total_bets
             }
             
         except Exception as e:
             db.session.rollback()
             return {'success': False, 'message': f'Error running race: {str(e)}'}
     
+    def _settle_bets(self, round_id, outcome_id, finish_order, payout_table=None):
+        """
+        Settle all open bets for a race with set-based statements
+        
+        Instead of loading every Bet and crediting winners one at a time, this:
+        1. Marks all bets settled and sets their payouts in one UPDATE
+        2. Credits each wallet once with the sum of its winnings (UPDATE ... FROM)
+        3. Bulk-inserts one 'win' transaction per winning bet (INSERT ... SELECT)
+        
+        Bets are paid to the wallet they were placed from. Older bets that did
+        not record a wallet_id fall back to the user's USD wallet, or their
+        first wallet if they have no USD wallet.
+        
+        Args:
+            round_id (int): Race round ID
+            outcome_id (int): Outcome the bets are settled against
+            finish_order (list): Horse IDs in finishing order
+            payout_table (dict, optional): (bet_type, horse_id) -> payout per 1
+                staked for pari-mutuel races. Fixed-odds races leave this out
+                and pay the odds recorded on each bet.
+            
+        Returns:
+            tuple: (number of bets settled, list of winner dicts)
+        """
+        bet_horse_id = cast(Bet.choice_data['horse_id'].as_string(), Integer)
+        bet_type = func.coalesce(Bet.choice_data['bet_type'].as_string(), 'win')
+        bet_odds = func.coalesce(cast(Bet.choice_data['odds'].as_string(), Numeric), literal(Decimal('2.5')))
+        
+        if payout_table is None:
+            # win: horse must finish first, place: top 2, show: top 3
+            won = case(
+                (bet_type == 'win', bet_horse_id == finish_order[0]),
+                (bet_type == 'place', bet_horse_id.in_(finish_order[:2])),
+                (bet_type == 'show', bet_horse_id.in_(finish_order[:3])),
+                else_=False
+            )
+            payout = case((won, Bet.amount * bet_odds), else_=Decimal('0'))
+        elif payout_table:
+            payout = case(
+                *[((bet_type == paid_type) & (bet_horse_id == horse_id), Bet.amount * multiplier)
+                  for (paid_type, horse_id), multiplier in payout_table.items()],
+                else_=Decimal('0')
+            )
+        else:
+            payout = literal(Decimal('0'))
+        
+        settled = db.session.execute(
+            update(Bet)
+            .where(Bet.round_id == round_id, Bet.settled_at.is_(None))
+            .values(
+                settled_at=datetime.now(),
+                outcome_id=outcome_id,
+                payout_amount=payout
+            )
+            .execution_options(synchronize_session=False)
+        )
+        
+        user_wallet = aliased(Wallet)
+        fallback_wallet = (
+            select(user_wallet.wallet_id)
+            .where(user_wallet.user_id == Bet.user_id)
+            .order_by(case((user_wallet.currency == 'USD', 0), else_=1), user_wallet.wallet_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        bet_wallet = func.coalesce(cast(Bet.choice_data['wallet_id'].as_string(), Integer), fallback_wallet)
+        winning_bets = (Bet.round_id == round_id, Bet.outcome_id == outcome_id, Bet.payout_amount > 0)
+        
+        payouts = (
+            select(bet_wallet.label('wallet_id'), func.sum(Bet.payout_amount).label('total'))
+            .where(*winning_bets)
+            .group_by(bet_wallet)
+            .subquery()
+        )
+        db.session.execute(
+            update(Wallet)
+            .where(Wallet.wallet_id == payouts.c.wallet_id)
+            .values(balance=Wallet.balance + payouts.c.total)
+            .execution_options(synchronize_session=False)
+        )
+        
+        db.session.execute(
+            insert(Transaction).from_select(
+                ['wallet_id', 'amount', 'txn_type'],
+                select(bet_wallet, Bet.payout_amount, literal('win')).where(*winning_bets)
+            )
+        )
+        
+        winners = [
+            {
+                'user_id': user_id,
+                'horse_id': choice_data['horse_id'],
+                'lane_no': choice_data.get('lane_no'),
+                'bet_amount': float(amount),
+                'payout': float(payout),
+                'odds': float(payout / amount)
+            }
+            for user_id, choice_data, amount, payout in db.session.execute(
+                select(Bet.user_id, Bet.choice_data, Bet.amount, Bet.payout_amount).where(*winning_bets)
+            )
+        ]
+        
+        return settled.rowcount, winners
+    
     def get_race_status(self, user_id=None):
         """
         Get current race status with detailed horse information
@@ -474,15 +635,34 @@ class HorseRacing:
             active_round = self.get_active_round()
             
             if active_round:
+                game = self.get_game()
+                pool_rows = self._get_pool_rows(active_round.round_id)
+                pari_mutuel = bool(pool_rows) and self.is_pari_mutuel(game)
+                
                 # Count bets in this round
-                bet_count = Bet.query.filter_by(round_id=active_round.round_id).count()
+                if pool_rows:
+                    bet_count = sum(row.bet_count for row in pool_rows)
+                else:
+                    bet_count = Bet.query.filter_by(round_id=active_round.round_id).count()
                 
-                # Get horse runners for this race
-                horse_runners = HorseRunner.query.filter_by(round_id=active_round.round_id).all()
+                # Get horse runners for this race, with their horses in the same query
+                horse_runners = HorseRunner.query.options(joinedload(HorseRunner.horse))\
+                                                 .filter_by(round_id=active_round.round_id).all()
+                
+                # Pari-mutuel odds move with the pools
+                if pari_mutuel:
+                    pools = self._pools_from_rows(pool_rows)
+                    pool_odds = live_odds(pools, [runner.horse_id for runner in horse_runners], game.house_edge)
                 
                 # Format horse information
                 horses = []
                 for runner in horse_runners:
+                    if pari_mutuel:
+                        odds = {bet_type: float(value) if value is not None else None
+                                for bet_type, value in pool_odds[runner.horse_id].items()}
+                    else:
+                        odds = {bet_type: float(self._odds_for_bet(runner, bet_type)) for bet_type in PAYING_PLACES}
+                    
                     horses.append({
                         'horse_id': runner.horse_id,
                         'name': runner.horse.name,
@@ -490,12 +670,16 @@ class HorseRacing:
                         'base_speed': float(runner.horse.base_speed),
                         'temperament': runner.horse.temperament,
                         'lane_no': runner.lane_no,
-                        'odds': float(runner.odds)
+                        'odds': odds['win'],
+                        'place_odds': odds['place'],
+                        'show_odds': odds['show']
                     })
                 
                 status = {
                     'active': True,
+                    'track': self.track_code,
                     'round_id': active_round.round_id,
+                    'pari_mutuel': pari_mutuel,
                     'bet_count': bet_count,
                     'started_at': active_round.started_at.isoformat(),
                     'horses': horses,
@@ -503,30 +687,75 @@ class HorseRacing:
                     'user_bet': None
                 }
                 
+                # Scheduled races tell the client how long betting stays open
+                closes_at = self.betting_closes_at(active_round)
+                if closes_at:
+                    status['betting_closes_in'] = max(0, round((closes_at - datetime.now()).total_seconds()))
+                
                 # Check user-specific info if user_id provided
                 if user_id:
                     user_bet = Bet.query.filter_by(round_id=active_round.round_id, user_id=user_id).first()
                     if user_bet:
                         status['user_has_bet'] = True
                         horse_id = user_bet.choice_data['horse_id']
-                        odds = Decimal(str(user_bet.choice_data.get('odds', 2.5)))
+                        bet_type = user_bet.choice_data.get('bet_type', 'win')
+                        if pari_mutuel:
+                            odds = pool_odds.get(horse_id, {}).get(bet_type)
+                        else:
+                            odds = Decimal(str(user_bet.choice_data.get('odds') or 2.5))
                         
                         status['user_bet'] = {
                             'horse_id': horse_id,
                             'lane_no': user_bet.choice_data.get('lane_no'),
-                            'bet_type': user_bet.choice_data.get('bet_type', 'win'),
+                            'bet_type': bet_type,
                             'amount': float(user_bet.amount),
-                            'odds': float(odds),
-                            'potential_payout': float(user_bet.amount * odds)
+                            'odds': float(odds) if odds is not None else None,
+                            'potential_payout': float(user_bet.amount * odds) if odds is not None else None
                         }
                 
                 return status
             else:
-                return {'active': False}
+                return {'active': False, 'track': self.track_code, 'last_race': self._last_race_summary(user_id)}
                 
         except Exception as e:
             return {'active': False, 'error': str(e)}
     
+    def _last_race_summary(self, user_id=None):
+        """
+        Summarize the most recently finished race so clients can replay it
+        
+        Args:
+            user_id (int, optional): Include this user's winnings, if any
+            
+        Returns:
+            dict: round_id, winner, finish order, race times and the user's winnings, or None
+        """
+        last_round = next(iter(self.get_recent_rounds(limit=1)), None)
+        if not last_round or not last_round.outcome:
+            return None
+        
+        outcome_data = last_round.outcome.outcome_data
+        winners = []
+        if user_id:
+            user_bet = Bet.query.filter_by(round_id=last_round.round_id, user_id=user_id).first()
+            if user_bet and user_bet.payout_amount and user_bet.payout_amount > 0:
+                winners.append({
+                    'user_id': user_id,
+                    'horse_id': user_bet.choice_data['horse_id'],
+                    'lane_no': user_bet.choice_data.get('lane_no'),
+                    'bet_amount': float(user_bet.amount),
+                    'payout': float(user_bet.payout_amount),
+                    'odds': float(user_bet.payout_amount / user_bet.amount)
+                })
+        
+        return {
+            'round_id': last_round.round_id,
+            'winner_horse_id': outcome_data.get('winner_horse_id'),
+            'finish_order': outcome_data.get('finish_order', []),
+            'race_times': outcome_data.get('race_times', {}),
+            'winners': winners
+        }
+    
     def get_horse_info(self):
         """
         Get information about all horses in the database
@@ -535,31 +764,30 @@ class HorseRacing:
             dict: Horse information with stats and details
         """
         try:
-            horses = Horse.query.all()
+            rows = db.session.query(Horse, HorseForm)\
+                             .outerjoin(HorseForm, HorseForm.horse_id == Horse.horse_id)\
+                             .order_by(Horse.horse_id).all()
             
             horse_data = []
-            for horse in horses:
-                # Calculate recent performance (simplified)
-                recent_results = HorseResult.query.filter_by(horse_id=horse.horse_id)\
-                                                .order_by(HorseResult.round_id.desc())\
-                                                .limit(5).all()
-                
-                avg_finish = sum(r.finish_place for r in recent_results) / len(recent_results) if recent_results else 0
-                
+            for horse, form in rows:
                 horse_data.append({
                     'horse_id': horse.horse_id,
                     'name': horse.name,
                     'age': horse.age,
                     'base_speed': float(horse.base_speed),
                     'temperament': horse.temperament,
-                    'races_run': len(recent_results),
-                    'avg_finish': round(avg_finish, 2) if avg_finish else None,
+                    'races_run': form.races_run if form else 0,
+                    'wins': form.wins if form else 0,
+                    'top3_finishes': form.top3_finishes if form else 0,
+                    'recent_finishes': form.recent_finishes if form else [],
+                    'avg_finish': average_finish(form),
+                    'best_time': float(form.best_time) if form and form.best_time is not None else None,
                     'emoji': '🐴' if horse.horse_id % 2 == 1 else ('🐎' if horse.horse_id % 3 == 0 else '🏇')
                 })
             
             return {
                 'horses': horse_data,
-                'total_horses': len(horses)
+                'total_horses': len(rows)
             }
             
         except Exception as e:
@@ -584,42 +812,47 @@ class HorseRacing:
             if not target_round:
                 return {'error': 'No round found'}
             
-            bets = Bet.query.filter_by(round_id=target_round.round_id).all()
-            
-            # Calculate stats
-            total_bets = len(bets)
-            total_amount = sum(bet.amount for bet in bets)
-            
-            # Get horse runners for this round
+            game = self.get_game()
             horse_runners = HorseRunner.query.filter_by(round_id=target_round.round_id).all()
             
-            # Initialize horse betting stats
-            horse_bets = {}
-            for runner in horse_runners:
-                horse_bets[runner.horse_id] = {
-                    'count': 0,
-                    'amount': Decimal('0'),
-                    'name': runner.horse.name,
-                    'lane_no': runner.lane_no,
-                    'odds': float(runner.odds)
+            # Per-horse totals come straight from the pools when the round has them
+            pool_rows = self._get_pool_rows(target_round.round_id)
+            if pool_rows:
+                grouped = {}
+                for row in pool_rows:
+                    count, amount = grouped.get(row.horse_id, (0, Decimal('0')))
+                    grouped[row.horse_id] = (count + row.bet_count, amount + Decimal(str(row.total_amount)))
+            else:
+                # Older rounds without pools: aggregate the bets in the database
+                bet_horse_id = cast(Bet.choice_data['horse_id'].as_string(), Integer)
+                grouped = {
+                    horse_id: (count, Decimal(str(amount)))
+                    for horse_id, count, amount in db.session.query(
+                        bet_horse_id, func.count(Bet.bet_id), func.sum(Bet.amount)
+                    ).filter(Bet.round_id == target_round.round_id).group_by(bet_horse_id)
                 }
             
-            # Count bets per horse
-            for bet in bets:
-                horse_id = bet.choice_data['horse_id']
-                if horse_id in horse_bets:
-                    horse_bets[horse_id]['count'] += 1
-                    horse_bets[horse_id]['amount'] += bet.amount
+            total_bets = sum(count for count, _ in grouped.values())
+            total_amount = sum((amount for _, amount in grouped.values()), Decimal('0'))
+            
+            if pool_rows and self.is_pari_mutuel(game):
+                pools = self._pools_from_rows(pool_rows)
+                pool_odds = live_odds(pools, [runner.horse_id for runner in horse_runners], game.house_edge)
+                win_odds = {horse_id: odds['win'] for horse_id, odds in pool_odds.items()}
+            else:
+                win_odds = {runner.horse_id: runner.odds for runner in horse_runners}
             
             # Convert to serializable format
             horse_bets_formatted = {}
-            for horse_id, stats in horse_bets.items():
-                horse_bets_formatted[horse_id] = {
-                    'count': stats['count'],
-                    'amount': float(stats['amount']),
-                    'name': stats['name'],
-                    'lane_no': stats['lane_no'],
-                    'odds': stats['odds']
+            for runner in horse_runners:
+                count, amount = grouped.get(runner.horse_id, (0, Decimal('0')))
+                odds = win_odds.get(runner.horse_id)
+                horse_bets_formatted[runner.horse_id] = {
+                    'count': count,
+                    'amount': float(amount),
+                    'name': runner.horse.name,
+                    'lane_no': runner.lane_no,
+                    'odds': float(odds) if odds is not None else None
                 }
             
             return {
@@ -0,0 +1,146 @@
+"""
+Horse Roster Cache
+
+Horses change rarely but are read on every /horse-racing page load and
+every race start. Each process keeps the stable in memory as plain
+RosterEntry tuples (no ORM objects), so page loads and race starts don't
+scan the horses table.
+
+Invalidation:
+- Any insert, update or delete of horses made through the ORM in this
+  process (including bulk statements) bumps the roster version when its
+  transaction commits
+- Changes made elsewhere (other workers, seeding scripts) are picked up
+  when the cached roster is older than ROSTER_TTL seconds
+
+RosterEntry has the same attributes as Horse for everything the race
+engine, the odds pricer and the templates read, so it can stand in for a
+Horse wherever a lineup is needed.
+"""
+
+import random
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, Horse
+
+ROSTER_TTL = 60
+
+RosterEntry = namedtuple('RosterEntry', ['horse_id', 'name', 'age', 'base_speed', 'temperament'])
+
+
+class HorseRoster:
+    """Per-process, versioned snapshot of the horses table"""
+
+    def __init__(self, ttl=ROSTER_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._entries = None
+        self._by_id = None
+        self._loaded_version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the cached roster stale"""
+        with self._lock:
+            self.version += 1
+
+    def _fresh(self):
+        return (self._entries is not None and
+                self._loaded_version == self.version and
+                time.monotonic() - self._loaded_at < self.ttl)
+
+    def _load(self):
+        """Load the roster if it is stale. Must be called inside an app context."""
+        if self._fresh():
+            return
+        with self._lock:
+            if self._fresh():
+                return
+            version = self.version
+            rows = db.session.execute(
+                select(Horse.horse_id, Horse.name, Horse.age, Horse.base_speed, Horse.temperament)
+                .order_by(Horse.horse_id)
+            ).all()
+            entries = tuple(RosterEntry(*row) for row in rows)
+            self._by_id = {entry.horse_id: entry for entry in entries}
+            self._entries = entries
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+
+    def entries(self):
+        """
+        Get every horse in the stable
+
+        Returns:
+            tuple: RosterEntry for each horse, ordered by horse_id
+        """
+        self._load()
+        return self._entries
+
+    def by_id(self):
+        """
+        Get the stable keyed by horse ID
+
+        Returns:
+            dict: horse_id -> RosterEntry
+        """
+        self._load()
+        return self._by_id
+
+    def sample(self, count, exclude=()):
+        """
+        Pick distinct horses at random for a race
+
+        Args:
+            count (int): Number of horses
+            exclude (set, optional): Horse IDs that can't run (e.g. already
+                racing on another track)
+
+        Returns:
+            list: RosterEntry for each chosen horse, or None if too few are available
+        """
+        entries = self.entries()
+        if exclude:
+            entries = [entry for entry in entries if entry.horse_id not in exclude]
+        if len(entries) < count:
+            return None
+        return random.sample(entries, count)
+
+
+roster = HorseRoster()
+
+
+def _mark_dirty(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['horse_roster_dirty'] = True
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Horse, _event, _mark_dirty)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_dirty_bulk(orm_execute_state):
+    # Bulk insert()/update()/delete() statements skip the mapper events above
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is Horse:
+        orm_execute_state.session.info['horse_roster_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('horse_roster_dirty', False):
+        roster.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('horse_roster_dirty', None)
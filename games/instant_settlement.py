@@ -0,0 +1,167 @@
+"""
+Instant Game Settlement
+
+Games like Plinko resolve a bet the moment it is placed. Settled one bet
+per request, a player dropping balls as fast as they can click costs a
+wallet row lock, a bet, an outcome, two transactions and a commit per ball.
+settle_instant_bets settles a whole batch of such bets at once:
+
+1. One conditional UPDATE of the wallet for the batch's net result, which
+   matches no row (and nothing else is written) if the wallet can't cover
+   every stake
+2. One INSERT of every Outcome, returning their IDs
+3. One INSERT of every Bet, already settled and linked to its Outcome
+4. One 'bet' transaction for the total staked and, if anything was won,
+   one 'win' transaction for the total won
+
+Table games like roulette resolve many chips, of different sizes, on one
+spin. settle_table_bets does the same in one wallet update, but records the
+spin once: one Outcome shared by every Bet of the spin.
+
+The caller commits.
+
+Usage:
+    from games.instant_settlement import settle_instant_bets, settle_table_bets
+
+    result = settle_instant_bets(round_id, user_id, wallet_id, amount, [
+        (choice_data, outcome_data, payout_multiplier), ...
+    ])
+    result = settle_table_bets(round_id, user_id, wallet_id, outcome_data, [
+        (amount, choice_data, payout_multiplier), ...
+    ])
+    db.session.commit()
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import insert, update
+
+from models import db, Bet, Outcome, Wallet, Transaction
+
+
+def settle_instant_bets(round_id, user_id, wallet_id, amount, results):
+    """
+    Record and pay out a batch of bets that resolved when they were placed
+
+    Args:
+        round_id (int): The round the bets belong to
+        user_id (int): The player
+        wallet_id (int): Wallet every stake comes from and every win goes to
+        amount (Decimal): Stake of each bet
+        results (list): (choice_data, outcome_data, payout_multiplier) for each bet
+
+    Returns:
+        dict: success, and on success bet_ids, win_amounts (Decimal per bet),
+        total_bet, total_win and the wallet's new balance
+    """
+    multipliers = [Decimal(str(multiplier)) for _, _, multiplier in results]
+    win_amounts = [amount * multiplier for multiplier in multipliers]
+    total_bet = amount * len(results)
+    total_win = sum(win_amounts, Decimal('0'))
+
+    balance = _settle_wallet(wallet_id, total_bet, total_win)
+    if balance is None:
+        return {'success': False, 'message': 'Insufficient funds'}
+
+    outcome_ids = db.session.execute(
+        insert(Outcome).returning(Outcome.outcome_id, sort_by_parameter_order=True),
+        [{'round_id': round_id, 'outcome_data': outcome_data, 'payout_multiplier': multiplier}
+         for (_, outcome_data, _), multiplier in zip(results, multipliers)]
+    ).scalars().all()
+
+    settled_at = datetime.now()
+    bet_ids = db.session.execute(
+        insert(Bet).returning(Bet.bet_id, sort_by_parameter_order=True),
+        [{'round_id': round_id, 'user_id': user_id, 'amount': amount, 'choice_data': choice_data,
+          'settled_at': settled_at, 'outcome_id': outcome_id, 'payout_amount': win_amount}
+         for (choice_data, _, _), outcome_id, win_amount in zip(results, outcome_ids, win_amounts)]
+    ).scalars().all()
+
+    _record_transactions(wallet_id, total_bet, total_win)
+
+    return {
+        'success': True,
+        'bet_ids': bet_ids,
+        'win_amounts': win_amounts,
+        'total_bet': total_bet,
+        'total_win': total_win,
+        'wallet_balance': balance
+    }
+
+
+def settle_table_bets(round_id, user_id, wallet_id, outcome_data, chips):
+    """
+    Record and pay out every chip a player put on one spin of a table game
+
+    Args:
+        round_id (int): The round the bets belong to
+        user_id (int): The player
+        wallet_id (int): Wallet every stake comes from and every win goes to
+        outcome_data (dict): The spin, stored once and shared by every bet
+        chips (list): (amount, choice_data, payout_multiplier) for each bet
+
+    Returns:
+        dict: success, and on success outcome_id, bet_ids, win_amounts
+        (Decimal per chip), total_bet, total_win and the wallet's new balance
+    """
+    amounts = [Decimal(str(amount)) for amount, _, _ in chips]
+    multipliers = [Decimal(str(multiplier)) for _, _, multiplier in chips]
+    win_amounts = [amount * multiplier for amount, multiplier in zip(amounts, multipliers)]
+    total_bet = sum(amounts, Decimal('0'))
+    total_win = sum(win_amounts, Decimal('0'))
+
+    balance = _settle_wallet(wallet_id, total_bet, total_win)
+    if balance is None:
+        return {'success': False, 'message': 'Insufficient funds'}
+
+    # The spin as a whole returned total_win for total_bet
+    outcome_id = db.session.execute(
+        insert(Outcome).values(round_id=round_id, outcome_data=outcome_data,
+                               payout_multiplier=total_win / total_bet if total_bet else Decimal('0'))
+        .returning(Outcome.outcome_id)
+    ).scalar()
+
+    settled_at = datetime.now()
+    bet_ids = db.session.execute(
+        insert(Bet).returning(Bet.bet_id, sort_by_parameter_order=True),
+        [{'round_id': round_id, 'user_id': user_id, 'amount': amount, 'choice_data': choice_data,
+          'settled_at': settled_at, 'outcome_id': outcome_id, 'payout_amount': win_amount}
+         for amount, (_, choice_data, _), win_amount in zip(amounts, chips, win_amounts)]
+    ).scalars().all()
+
+    _record_transactions(wallet_id, total_bet, total_win)
+
+    return {
+        'success': True,
+        'outcome_id': outcome_id,
+        'bet_ids': bet_ids,
+        'win_amounts': win_amounts,
+        'total_bet': total_bet,
+        'total_win': total_win,
+        'wallet_balance': balance
+    }
+
+
+def _settle_wallet(wallet_id, total_bet, total_win):
+    """
+    Apply a batch's net result to the wallet in one conditional UPDATE
+
+    Returns:
+        Decimal: The new balance, or None (nothing changed) if the wallet
+        can't cover total_bet
+    """
+    return db.session.execute(
+        update(Wallet)
+        .where(Wallet.wallet_id == wallet_id, Wallet.balance >= total_bet)
+        .values(balance=Wallet.balance - total_bet + total_win)
+        .returning(Wallet.balance)
+    ).scalar()
+
+
+def _record_transactions(wallet_id, total_bet, total_win):
+    """One 'bet' transaction for the batch and one 'win' if anything was won"""
+    transactions = [{'wallet_id': wallet_id, 'amount': total_bet, 'txn_type': 'bet'}]
+    if total_win > 0:
+        transactions.append({'wallet_id': wallet_id, 'amount': total_win, 'txn_type': 'win'})
+    db.session.execute(insert(Transaction), transactions)
@@ -0,0 +1,170 @@
+"""
+Progressive Jackpot
+
+A slice of every stake on a game feeds a shared pot. Kept as one row, every
+spin would UPDATE the same row and queue behind every other spin's lock
+until it commits. The pot is instead split over N shard rows
+(jackpot_shards): a contribution adds to one shard picked at random, so
+concurrent spins only collide when they happen to pick the same shard.
+
+- contribute: one UPDATE of one random shard, in the caller's transaction
+- jackpot_total: the sum of the shards, cached per process for
+  JACKPOT_TOTAL_TTL seconds so the displayed pot doesn't read every shard
+  on every request
+- award_jackpot: locks every shard (always in shard order, so two awards
+  can't deadlock) and pays out a share of their sum: the whole pot, reset
+  to its seed, or a part of it that is taken from every shard alike
+- jackpot_ready: whether the pot can be played, opening it on first use;
+  False while jackpot_shards hasn't been created, so slots keep working
+  without a jackpot until the migration runs
+
+Callers lock the player's wallet before touching the shards, so a spin and
+an award never wait on each other in opposite orders. Nothing here
+commits.
+
+Usage:
+    from games.jackpot import open_jackpot, contribute, jackpot_total, award_jackpot
+
+    if jackpot_ready(game_id, shards, seed):
+        contribute(game_id, stake * rate, shards)
+        won = award_jackpot(game_id, seed, share)    # Decimal paid out
+"""
+
+import random
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import case, insert, inspect, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, JackpotShard
+
+# Seconds a worker reuses the displayed pot before summing the shards again
+JACKPOT_TOTAL_TTL = 2.0
+
+_totals = {}
+_totals_lock = threading.Lock()
+
+# Games whose pot this process has opened
+_open_games = set()
+
+
+def open_jackpot(game_id, shards, seed):
+    """
+    Create any shard rows a game's jackpot is missing (a new pot starts at seed)
+
+    Commits; safe to call from every worker at startup.
+    """
+    existing = set(db.session.execute(
+        db.select(JackpotShard.shard).where(JackpotShard.game_id == game_id)
+    ).scalars())
+    missing = [shard for shard in range(shards) if shard not in existing]
+    if not missing:
+        _open_games.add(game_id)
+        return
+    try:
+        db.session.execute(insert(JackpotShard), [
+            {'game_id': game_id, 'shard': shard,
+             'amount': Decimal(str(seed)) if shard == 0 and not existing else Decimal('0')}
+            for shard in missing
+        ])
+        db.session.commit()
+    except IntegrityError:
+        # Another worker opened them first
+        db.session.rollback()
+    _open_games.add(game_id)
+
+
+def jackpot_ready(game_id, shards, seed):
+    """
+    Whether a game's pot can take contributions and pay out
+
+    Opens the pot the first time it's asked for (which commits), so call it
+    before writing anything else. False, without touching the session, if
+    the jackpot_shards table doesn't exist yet.
+    """
+    if game_id in _open_games:
+        return True
+    if not inspect(db.engine).has_table(JackpotShard.__tablename__):
+        return False
+    open_jackpot(game_id, shards, seed)
+    return True
+
+
+def contribute(game_id, amount, shards):
+    """
+    Add to a game's pot through one randomly chosen shard
+
+    Args:
+        game_id (int): The game
+        amount (Decimal): Amount to add
+        shards (int): Number of shards the pot is split over
+    """
+    db.session.execute(
+        update(JackpotShard)
+        .where(JackpotShard.game_id == game_id, JackpotShard.shard == random.randrange(shards))
+        .values(amount=JackpotShard.amount + amount)
+    )
+
+
+def jackpot_total(game_id):
+    """
+    The pot, as of at most JACKPOT_TOTAL_TTL seconds ago
+
+    Returns:
+        Decimal: Sum of every shard
+    """
+    now = time.monotonic()
+    with _totals_lock:
+        cached = _totals.get(game_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    total = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(JackpotShard.amount), 0))
+        .where(JackpotShard.game_id == game_id)
+    ).scalar()
+    total = Decimal(str(total))
+    with _totals_lock:
+        _totals[game_id] = (now + JACKPOT_TOTAL_TTL, total)
+    return total
+
+
+def award_jackpot(game_id, seed, share=Decimal('1')):
+    """
+    Pay out a game's pot, or a share of it
+
+    Locks every shard in shard order, so contributions wait for the award
+    and no contribution is lost or paid twice. A full win empties the pot
+    and reseeds it; a partial one leaves the rest of every shard in it.
+
+    Args:
+        game_id (int): The game
+        seed (Decimal): What the pot restarts at after a full win
+        share (Decimal): Part of the pot won, up to 1
+
+    Returns:
+        Decimal: The amount won
+    """
+    share = min(Decimal(str(share)), Decimal('1'))
+    amounts = db.session.execute(
+        db.select(JackpotShard.amount)
+        .where(JackpotShard.game_id == game_id)
+        .order_by(JackpotShard.shard)
+        .with_for_update()
+    ).scalars().all()
+    won = sum((Decimal(str(amount)) for amount in amounts), Decimal('0')) * share
+
+    if share == 1:
+        remaining = case((JackpotShard.shard == 0, Decimal(str(seed))), else_=Decimal('0'))
+    else:
+        remaining = JackpotShard.amount * (1 - share)
+    db.session.execute(
+        update(JackpotShard)
+        .where(JackpotShard.game_id == game_id)
+        .values(amount=remaining)
+    )
+    with _totals_lock:
+        _totals.pop(game_id, None)
+    return won
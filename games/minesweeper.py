@@ -0,0 +1,471 @@
+"""
+Minesweeper
+
+5x5 board (payout_rule_json {"grid": "5x5", "mines": 1}) with 1 to 24 mines
+placed when the bet is made. The player reveals cells one at a time and can
+cash out after any safe reveal; a mine loses the stake.
+
+Cell n (row-major, 0-24) is bit n of two 25-bit masks: where the mines
+are, and what has been revealed. Revealing is one OR into the revealed
+mask and one AND against the mine mask, done by the board store in a single
+UPDATE (games/board_store.py); the Bet row is only written when the board
+opens and when it settles.
+
+Cash-out multipliers are precomputed for every (mines, safe cells revealed)
+pair: the fair odds of surviving that many reveals,
+C(25, k) / C(25 - mines, k), times 1 - house_edge, rounded down to 4
+decimal places so no cash-out pays back more than the house edge allows.
+
+Usage:
+    from games.minesweeper import Minesweeper
+
+    game = Minesweeper()
+    board = game.place_bet(user_id, 10, mines=3)
+    game.reveal(board['bet_id'], 12, user_id=user_id)
+    game.cash_out(board['bet_id'], user_id=user_id)
+"""
+
+import random
+from datetime import datetime
+from decimal import Decimal, ROUND_DOWN
+from fractions import Fraction
+from functools import lru_cache
+from sqlalchemy import update
+from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User
+from .board_store import board_store
+
+GRID_SIZE = 5
+CELLS = GRID_SIZE * GRID_SIZE
+FULL_MASK = (1 << CELLS) - 1
+MIN_MINES = 1
+MAX_MINES = CELLS - 1
+
+MULTIPLIER_PLACES = Decimal('0.0001')
+
+# How each finished board status is recorded in its outcome
+SETTLED_RESULTS = {'lost': 'mine', 'cleared': 'cleared', 'cashing': 'cashout', 'void': 'void'}
+
+# Finished board statuses that don't pay the cash-out table
+FIXED_MULTIPLIERS = {'lost': Decimal('0'), 'void': Decimal('1')}
+
+
+@lru_cache(maxsize=8)
+def cashout_multipliers(house_edge):
+    """
+    Cash-out multiplier for every (mines, safe cells revealed) pair
+
+    Args:
+        house_edge (float): The game's house edge, e.g. 0.01
+
+    Returns:
+        tuple: table[mines][revealed] as Decimal; row 0 is unused and
+        revealed runs from 0 to CELLS - mines
+    """
+    keep = Fraction(str(1 - house_edge))
+    table = [()]
+    for mines in range(MIN_MINES, MAX_MINES + 1):
+        row = [Decimal('1')]
+        survive = Fraction(1)
+        for revealed in range(1, CELLS - mines + 1):
+            # Chance the revealed-th pick is safe, given the earlier ones were
+            survive *= Fraction(CELLS - mines - revealed + 1, CELLS - revealed + 1)
+            fair = keep / survive
+            row.append((Decimal(fair.numerator) / Decimal(fair.denominator)).quantize(MULTIPLIER_PLACES, ROUND_DOWN))
+        table.append(tuple(row))
+    return tuple(table)
+
+
+def place_mines(mine_count):
+    """Mine mask with mine_count distinct cells set"""
+    mask = 0
+    for cell in random.sample(range(CELLS), mine_count):
+        mask |= 1 << cell
+    return mask
+
+
+def mask_cells(mask):
+    """The cells set in a mask, in order"""
+    return [cell for cell in range(CELLS) if mask >> cell & 1]
+
+
+class Minesweeper:
+    """
+    Minesweeper Game Implementation
+    
+    Features:
+    - 5x5 board, 1 to 24 mines
+    - Boards in play kept as two 25-bit masks in the board store
+    - Precomputed cash-out multiplier per mine count and reveal
+    """
+    
+    def __init__(self):
+        self.grid_size = GRID_SIZE
+        self.cells = CELLS
+    
+    def get_game(self):
+        """Get the Minesweeper game from database"""
+        try:
+            return Game.query.filter_by(code='MINESWEEP').first()
+        except Exception as e:
+            return None
+    
+    def get_active_round(self):
+        """Get the current active round"""
+        try:
+            game = self.get_game()
+            if not game:
+                return None
+            # Get the most recent round that hasn't ended
+            return Round.query.filter_by(game_id=game.game_id).filter(Round.ended_at.is_(None)).first()
+        except Exception as e:
+            return None
+    
+    def validate_game_setup(self):
+        """Validate that the game is properly set up"""
+        try:
+            game = self.get_game()
+            if not game:
+                return {'valid': False, 'message': 'Minesweeper game not found'}
+            if not game.is_active:
+                return {'valid': False, 'message': 'Minesweeper game is not active'}
+            grid = (game.payout_rule_json or {}).get('grid', '5x5')
+            if grid != f'{GRID_SIZE}x{GRID_SIZE}':
+                return {'valid': False, 'message': f'Unsupported Minesweeper grid: {grid}'}
+            return {'valid': True}
+        except Exception as e:
+            return {'valid': False, 'message': f'Error validating game setup: {str(e)}'}
+    
+    def start_new_round(self):
+        """Start a new round of Minesweeper"""
+        try:
+            # Check for existing active round
+            active_round = self.get_active_round()
+            if active_round:
+                return {'success': False, 'message': 'Round already in progress'}
+            
+            # Create new round
+            game = self.get_game()
+            if not game:
+                return {'success': False, 'message': 'Game not found'}
+            
+            round = Round(
+                game_id=game.game_id,
+                started_at=datetime.now()
+            )
+            db.session.add(round)
+            db.session.commit()
+            
+            return {'success': True, 'round_id': round.round_id}
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error starting round: {str(e)}'}
+    
+    def default_mines(self, game=None):
+        """Mine count from the game's payout_rule_json"""
+        game = game or self.get_game()
+        return int(((game.payout_rule_json or {}) if game else {}).get('mines', MIN_MINES))
+    
+    def get_multipliers(self, mines, game=None):
+        """Cash-out multiplier after 0, 1, ... safe reveals on a board with this many mines"""
+        game = game or self.get_game()
+        return [float(multiplier) for multiplier in cashout_multipliers(float(game.house_edge))[mines]]
+    
+    def place_bet(self, user_id, bet_amount, mines=None, wallet_id=None):
+        """Take the stake and open a board with `mines` mines (default from the game's rules)"""
+        try:
+            if bet_amount <= 0:
+                return {'success': False, 'message': 'Bet amount must be positive'}
+            
+            # Convert bet_amount to Decimal for database operations
+            bet_amount = Decimal(str(bet_amount))
+            
+            # Get game
+            game = self.get_game()
+            if not game:
+                return {'success': False, 'message': 'Game not found'}
+            
+            mines = self.default_mines(game) if mines is None else int(mines)
+            if not MIN_MINES <= mines <= MAX_MINES:
+                return {'success': False, 'message': f'Choose between {MIN_MINES} and {MAX_MINES} mines'}
+            
+            # Validate bet amount
+            if bet_amount < game.min_bet or bet_amount > game.max_bet:
+                return {'success': False, 'message': f'Bet must be between ${game.min_bet} and ${game.max_bet}'}
+            
+            # Get or create active round
+            active_round = self.get_active_round()
+            if not active_round:
+                result = self.start_new_round()
+                if not result['success']:
+                    return result
+                active_round = self.get_active_round()
+            
+            # Get user's wallet
+            user = User.query.get(user_id)
+            if not user or not user.wallets:
+                return {'success': False, 'message': 'User wallet not found'}
+            
+            # Use the specified wallet or primary wallet
+            if wallet_id:
+                wallet = Wallet.query.filter_by(wallet_id=wallet_id, user_id=user_id).first()
+                if not wallet:
+                    return {'success': False, 'message': 'Specified wallet not found'}
+            else:
+                wallet = user.get_primary_wallet()
+            
+            balance = db.session.execute(
+                update(Wallet)
+                .where(Wallet.wallet_id == wallet.wallet_id, Wallet.balance >= bet_amount)
+                .values(balance=Wallet.balance - bet_amount)
+                .returning(Wallet.balance)
+            ).scalar()
+            if balance is None:
+                db.session.rollback()
+                return {'success': False, 'message': 'Insufficient funds'}
+            
+            # The mine mask goes in the bet too, so a board the store loses can be reopened
+            mine_mask = place_mines(mines)
+            bet = Bet(
+                round_id=active_round.round_id,
+                user_id=user_id,
+                amount=bet_amount,
+                choice_data={'mines': mines, 'mine_mask': mine_mask, 'wallet_id': wallet.wallet_id}
+            )
+            db.session.add(bet)
+            db.session.add(Transaction(wallet_id=wallet.wallet_id, amount=bet_amount, txn_type='bet'))
+            db.session.commit()
+            
+            board_store.open(bet.bet_id, user_id, wallet.wallet_id, active_round.round_id,
+                             bet_amount, mine_mask, mines)
+            
+            return {
+                'success': True,
+                'bet_id': bet.bet_id,
+                'mines': mines,
+                'grid_size': GRID_SIZE,
+                'multipliers': self.get_multipliers(mines, game),
+                'wallet_balance': float(balance),
+                'wallet_currency': wallet.currency
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error placing bet: {str(e)}'}
+    
+    def _lost_board(self, bet_id, user_id=None):
+        """
+        Answer a move on a board the board store doesn't have
+        
+        A board the store has lost (e.g. the temp directory was cleared)
+        can't be played on: which cells were revealed is gone with it. Its
+        Bet is settled as void and the stake returned, rather than reopening
+        it with every cell hidden again.
+        
+        Returns:
+            dict: An error, with the refund if the board was still open
+        """
+        bet = Bet.query.get(bet_id)
+        if (not bet or (user_id is not None and bet.user_id != user_id)
+                or 'mine_mask' not in (bet.choice_data or {})):
+            return {'success': False, 'message': 'Board not found'}
+        if bet.settled_at:
+            return {'success': False, 'message': 'Game already completed'}
+        
+        settlement = self._settle_board(self.void_board(bet))
+        if not settlement['success']:
+            return settlement
+        return dict(settlement, success=False,
+                    message='This board was lost, so your stake has been returned')
+    
+    def void_board(self, bet):
+        """A lost board rebuilt from its open Bet, ready to settle as void"""
+        return {
+            'bet_id': bet.bet_id,
+            'user_id': bet.user_id,
+            'wallet_id': bet.choice_data['wallet_id'],
+            'round_id': bet.round_id,
+            'amount': str(bet.amount),
+            'mines': bet.choice_data['mine_mask'],
+            'mine_count': bet.choice_data['mines'],
+            'revealed': 0,
+            'status': 'void'
+        }
+    
+    def reveal(self, bet_id, cell, user_id=None):
+        """
+        Reveal one cell
+        
+        Args:
+            bet_id (int): The board's bet
+            cell (int): 0-24, row by row
+            user_id (int, optional): Only act on this user's boards
+        
+        Returns:
+            dict: Whether it was a mine, the safe cells revealed so far and
+            the cash-out multiplier, plus the settlement once the board is
+            over (a mine, or every safe cell revealed)
+        """
+        try:
+            cell = int(cell)
+            if not 0 <= cell < CELLS:
+                return {'success': False, 'message': f'Pick a cell from 0 to {CELLS - 1}'}
+            
+            board = board_store.get(bet_id)
+            if board is None:
+                return self._lost_board(bet_id, user_id)
+            if user_id is not None and board['user_id'] != user_id:
+                return {'success': False, 'message': 'Board not found'}
+            
+            # An earlier request finished the board but didn't get to settle it
+            if board['status'] != 'playing':
+                return self._settle_board(board)
+            
+            revealed = board_store.reveal(bet_id, 1 << cell, FULL_MASK)
+            if revealed is None:
+                return {'success': False, 'message': 'That cell is already revealed'}
+            
+            if revealed['status'] != 'playing':
+                return dict(self._settle_board(revealed), cell=cell)
+            
+            safe = revealed['revealed'].bit_count()
+            return {
+                'success': True,
+                'cell': cell,
+                'mine': False,
+                'revealed': mask_cells(revealed['revealed']),
+                'safe_revealed': safe,
+                'multiplier': float(self._multiplier(revealed['mine_count'], safe)),
+                'game_complete': False
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error revealing cell: {str(e)}'}
+    
+    def cash_out(self, bet_id, user_id=None):
+        """Take the current multiplier on a board with at least one safe cell revealed"""
+        try:
+            board = board_store.get(bet_id)
+            if board is None:
+                return self._lost_board(bet_id, user_id)
+            if user_id is not None and board['user_id'] != user_id:
+                return {'success': False, 'message': 'Board not found'}
+            
+            if board['status'] == 'playing':
+                board = board_store.cash_out(bet_id) or board_store.get(bet_id)
+                if board is None or board['status'] == 'playing':
+                    return {'success': False, 'message': 'Reveal a cell before cashing out'}
+            
+            return self._settle_board(board)
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error cashing out: {str(e)}'}
+    
+    def _multiplier(self, mine_count, safe_revealed):
+        return cashout_multipliers(float(self.get_game().house_edge))[mine_count][safe_revealed]
+    
+    def _settle_board(self, board):
+        """Settle a finished board, commit and drop it from the board store"""
+        settlement = self.record_settlement(board)
+        db.session.commit()
+        board_store.delete(board['bet_id'])
+        return settlement
+    
+    def time_out_board(self, bet_id, idle_before):
+        """
+        Finish an abandoned board: cash it out if any cell was revealed,
+        void it (returning the stake) if not
+        
+        Args:
+            bet_id (int): The board's bet
+            idle_before (float): Unix time the board must not have changed since
+        
+        Returns:
+            dict: The board, ready to settle, or None if the store doesn't
+            have it or the player came back meanwhile
+        """
+        board = board_store.time_out(bet_id, idle_before) or board_store.get(bet_id)
+        if board is None or board['status'] == 'playing':
+            return None
+        return board
+    
+    def record_settlement(self, board):
+        """
+        Settle a finished board: the only write to its Bet after it opened
+        
+        The caller commits. The Bet row is locked so a board settles once
+        even if two requests race to settle it.
+        """
+        bet = Bet.query.filter_by(bet_id=board['bet_id']).filter(Bet.settled_at.is_(None))\
+                       .with_for_update().first()
+        if not bet:
+            return {'success': False, 'message': 'Game already completed'}
+        
+        hit_mine = board['status'] == 'lost'
+        safe = (board['revealed'] & ~board['mines']).bit_count()
+        if board['status'] in FIXED_MULTIPLIERS:
+            multiplier = FIXED_MULTIPLIERS[board['status']]
+        else:
+            multiplier = self._multiplier(board['mine_count'], safe)
+        outcome_data = {
+            'mines': board['mine_count'],
+            'mine_mask': board['mines'],
+            'revealed_mask': board['revealed'],
+            'result': SETTLED_RESULTS[board['status']]
+        }
+        
+        outcome = Outcome(round_id=bet.round_id, outcome_data=outcome_data, payout_multiplier=multiplier)
+        db.session.add(outcome)
+        db.session.flush()
+        
+        bet.choice_data = {
+            'mines': board['mine_count'],
+            'mine_mask': board['mines'],
+            'revealed_mask': board['revealed'],
+            'wallet_id': board['wallet_id']
+        }
+        bet.outcome_id = outcome.outcome_id
+        bet.settled_at = datetime.now()
+        bet.payout_amount = bet.amount * multiplier
+        
+        balance = None
+        if bet.payout_amount > 0:
+            balance = db.session.execute(
+                update(Wallet)
+                .where(Wallet.wallet_id == board['wallet_id'])
+                .values(balance=Wallet.balance + bet.payout_amount)
+                .returning(Wallet.balance)
+            ).scalar()
+            db.session.add(Transaction(wallet_id=board['wallet_id'], amount=bet.payout_amount, txn_type='win'))
+        
+        if balance is None:
+            balance = Wallet.query.get(board['wallet_id']).balance
+        return {
+            'success': True,
+            'mine': hit_mine,
+            'mines': mask_cells(board['mines']),
+            'revealed': mask_cells(board['revealed']),
+            'safe_revealed': safe,
+            'result': outcome_data['result'],
+            'multiplier': float(multiplier),
+            'win_amount': float(bet.payout_amount),
+            'wallet_balance': float(balance),
+            'game_complete': True
+        }
+    
+    def get_game_status(self):
+        """Get current game status"""
+        try:
+            game = self.get_game()
+            if not game:
+                return {'status': 'error', 'message': 'Game not found'}
+            
+            active_round = self.get_active_round()
+            if active_round:
+                return {'status': 'active', 'round_id': active_round.round_id}
+            
+            return {'status': 'ready'}
+        except Exception as e:
+            return {'status': 'error', 'message': f'Error getting game status: {str(e)}'}
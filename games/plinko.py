@@ -1,8 +1,313 @@
+import hashlib
+import json
 import random
 import math
+import threading
+from bisect import bisect_right
 from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
+from itertools import accumulate
 from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User
+from .instant_settlement import settle_instant_bets
+
+# 16-row board: the ball starts above slot 8 and each row moves it half a slot
+ROWS = 16
+CENTER = 8
+SLOTS = ROWS + 1
+
+# Most balls one request can drop
+MAX_BALLS_PER_DROP = 100
+
+
+def right_chance(row, rights):
+    """
+    Chance the ball bounces right at a row, given how many right bounces it
+    has taken so far (its position is CENTER + rights - row / 2)
+    
+    The walk leans right by 0.1 whenever the ball is more than 4 slots from
+    the center. It can't reach either wall in 16 rows, so it is never clamped.
+    """
+    return 0.6 if abs(rights - row / 2) > 4 else 0.5
+
+
+def _finish_chances():
+    """
+    finish[slot][row][rights]: chance a ball that has taken `rights` right
+    bounces in its first `row` rows lands in `slot`. A ball lands in the
+    slot numbered by its total right bounces.
+    """
+    finish = []
+    for slot in range(SLOTS):
+        table = [[0.0] * (ROWS + 1) for _ in range(ROWS + 1)]
+        table[ROWS][slot] = 1.0
+        for row in range(ROWS - 1, -1, -1):
+            for rights in range(row + 1):
+                chance = right_chance(row, rights)
+                table[row][rights] = chance * table[row + 1][rights + 1] + (1 - chance) * table[row + 1][rights]
+        finish.append(table)
+    return finish
+
+
+# The walk is the same at every risk level (only the multipliers differ),
+# so one landing distribution serves them all
+FINISH_CHANCES = _finish_chances()
+SLOT_DISTRIBUTION = tuple(FINISH_CHANCES[slot][0][0] for slot in range(SLOTS))
+SLOT_CDF = tuple(accumulate(SLOT_DISTRIBUTION))
+
+
+def sample_drop(draw=None):
+    """
+    Drop one ball from a single uniform draw
+    
+    The draw picks the landing slot from SLOT_CDF; what is left of it then
+    picks each bounce from the walk's odds given that landing slot, so the
+    path is one the real walk could have taken to that slot, with the
+    walk's own probability.
+    
+    Args:
+        draw (float, optional): Uniform in [0, 1); random.random() by default
+    
+    Returns:
+        tuple: (final slot, path mask with bit `row` set for a right bounce)
+    """
+    draw = (random.random() if draw is None else draw) * SLOT_CDF[-1]
+    slot = min(bisect_right(SLOT_CDF, draw), SLOTS - 1)
+    draw = min(max((draw - (SLOT_CDF[slot - 1] if slot else 0.0)) / SLOT_DISTRIBUTION[slot], 0.0), 1.0)
+    
+    chances = FINISH_CHANCES[slot]
+    mask = 0
+    rights = 0
+    for row in range(ROWS):
+        if chances[row + 1][rights] == 0:
+            go_right = 1.0
+        elif chances[row + 1][rights + 1] == 0:
+            go_right = 0.0
+        else:
+            go_right = right_chance(row, rights) * chances[row + 1][rights + 1] / chances[row][rights]
+        
+        if go_right < 1.0 and draw < 1 - go_right:
+            draw /= 1 - go_right
+        else:
+            draw = (draw - (1 - go_right)) / go_right
+            mask |= 1 << row
+            rights += 1
+        draw = min(max(draw, 0.0), 1.0)
+    return slot, mask
+
+
+class PlinkoTableError(ValueError):
+    """A multiplier table pays back more than the game's house edge allows"""
+
+
+@lru_cache(maxsize=64)
+def multiplier_table_stats(multipliers):
+    """
+    Exact return of a multiplier table under the board's walk
+    
+    Args:
+        multipliers (tuple): Multiplier for each slot
+    
+    Returns:
+        dict: rtp and variance per unit staked, std_dev, hit_rate (chance of
+        at least getting the stake back) and slot_probabilities
+    """
+    rtp = sum(chance * multiplier for chance, multiplier in zip(SLOT_DISTRIBUTION, multipliers))
+    variance = sum(chance * (multiplier - rtp) ** 2 for chance, multiplier in zip(SLOT_DISTRIBUTION, multipliers))
+    return {
+        'rtp': rtp,
+        'variance': variance,
+        'std_dev': math.sqrt(variance),
+        'hit_rate': sum(chance for chance, multiplier in zip(SLOT_DISTRIBUTION, multipliers) if multiplier >= 1),
+        'slot_probabilities': list(SLOT_DISTRIBUTION)
+    }
+
+
+def check_multiplier_tables(tables, house_edge):
+    """
+    Refuse multiplier tables whose exact RTP is above 100% - house_edge
+    
+    Args:
+        tables (dict): risk level -> multipliers
+        house_edge (float): The game's house edge, e.g. 0.03
+    
+    Raises:
+        PlinkoTableError: Naming every table over the limit
+    """
+    max_rtp = 1 - house_edge
+    over = [f"{risk} ({multiplier_table_stats(tuple(multipliers))['rtp']:.2%})"
+            for risk, multipliers in tables.items()
+            if multiplier_table_stats(tuple(multipliers))['rtp'] > max_rtp]
+    if over:
+        raise PlinkoTableError(f"Plinko tables pay back more than {max_rtp:.2%}: {', '.join(over)}")
+
+
+def ball_path(mask):
+    """The per-row path for a path mask: row, position after the bounce and direction"""
+    position = float(CENTER)
+    path = []
+    for row in range(ROWS):
+        right = mask >> row & 1
+        position += 0.5 if right else -0.5
+        path.append({
+            'row': row,
+            'position': position,
+            'direction': 'right' if right else 'left'
+        })
+    return path
+
+
+def path_mask(path):
+    """The path mask for a per-row path (the form bets stored before path masks)"""
+    return sum(1 << step['row'] for step in path if step['direction'] == 'right')
+
+
+def stored_ball_path(data):
+    """
+    The per-row path of a Plinko bet's choice_data or outcome_data
+    
+    Bets and outcomes store the path as a path mask; rows written before
+    that hold the full ball_path list, which is returned as is.
+    """
+    if 'path_mask' in data:
+        return ball_path(data['path_mask'])
+    return data.get('ball_path', [])
+
+
+def generate_risk_multipliers():
+    """Generate gaussian distributed multipliers for different risk levels"""
+    # 17 slots total for 16-row Plinko board
+    positions = list(range(17))
+    center = 8  # Center position
+    
+    risk_configs = {
+        'low': {
+            'center_multipliers': [0.5, 0.6, 0.7, 0.8, 0.9],
+            'edge_multipliers': [5, 10, 20, 50],
+            'progression': 1.3
+        },
+        'medium': {
+            'center_multipliers': [0.3, 0.4, 0.5, 0.6, 0.8],
+            'edge_multipliers': [10, 25, 50, 100],
+            'progression': 1.5
+        },
+        'high': {
+            'center_multipliers': [0.2, 0.3, 0.4, 0.5, 0.7],
+            'edge_multipliers': [10, 25, 100, 1000],
+            'progression': 2.0
+        }
+    }
+    
+    multiplier_sets = {}
+    
+    for risk, config in risk_configs.items():
+        multipliers = [0.0] * 17
+        
+        # Set center multipliers (losing positions)
+        center_mults = config['center_multipliers']
+        multipliers[center] = center_mults[2]  # Main center
+        multipliers[center-1] = center_mults[1]
+        multipliers[center+1] = center_mults[1] 
+        multipliers[center-2] = center_mults[0]
+        multipliers[center+2] = center_mults[0]
+        
+        # Set edge multipliers (extreme winning positions)
+        edge_mults = config['edge_multipliers']
+        multipliers[0] = edge_mults[3]    # Far left
+        multipliers[16] = edge_mults[3]   # Far right
+        multipliers[1] = edge_mults[2]
+        multipliers[15] = edge_mults[2]
+        multipliers[2] = edge_mults[1]
+        multipliers[14] = edge_mults[1]
+        multipliers[3] = edge_mults[0]
+        multipliers[13] = edge_mults[0]
+        
+        # Fill remaining positions with progressive multipliers
+        prog = config['progression']
+        multipliers[4] = round(center_mults[0] * prog, 1)
+        multipliers[12] = round(center_mults[0] * prog, 1)
+        multipliers[5] = round(center_mults[1] * prog, 1)
+        multipliers[11] = round(center_mults[1] * prog, 1)
+        multipliers[6] = round(center_mults[2] * prog, 1)
+        multipliers[10] = round(center_mults[2] * prog, 1)
+        multipliers[7] = round(center_mults[3], 1)
+        multipliers[9] = round(center_mults[3], 1)
+        
+        multiplier_sets[risk] = multipliers
+        
+    return multiplier_sets
+
+
+# Multipliers for each risk level, generated once per process
+RISK_MULTIPLIERS = generate_risk_multipliers()
+
+# Color scheme for slots based on multiplier value
+SLOT_COLORS = {
+    'very_low': "#ff4757",    # Red - losing bets (< 1.0)
+    'low': "#ffa502",         # Orange - small wins (1.0-2.0)  
+    'medium': "#3742fa",      # Blue - medium wins (2.0-10.0)
+    'high': "#7bed9f",        # Green - high wins (10.0-100.0)
+    'extreme': "#ffd700"      # Gold - astronomical wins (>100.0)
+}
+
+_boards = None
+_boards_lock = threading.Lock()
+
+
+def slot_color(multiplier):
+    """Display color for a slot's multiplier"""
+    if multiplier < 1.0:
+        return SLOT_COLORS['very_low']
+    if multiplier < 2.0:
+        return SLOT_COLORS['low']
+    if multiplier < 10.0:
+        return SLOT_COLORS['medium']
+    if multiplier < 100.0:
+        return SLOT_COLORS['high']
+    return SLOT_COLORS['extreme']
+
+
+def compile_boards(payout_rules=None):
+    """
+    Build the frontend board for every risk level
+    
+    Args:
+        payout_rules (dict, optional): The game's payout_rule_json
+    
+    Returns:
+        dict: risk level -> {'board': board data, 'payload': the
+        /api/plinko/board-data response body, 'etag': its strong ETag}
+    """
+    rows = (payout_rules or {}).get('rows', ROWS)
+    boards = {}
+    for risk, multipliers in RISK_MULTIPLIERS.items():
+        board = {
+            'rows': rows,
+            'multipliers': multipliers,
+            'slot_names': [f"{multiplier}x" for multiplier in multipliers],
+            'slot_colors': {multiplier: slot_color(multiplier) for multiplier in multipliers},
+            'risk_levels': list(RISK_MULTIPLIERS)
+        }
+        payload = json.dumps({'success': True, 'board_data': board}, separators=(',', ':')).encode()
+        boards[risk] = {'board': board, 'payload': payload, 'etag': hashlib.sha1(payload).hexdigest()}
+    return boards
+
+
+def plinko_boards():
+    """
+    Every risk level's board, compiled from the PLINKO game row on first use
+    
+    The boards only change with a deploy, so each worker compiles them once.
+    Must be called inside an app context the first time.
+    """
+    global _boards
+    if _boards is None:
+        with _boards_lock:
+            if _boards is None:
+                game = Game.query.filter_by(code='PLINKO').first()
+                _boards = compile_boards(game.payout_rule_json if game else None)
+    return _boards
+
 
 class Plinko:
     """
@@ -17,81 +322,10 @@ class Plinko:
     
     def __init__(self):
         # Board configuration - 16 rows as specified in database
-        self.rows = 16
-        # Multipliers will be generated based on risk level
-        self.risk_multipliers = self._generate_risk_multipliers()
-        
-        # Color scheme for slots based on multiplier value
-        self.slot_colors = {
-            'very_low': "#ff4757",    # Red - losing bets (< 1.0)
-            'low': "#ffa502",         # Orange - small wins (1.0-2.0)  
-            'medium': "#3742fa",      # Blue - medium wins (2.0-10.0)
-            'high': "#7bed9f",        # Green - high wins (10.0-100.0)
-            'extreme': "#ffd700"      # Gold - astronomical wins (>100.0)
-        }
-    
-    def _generate_risk_multipliers(self):
-        """Generate gaussian distributed multipliers for different risk levels"""
-        # 17 slots total for 16-row Plinko board
-        positions = list(range(17))
-        center = 8  # Center position
-        
-        risk_configs = {
-            'low': {
-                'center_multipliers': [0.5, 0.6, 0.7, 0.8, 0.9],
-                'edge_multipliers': [5, 10, 20, 50],
-                'progression': 1.3
-            },
-            'medium': {
-                'center_multipliers': [0.3, 0.4, 0.5, 0.6, 0.8],
-                'edge_multipliers': [10, 25, 50, 100],
-                'progression': 1.5
-            },
-            'high': {
-                'center_multipliers': [0.2, 0.3, 0.4, 0.5, 0.7],
-                'edge_multipliers': [20, 50, 100, 1000],
-                'progression': 2.0
-            }
-        }
-        
-        multiplier_sets = {}
-        
-        for risk, config in risk_configs.items():
-            multipliers = [0.0] * 17
-            
-            # Set center multipliers (losing positions)
-            center_mults = config['center_multipliers']
-            multipliers[center] = center_mults[2]  # Main center
-            multipliers[center-1] = center_mults[1]
-            multipliers[center+1] = center_mults[1] 
-            multipliers[center-2] = center_mults[0]
-            multipliers[center+2] = center_mults[0]
-            
-            # Set edge multipliers (extreme winning positions)
-            edge_mults = config['edge_multipliers']
-            multipliers[0] = edge_mults[3]    # Far left
-            multipliers[16] = edge_mults[3]   # Far right
-            multipliers[1] = edge_mults[2]
-            multipliers[15] = edge_mults[2]
-            multipliers[2] = edge_mults[1]
-            multipliers[14] = edge_mults[1]
-            multipliers[3] = edge_mults[0]
-            multipliers[13] = edge_mults[0]
-            
-            # Fill remaining positions with progressive multipliers
-            prog = config['progression']
-            multipliers[4] = round(center_mults[0] * prog, 1)
-            multipliers[12] = round(center_mults[0] * prog, 1)
-            multipliers[5] = round(center_mults[1] * prog, 1)
-            multipliers[11] = round(center_mults[1] * prog, 1)
-            multipliers[6] = round(center_mults[2] * prog, 1)
-            multipliers[10] = round(center_mults[2] * prog, 1)
-            multipliers[7] = round(center_mults[3], 1)
-            multipliers[9] = round(center_mults[3], 1)
-            
-            multiplier_sets[risk] = multipliers
-            
-        return multiplier_sets
+        self.rows = ROWS
+        # Multipliers for each risk level
+        self.risk_multipliers = RISK_MULTIPLIERS
+        self.slot_colors = SLOT_COLORS
     
     def get_game(self):
         """Get the Plinko game from database"""
@@ -119,6 +353,7 @@ class Plinko:
                 return {'valid': False, 'message': 'Plinko game not found'}
             if not game.is_active:
                 return {'valid': False, 'message': 'Plinko game is not active'}
+            check_multiplier_tables(self.risk_multipliers, float(game.house_edge))
             return {'valid': True}
         except Exception as e:
             return {'valid': False, 'message': f'Error validating game setup: {str(e)}'}
@@ -151,36 +386,21 @@ class Plinko:
     
     def get_board_data(self, risk_level='high'):
         """Get board configuration data for frontend"""
-        multipliers = self.risk_multipliers[risk_level]
-        slot_names = [f"{mult}x" for mult in multipliers]
-        
-        # Assign colors based on multiplier values
-        slot_colors = {}
-        for i, mult in enumerate(multipliers):
-            if mult < 1.0:
-                slot_colors[mult] = self.slot_colors['very_low']
-            elif mult < 2.0:
-                slot_colors[mult] = self.slot_colors['low']
-            elif mult < 10.0:
-                slot_colors[mult] = self.slot_colors['medium']
-            elif mult < 100.0:
-                slot_colors[mult] = self.slot_colors['high']
-            else:
-                slot_colors[mult] = self.slot_colors['extreme']
-        
-        return {
-            'rows': self.rows,
-            'multipliers': multipliers,
-            'slot_names': slot_names,
-            'slot_colors': slot_colors,
-            'risk_levels': list(self.risk_multipliers.keys())
-        }
+        return plinko_boards()[risk_level]['board']
     
-    def place_bet(self, user_id, bet_amount, risk_level='high', wallet_id=None):
-        """Place a bet and drop the ball"""
+    def place_bet(self, user_id, bet_amount, risk_level='high', wallet_id=None, balls=1):
+        """
+        Place a bet and drop the ball
+        
+        With balls > 1, drops that many balls at bet_amount each and settles
+        them together: one wallet update and one insert of all the bets and
+        outcomes, instead of a request and a commit per ball.
+        """
         try:
             if bet_amount <= 0:
                 return {'success': False, 'message': 'Bet amount must be positive'}
+            if not 1 <= balls <= MAX_BALLS_PER_DROP:
+                return {'success': False, 'message': f'You can drop between 1 and {MAX_BALLS_PER_DROP} balls at a time'}
             
             # Convert bet_amount to Decimal for database operations
             bet_amount = Decimal(str(bet_amount))
@@ -194,6 +414,10 @@ class Plinko:
             if not game:
                 return {'success': False, 'message': 'Game not found'}
             
+            # Never play a table that pays back more than the house edge allows
+            if multiplier_table_stats(tuple(self.risk_multipliers[risk_level]))['rtp'] > 1 - float(game.house_edge):
+                return {'success': False, 'message': f'The {risk_level} risk table is closed for maintenance'}
+            
             # Get or create active round
             active_round = self.get_active_round()
             if not active_round:
@@ -215,72 +439,59 @@ class Plinko:
             else:
                 wallet = user.get_primary_wallet()
             
-            if wallet.balance < bet_amount:
+            if wallet.balance < bet_amount * balls:
                 return {'success': False, 'message': 'Insufficient funds'}
             
-            # Simulate ball drop with risk-specific multipliers
-            ball_result = self._simulate_ball_drop(risk_level)
-            
-            # Create bet
-            bet = Bet(
-                round_id=active_round.round_id,
-                user_id=user_id,
-                amount=bet_amount,
-                choice_data={'ball_path': ball_result['path'], 'risk_level': risk_level},
-                settled_at=datetime.now()
-            )
-            db.session.add(bet)
-            
-            # Create outcome
-            outcome = Outcome(
-                round_id=active_round.round_id,
-                outcome_data={
-                    'final_slot': ball_result['final_slot'],
-                    'multiplier': ball_result['multiplier'],
-                    'ball_path': ball_result['path'],
-                    'risk_level': risk_level
-                },
-                payout_multiplier=Decimal(str(ball_result['multiplier']))
-            )
-            db.session.add(outcome)
-            
-            # Update wallet balance
-            wallet.balance -= bet_amount
-            
-            # Create bet transaction (money going out of wallet)
-            bet_transaction = Transaction(
-                wallet_id=wallet.wallet_id,
-                amount=bet_amount,
-                txn_type='bet'
+            # Simulate ball drops with risk-specific multipliers
+            ball_results = [self._simulate_ball_drop(risk_level) for _ in range(balls)]
+            
+            settlement = settle_instant_bets(
+                active_round.round_id, user_id, wallet.wallet_id, bet_amount,
+                [({
+                      'risk_level': risk_level,
+                      'final_slot': ball_result['final_slot'],
+                      'path_mask': ball_result['path_mask']
+                  },
+                  {
+                      'final_slot': ball_result['final_slot'],
+                      'multiplier': ball_result['multiplier'],
+                      'path_mask': ball_result['path_mask'],
+                      'risk_level': risk_level
+                  },
+                  ball_result['multiplier'])
+                 for ball_result in ball_results]
             )
-            db.session.add(bet_transaction)
-            
-            # Handle winnings if any
-            win_amount = Decimal('0')
-            if ball_result['multiplier'] > 0:
-                win_amount = bet_amount * Decimal(str(ball_result['multiplier']))
-                wallet.balance += win_amount
-                
-                # Create win transaction (money coming into wallet)
-                win_transaction = Transaction(
-                    wallet_id=wallet.wallet_id,
-                    amount=win_amount,
-                    txn_type='win'
-                )
-                db.session.add(win_transaction)
+            if not settlement['success']:
+                db.session.rollback()
+                return settlement
             
             db.session.commit()
             
-            return {
+            drops = [
+                {
+                    'ball_path': ball_path(ball_result['path_mask']),
+                    'final_slot': ball_result['final_slot'],
+                    'multiplier': ball_result['multiplier'],
+                    'slot_name': ball_result['slot_name'],
+                    'win_amount': float(win_amount)
+                }
+                for ball_result, win_amount in zip(ball_results, settlement['win_amounts'])
+            ]
+            
+            if balls == 1:
+                response = dict(drops[0])
+            else:
+                response = {
+                    'balls': drops,
+                    'total_bet': float(settlement['total_bet']),
+                    'win_amount': float(settlement['total_win'])
+                }
+            response.update({
                 'success': True,
-                'ball_path': ball_result['path'],
-                'final_slot': ball_result['final_slot'],
-                'multiplier': ball_result['multiplier'],
-                'slot_name': ball_result['slot_name'],
-                'win_amount': float(win_amount) if win_amount > 0 else 0,
-                'wallet_balance': float(wallet.balance),
+                'wallet_balance': float(settlement['wallet_balance']),
                 'wallet_currency': wallet.currency
-            }
+            })
+            return response
             
         except Exception as e:
             db.session.rollback()
@@ -288,45 +499,14 @@ class Plinko:
     
     def _simulate_ball_drop(self, risk_level='high'):
         """Simulate a ball dropping through the Plinko board"""
-        # Start at the center of the top (position 8 for 16-row board)
-        position = 8.0
-        path = []
-        
-        # Get multipliers for this risk level
         multipliers = self.risk_multipliers[risk_level]
-        slot_names = [f"{mult}x" for mult in multipliers]
-        
-        # For each row, determine if ball goes left or right
-        for row in range(self.rows):
-            # Add slight bias toward center to make extreme outcomes less common
-            center_bias = 0.1 if abs(position - 8) > 4 else 0
-            
-            # Random choice with center bias
-            if random.random() < (0.5 + center_bias):
-                direction = 0.5  # Go right
-            else:
-                direction = -0.5  # Go left
-            
-            position += direction
-            
-            # Ensure position stays within bounds
-            position = max(0, min(16, position))
-            
-            path.append({
-                'row': row,
-                'position': position,
-                'direction': 'right' if direction > 0 else 'left'
-            })
-        
-        # Final slot is determined by the final position
-        final_slot = int(round(position))
-        final_slot = max(0, min(len(multipliers) - 1, final_slot))
+        final_slot, mask = sample_drop()
         
         return {
-            'path': path,
+            'path_mask': mask,
             'final_slot': final_slot,
             'multiplier': multipliers[final_slot],
-            'slot_name': slot_names[final_slot]
+            'slot_name': f"{multipliers[final_slot]}x"
         }
     
     def get_game_status(self):
@@ -354,30 +534,45 @@ class Plinko:
             # Get multipliers for this risk level
             multipliers = self.risk_multipliers[risk_level]
             
-            # Calculate theoretical RTP based on multipliers
-            # Assuming gaussian probability distribution (center more likely)
-            total_prob = 0
-            weighted_return = 0
-            
-            for i, mult in enumerate(multipliers):
-                # Gaussian probability - center slots more likely
-                distance_from_center = abs(i - 8)
-                prob = math.exp(-0.5 * (distance_from_center / 3) ** 2)
-                total_prob += prob
-                weighted_return += mult * prob
-            
-            # Normalize
-            avg_multiplier = weighted_return / total_prob if total_prob > 0 else 1
-            theoretical_rtp = avg_multiplier * 100
+            # Exact return of this table under the board's walk
+            stats = multiplier_table_stats(tuple(multipliers))
             
             return {
                 'total_slots': len(multipliers),
                 'max_multiplier': max(multipliers),
                 'min_multiplier': min(multipliers),
-                'avg_multiplier': round(avg_multiplier, 2),
-                'theoretical_rtp': round(theoretical_rtp, 1),
-                'house_edge': round((1 - avg_multiplier) * 100, 1),
+                'avg_multiplier': round(stats['rtp'], 2),
+                'theoretical_rtp': round(stats['rtp'] * 100, 1),
+                'house_edge': round((1 - stats['rtp']) * 100, 1),
+                'std_dev': round(stats['std_dev'], 2),
+                'hit_rate': round(stats['hit_rate'] * 100, 1),
                 'risk_level': risk_level
             }
         except Exception as e:
-            return {'error': f'Error getting statistics: {str(e)}'} 
\ No newline at end of file
+            return {'error': f'Error getting statistics: {str(e)}'}
+    
+    def get_rtp_report(self):
+        """
+        Exact RTP, variance and slot odds of every risk level, for admins
+        
+        Returns:
+            list: One dict per risk level, with within_edge False for a table
+            that pays back more than 100% - house_edge
+        """
+        game = self.get_game()
+        max_rtp = 1 - float(game.house_edge) if game else None
+        report = []
+        for risk, multipliers in self.risk_multipliers.items():
+            stats = multiplier_table_stats(tuple(multipliers))
+            report.append({
+                'risk_level': risk,
+                'multipliers': multipliers,
+                'rtp': stats['rtp'],
+                'variance': stats['variance'],
+                'std_dev': stats['std_dev'],
+                'hit_rate': stats['hit_rate'],
+                'slot_probabilities': stats['slot_probabilities'],
+                'max_rtp': max_rtp,
+                'within_edge': max_rtp is None or stats['rtp'] <= max_rtp
+            })
+        return report
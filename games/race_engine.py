@@ -0,0 +1,333 @@
+"""
+Vectorized Horse Race Engine
+
+Simulates horse races with NumPy instead of stepping a Python loop one
+millisecond at a time. The speed model is the one HorseRacing has always used:
+
+- a running speed of 15 m/s plus the horse's base_speed rating
+- an age modifier (young horses and veterans are slower)
+- a temperament that sets how stable the horse's speed is and how much it
+  varies from one tick to the next
+
+Every tick a horse moves ``speed * (stability + U(-variance, variance)) * dt``
+metres. All per-tick speed variations for all runners are drawn as one array,
+positions come from a cumulative sum along the time axis, and each horse's
+finish tick is a row-wise searchsorted of its position track against the
+race distance.
+
+For statistics over many races of one lineup (e.g. pricing odds),
+sample_lineup draws finish ticks straight from each horse's finish-time
+distribution instead of stepping every tick. Horses move independently, so
+sampling each horse's finish tick on its own gives the same joint result.
+
+For the race shown to players, simulate_replay runs one race and also keeps
+each horse's position REPLAY_FPS times per second for the track animation.
+
+Usage:
+    from games.race_engine import simulate_races, simulate_lineup, sample_lineup
+
+    times = simulate_races([lineup_a, lineup_b])  # shape (2, 6), seconds
+    times = simulate_lineup(lineup_a, 1000)       # same six horses, 1000 races
+    times = sample_lineup(lineup_a, 20000)        # same shape, sampled in milliseconds
+    times, frames = simulate_replay(lineup_a)     # (6,) seconds, (F, 6) metres
+"""
+
+import math
+import numpy as np
+
+
+# Race parameters
+RACE_DISTANCE = 200.0  # metres (sprint race)
+TIME_STEP = 0.001      # 1 millisecond ticks
+MAX_RACE_TIME = 30.0   # seconds before a horse is recorded as not finishing
+MAX_TICKS = int(round(MAX_RACE_TIME / TIME_STEP))
+REPLAY_FPS = 20        # position frames per second kept for race replays
+
+# Temperament affects speed consistency during the race
+TEMPERAMENT_EFFECTS = {
+    'calm': {'stability': 0.95, 'variance': 0.02},          # Very consistent
+    'confident': {'stability': 0.98, 'variance': 0.015},    # Most consistent
+    'aggressive': {'stability': 0.85, 'variance': 0.08},    # Fast but erratic
+    'nervous': {'stability': 0.80, 'variance': 0.12},       # Very inconsistent
+    'unpredictable': {'stability': 0.75, 'variance': 0.15}  # Extremely variable
+}
+DEFAULT_EFFECTS = {'stability': 0.90, 'variance': 0.05}
+
+# Upper bound on random draws held in memory at once (~16 MB of float64)
+CHUNK_BUDGET = 2_000_000
+
+
+def age_modifier(age):
+    """Overall performance factor for a horse of the given age"""
+    if age < 3:
+        return 0.85  # Young horses not at peak
+    elif age <= 6:
+        return 1.0   # Prime age
+    elif age <= 9:
+        return 0.95  # Slightly past prime
+    return 0.80      # Older horses slower
+
+
+def runner_profile(horse):
+    """
+    Get the speed profile used by the simulator for a horse
+
+    Args:
+        horse: Any object with age, base_speed and temperament attributes
+
+    Returns:
+        tuple: (speed in m/s, stability, variance)
+    """
+    # Assume base_speed is on a scale of 1-10, convert to realistic horse speeds (15-25 m/s)
+    base_speed_ms = 15.0 + float(horse.base_speed)
+    effects = TEMPERAMENT_EFFECTS.get(horse.temperament.lower(), DEFAULT_EFFECTS)
+    return (base_speed_ms * age_modifier(horse.age),
+            effects['stability'],
+            effects['variance'])
+
+
+def lineup_profiles(lineups):
+    """
+    Build the (speed, stability, variance) arrays for a batch of races
+
+    Args:
+        lineups (list): K lineups, each a list of H horses
+
+    Returns:
+        tuple: Three float arrays of shape (K, H)
+    """
+    profiles = np.array([[runner_profile(horse) for horse in lineup] for lineup in lineups],
+                        dtype=np.float64)
+    return profiles[..., 0], profiles[..., 1], profiles[..., 2]
+
+
+def simulate_finish_ticks(speed, stability, variance, rng=None):
+    """
+    Run a batch of races and return the tick on which each horse finished
+
+    Ticks are simulated in chunks so that memory stays bounded however many
+    races are requested. The first chunk covers the slowest runner's expected
+    finish, which resolves most races in a single pass; races where every
+    horse has finished drop out of later chunks.
+
+    Args:
+        speed, stability, variance (ndarray): Runner profiles, shape (K, H)
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        ndarray: int64 array (K, H) of 1-based finish ticks, 0 if the horse
+        had not finished after MAX_TICKS
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    num_races, num_runners = speed.shape
+
+    step = speed * TIME_STEP  # metres per tick at full stability
+    low = step * (stability - variance)
+    high = step * (stability + variance)
+    position = np.zeros(speed.shape)
+    finish = np.zeros(speed.shape, dtype=np.int64)
+
+    expected_ticks = int(np.ceil(RACE_DISTANCE / (step * stability).min()))
+    chunk = min(expected_ticks, MAX_TICKS)
+    active = np.arange(num_races)
+    tick = 0
+
+    while active.size and tick < MAX_TICKS:
+        n = min(chunk, MAX_TICKS - tick,
+                max(1, CHUNK_BUDGET // (active.size * num_runners)))
+
+        # Per-tick distance covered: step * (stability + U(-variance, variance))
+        path = rng.uniform(low[active, :, None], high[active, :, None],
+                           size=(active.size, num_runners, n))
+        np.cumsum(path, axis=2, out=path)
+        path += position[active, :, None]
+
+        # Positions only ever increase, so each row is sorted and a left
+        # searchsorted for the finish line is the count of positions short of it
+        crossed = np.count_nonzero(path < RACE_DISTANCE, axis=2)
+
+        block = finish[active]
+        newly_finished = (block == 0) & (crossed < n)
+        block[newly_finished] = tick + crossed[newly_finished] + 1
+        finish[active] = block
+        position[active] = path[:, :, -1]
+
+        tick += n
+        active = active[(block == 0).any(axis=1)]
+        # Stragglers only need a little longer than the expected finish
+        chunk = max(256, expected_ticks // 10)
+
+    return finish
+
+
+def simulate_races(lineups, rng=None):
+    """
+    Simulate K independent races in one call
+
+    Args:
+        lineups (list): K lineups, each a list of H horses (any objects with
+            age, base_speed and temperament)
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        ndarray: float array (K, H) of finish times in seconds, in lineup order
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    speed, stability, variance = lineup_profiles(lineups)
+    return _ticks_to_seconds(simulate_finish_ticks(speed, stability, variance, rng), rng)
+
+
+def simulate_lineup(horses, num_races, rng=None):
+    """
+    Simulate the same lineup num_races times
+
+    Args:
+        horses (list): The H horses in the race
+        num_races (int): Number of races to run
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        ndarray: float array (num_races, H) of finish times in seconds
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    speed, stability, variance = (np.repeat(profile, num_races, axis=0)
+                                  for profile in lineup_profiles([horses]))
+    return _ticks_to_seconds(simulate_finish_ticks(speed, stability, variance, rng), rng)
+
+
+def simulate_replay(horses, fps=REPLAY_FPS, rng=None):
+    """
+    Run one race and record every horse's position for the track animation
+
+    Uses the same per-tick model as simulate_races, keeping each horse's
+    position at every 1/fps seconds so the client can replay exactly the
+    race that was run.
+
+    Args:
+        horses (list): The H horses in the race
+        fps (int): Frames per second to record; must divide the 1 ms tick rate
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        tuple: (finish times in seconds, shape (H,),
+                positions in metres capped at RACE_DISTANCE, shape (F, H)).
+        Frame 0 is the start; the last frame is the first one with every
+        horse past the finish line.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    speed, stability, variance = (profile[0] for profile in lineup_profiles([horses]))
+    ticks_per_frame = int(round(1.0 / (fps * TIME_STEP)))
+
+    step = speed * TIME_STEP
+    low = step * (stability - variance)
+    high = step * (stability + variance)
+    position = np.zeros(speed.size)
+    finish = np.zeros(speed.size, dtype=np.int64)
+    frames = [position[None, :]]
+
+    # Chunks are whole frames so frame boundaries line up across chunks
+    chunk = ticks_per_frame * 100
+    tick = 0
+    while (finish == 0).any() and tick < MAX_TICKS:
+        n = min(chunk, MAX_TICKS - tick)
+        path = rng.uniform(low[:, None], high[:, None], size=(speed.size, n))
+        np.cumsum(path, axis=1, out=path)
+        path += position[:, None]
+
+        crossed = np.count_nonzero(path < RACE_DISTANCE, axis=1)
+        newly_finished = (finish == 0) & (crossed < n)
+        finish[newly_finished] = tick + crossed[newly_finished] + 1
+
+        frames.append(path[:, ticks_per_frame - 1::ticks_per_frame].T)
+        position = path[:, -1]
+        tick += n
+
+    frames = np.minimum(np.concatenate(frames), RACE_DISTANCE)
+    if (finish > 0).all():
+        frames = frames[:int(np.ceil(finish.max() / ticks_per_frame)) + 1]
+    return _ticks_to_seconds(finish[None, :], rng)[0], frames
+
+
+def sample_finish_ticks(speed, stability, variance, num_races, rng=None):
+    """
+    Sample finish ticks for one lineup from each horse's finish distribution
+
+    A horse's position after n ticks is the sum of n independent uniform steps,
+    which for race-length n is normal to well within a tick. Because positions
+    only increase, P(finished by tick n) = P(position at tick n >= distance),
+    so each horse's finish-tick CDF can be evaluated on a window of ticks
+    around its expected finish and sampled by inverse transform.
+
+    Args:
+        speed, stability, variance (ndarray): Runner profiles, shape (H,)
+        num_races (int): Number of races to sample
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        ndarray: int64 array (num_races, H) of 1-based finish ticks, 0 if the
+        horse had not finished after MAX_TICKS
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    step = speed * TIME_STEP
+    mean_step = step * stability
+    sd_step = step * variance / math.sqrt(3.0)  # sd of U(-v, v) is v / sqrt(3)
+
+    expected = RACE_DISTANCE / mean_step
+    sd_ticks = np.sqrt(expected) * sd_step / mean_step
+    window = int(np.ceil(8 * sd_ticks.max())) + 1
+    erfc = np.vectorize(math.erfc)
+
+    finish = np.empty((num_races, speed.size), dtype=np.int64)
+    for i in range(speed.size):
+        ticks = np.arange(max(1, int(expected[i]) - window), int(expected[i]) + window + 1)
+        z = (RACE_DISTANCE - ticks * mean_step[i]) / (sd_step[i] * np.sqrt(2.0 * ticks))
+        cdf = 0.5 * erfc(z)
+        index = np.minimum(np.searchsorted(cdf, rng.random(num_races)), ticks.size - 1)
+        finish[:, i] = ticks[index]
+
+    finish[finish > MAX_TICKS] = 0
+    return finish
+
+
+def sample_lineup(horses, num_races, rng=None):
+    """
+    Sample finish times for the same lineup num_races times
+
+    Statistically equivalent to simulate_lineup, but far cheaper because no
+    ticks are stepped. Use it for pricing and analysis, not for the race
+    that is shown to players.
+
+    Args:
+        horses (list): The H horses in the race
+        num_races (int): Number of races to sample
+        rng (numpy.random.Generator, optional): Random source
+
+    Returns:
+        ndarray: float array (num_races, H) of finish times in seconds
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    speed, stability, variance = (profile[0] for profile in lineup_profiles([horses]))
+    return _ticks_to_seconds(sample_finish_ticks(speed, stability, variance, num_races, rng), rng)
+
+
+def _ticks_to_seconds(finish_ticks, rng):
+    """Convert finish ticks to seconds, giving non-finishers a time past the limit"""
+    times = np.round(finish_ticks * TIME_STEP, 3)
+    unfinished = finish_ticks == 0
+    if unfinished.any():
+        times[unfinished] = np.round(MAX_RACE_TIME + rng.uniform(0.1, 1.0, unfinished.sum()), 3)
+    return times
+
+
+def race_times_by_horse(horse_ids, times):
+    """
+    Map one race's finish times back to horse IDs
+
+    Args:
+        horse_ids (list): Horse IDs in lineup order
+        times (ndarray): Finish times for that race, shape (H,)
+
+    Returns:
+        dict: horse_id -> finish time in seconds (JSON serializable)
+    """
+    return {horse_id: float(t) for horse_id, t in zip(horse_ids, times)}
@@ -0,0 +1,204 @@
+"""
+Horse Race Event Feed
+
+Pushes race lifecycle events to every open horse racing page over
+Server-Sent Events, instead of each tab polling /horse-racing/race-status
+every two seconds.
+
+One producer thread per process polls the public race status once per
+interval and works out what changed. It publishes each change to every
+subscriber's queue, so database load depends on the number of workers,
+not the number of spectators. The producer idles while nobody is
+listening.
+
+Events (each carries the public race status as JSON):
+- race_opened:    a new race is open for betting
+- bets_updated:   bet count or pool odds changed
+- betting_closed: the betting window has closed
+- race_results:   the race was run; `last_race` holds the results
+- no_race:        nothing is running
+
+Per-user details (the user's own bet and winnings) are not broadcast;
+clients fetch them from race-status when a race opens or finishes.
+
+Each track has its own feed, and its own producer thread, created the first
+time someone watches it (see RaceFeeds).
+"""
+
+import json
+import queue
+import threading
+import time
+
+from .horse_racing import HorseRacing, DEFAULT_TRACK_CODE
+
+
+def format_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class RaceFeed:
+    """Shared per-process producer of race status events for one track"""
+
+    KEEPALIVE_SECONDS = 15   # comment line so proxies don't drop idle streams
+    STREAM_LIFETIME = 300    # browsers reconnect on their own, which rebalances workers
+    QUEUE_SIZE = 16
+    RETRY_MS = 3000
+
+    def __init__(self, app, track_code=DEFAULT_TRACK_CODE, poll_interval=1.0):
+        self.app = app
+        self.track_code = track_code
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_event = None
+        self._last_status = None
+
+    def subscribe(self):
+        """
+        Register a subscriber
+
+        Returns:
+            queue.Queue: Receives (event, data) tuples, starting with the latest
+            event name and the freshest status
+        """
+        subscriber = queue.Queue(maxsize=self.QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._last_event is not None:
+                subscriber.put_nowait(self._last_event)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'horse-race-feed-{self.track_code.lower()}',
+                                                daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self):
+        """
+        Generate the Server-Sent Events stream for one client
+
+        Yields:
+            str: SSE-formatted text
+        """
+        subscriber = self.subscribe()
+        try:
+            yield f"retry: {self.RETRY_MS}\n\n"
+            deadline = time.monotonic() + self.STREAM_LIFETIME
+            while time.monotonic() < deadline:
+                try:
+                    event, data = subscriber.get(timeout=self.KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def publish(self, event, data):
+        """Send an event to every subscriber, dropping the oldest event for slow ones"""
+        with self._lock:
+            self._last_event = (event, data)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait((event, data))
+
+    def classify(self, previous, status):
+        """
+        Work out which lifecycle event, if any, a status change represents
+
+        Args:
+            previous (dict): Last published status, or None
+            status (dict): Current status
+
+        Returns:
+            str: Event name, or None if nothing changed
+        """
+        if previous is None:
+            return 'race_opened' if status.get('active') else 'no_race'
+
+        if status.get('active'):
+            if not previous.get('active') or previous['round_id'] != status['round_id']:
+                return 'race_opened'
+            if status.get('betting_closes_in') == 0 and previous.get('betting_closes_in') != 0:
+                return 'betting_closed'
+            if (status['bet_count'] != previous['bet_count'] or
+                    status['horses'] != previous['horses']):
+                return 'bets_updated'
+            return None
+
+        last_race = status.get('last_race') or {}
+        previous_race = previous.get('last_race') or {}
+        if previous.get('active') or last_race.get('round_id') != previous_race.get('round_id'):
+            return 'race_results' if last_race else 'no_race'
+        return None
+
+    def _run(self):
+        """Producer loop: poll once per interval while anyone is listening"""
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                listening = bool(self._subscribers)
+            if not listening:
+                self._wakeup.wait(timeout=60)
+                continue
+
+            try:
+                with self.app.app_context():
+                    status = HorseRacing(self.track_code).get_race_status()
+                event = self.classify(self._last_status, status)
+                self._last_status = status
+                if event:
+                    self.publish(event, status)
+                else:
+                    # New subscribers should start from the freshest status
+                    with self._lock:
+                        self._last_event = (self._last_event[0], status)
+            except Exception:
+                self.app.logger.exception(f'Horse race feed poll failed on {self.track_code}')
+            time.sleep(self.poll_interval)
+
+
+class RaceFeeds:
+    """Per-process registry of race feeds, one per track"""
+
+    def __init__(self, app, poll_interval=1.0):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._feeds = {}
+        self._lock = threading.Lock()
+
+    def get(self, track_code):
+        """
+        Get the feed for a track, creating it on first use
+
+        Callers must check the track exists first, so a stream of made-up
+        track codes can't create feeds.
+
+        Args:
+            track_code (str): The track
+
+        Returns:
+            RaceFeed: The track's feed
+        """
+        with self._lock:
+            feed = self._feeds.get(track_code)
+            if feed is None:
+                feed = self._feeds[track_code] = RaceFeed(self.app, track_code, self.poll_interval)
+            return feed
@@ -0,0 +1,144 @@
+"""
+Horse Race Scheduler
+
+Drives horse races on a fixed cadence instead of waiting for a browser to
+POST /horse-racing/start-race and /horse-racing/run-race. On every active
+track:
+
+1. A race opens for betting every race interval (the track's own, or
+   HORSE_RACE_INTERVAL seconds)
+2. Betting closes a betting window later (the track's own, or
+   HORSE_BETTING_WINDOW seconds)
+3. The race is then run and settled straight away
+
+Every gunicorn worker runs a scheduler thread, but each track's steps are
+taken under that track's WorkerLock ('horse-race-<code>'), so exactly one
+worker drives any given round while different workers can drive different
+tracks. All state lives in the database, which makes each step idempotent:
+a worker that takes over after another one dies just carries on from there.
+
+The thread is started lazily on the first request, so scripts that import
+the app (seeding, migrations) never start racing.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from models import Round
+from .horse_racing import HorseRacing
+from .worker_lock import WorkerLock
+
+RACE_LOCK_NAME = 'horse-race'
+
+
+def race_lock_name(track_code):
+    """Name of the WorkerLock that guards one track's race lifecycle"""
+    return f'{RACE_LOCK_NAME}-{track_code.lower()}'
+
+
+class RaceScheduler:
+    """Background thread that opens, closes and runs horse races"""
+
+    def __init__(self, app, poll_interval=1.0):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._started = threading.Lock()
+
+    def start(self):
+        """Start the scheduler thread once per process"""
+        with self._started:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='horse-race-scheduler', daemon=True)
+                self._thread.start()
+
+    def tick(self, now=None):
+        """
+        Take the next scheduled step on every active track
+
+        Must be called inside an app context.
+
+        Args:
+            now (datetime, optional): Current local time
+
+        Returns:
+            dict: track code -> result of tick_track
+        """
+        now = now or datetime.now()
+        game = HorseRacing().get_game()
+        if not game or not game.is_active:
+            return {}
+        return {track.code: self.tick_track(track.code, now) for track in HorseRacing.get_tracks()}
+
+    def tick_track(self, track_code, now=None):
+        """
+        Take the next scheduled step on one track, if one is due
+
+        Must be called inside an app context.
+
+        Args:
+            track_code (str): The track
+            now (datetime, optional): Current local time
+
+        Returns:
+            str: 'started', 'ran', 'locked' (another worker holds the lock) or None
+        """
+        now = now or datetime.now()
+        hr = HorseRacing(track_code)
+        game = hr.get_game()
+        track = hr.get_track()
+        if not game or not track:
+            return None
+
+        with WorkerLock(race_lock_name(track_code)) as acquired:
+            if not acquired:
+                return 'locked'
+
+            active_round = hr.get_active_round()
+            if active_round:
+                if now >= hr.local_time(active_round.started_at) + hr.betting_window():
+                    result = hr.run_race(require_bets=False)
+                    if not result['success']:
+                        self.app.logger.warning(f"Scheduled race {active_round.round_id} on {track_code} failed: {result['message']}")
+                    return 'ran'
+                return None
+
+            last_round = Round.query.filter_by(game_id=game.game_id, track_id=track.track_id)\
+                                    .order_by(Round.started_at.desc()).first()
+            if last_round is None or now >= hr.local_time(last_round.started_at) + hr.race_interval():
+                result = hr.start_new_race()
+                if not result['success']:
+                    self.app.logger.warning(f"Scheduled race on {track_code} failed to start: {result['message']}")
+                return 'started'
+            return None
+
+    def _run(self):
+        """Scheduler loop"""
+        while True:
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception:
+                self.app.logger.exception('Horse race scheduler tick failed')
+            time.sleep(self.poll_interval)
+
+
+def init_race_scheduler(app):
+    """
+    Start the race scheduler on the first request if HORSE_RACE_SCHEDULER is on
+
+    Args:
+        app (Flask): The application
+
+    Returns:
+        RaceScheduler: The scheduler (not yet started)
+    """
+    scheduler = RaceScheduler(app)
+
+    @app.before_request
+    def start_race_scheduler():
+        if app.config.get('HORSE_RACE_SCHEDULER'):
+            scheduler.start()
+
+    return scheduler
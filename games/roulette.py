@@ -0,0 +1,365 @@
+"""
+European Roulette
+
+Single-zero wheel (payout_rule_json {"wheel": "single-zero"}) with every
+inside and outside bet.
+
+Each bet on the layout covers a fixed set of pockets, so every one of them
+is compiled once, at import, into a 37-bit coverage mask: bit n is set when
+the bet wins on pocket n. A spin is one draw of a pocket, and resolving a
+chip is then a dict lookup of its mask and one `mask >> pocket & 1` test,
+however many chips are on the table. All the chips of a spin settle
+together (settle_table_bets): one wallet update, one Outcome for the spin
+and one insert of every Bet.
+
+Chips are dicts with an amount and a bet:
+- inside bets list the pockets they cover: {'bet': 'split', 'numbers': [17, 20]}
+- dozens and columns name which one: {'bet': 'dozen', 'target': 2}
+- even-money bets are just the bet: {'bet': 'red'}
+
+Usage:
+    from games.roulette import Roulette
+
+    Roulette().place_bet(user_id, [{'bet': 'straight', 'numbers': [17], 'amount': 5},
+                                   {'bet': 'red', 'amount': 10}])
+"""
+
+import random
+from datetime import datetime
+from decimal import Decimal
+from models import db, Game, Round, Wallet, User
+from .instant_settlement import settle_table_bets
+
+POCKETS = 37
+
+# Pocket order around a European wheel, clockwise from zero
+WHEEL_ORDER = (0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23, 10,
+               5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26)
+
+RED_NUMBERS = frozenset((1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36))
+
+# What each bet pays, to 1
+BET_PAYS = {
+    'straight': 35,
+    'split': 17,
+    'street': 11,     # includes the 0-1-2 and 0-2-3 trios
+    'corner': 8,      # includes the 0-1-2-3 first four
+    'six_line': 5,
+    'dozen': 2,
+    'column': 2,
+    'red': 1,
+    'black': 1,
+    'odd': 1,
+    'even': 1,
+    'low': 1,
+    'high': 1,
+}
+
+INSIDE_BETS = ('straight', 'split', 'street', 'corner', 'six_line')
+
+# Most chips one spin can carry
+MAX_CHIPS_PER_SPIN = 500
+
+
+def pocket_color(number):
+    """'green', 'red' or 'black'"""
+    if number == 0:
+        return 'green'
+    return 'red' if number in RED_NUMBERS else 'black'
+
+
+def coverage_mask(numbers):
+    """37-bit mask with bit n set for each pocket n"""
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+
+def _inside_bets():
+    """Every inside bet on the layout: (bet, pockets covered)"""
+    # The layout's rows are 1-2-3, 4-5-6, ... 34-35-36
+    for number in range(POCKETS):
+        yield 'straight', (number,)
+    for number in range(1, 37):
+        if number % 3:
+            yield 'split', (number, number + 1)
+        if number <= 33:
+            yield 'split', (number, number + 3)
+    for number in (1, 2, 3):
+        yield 'split', (0, number)
+    for first in range(1, 35, 3):
+        yield 'street', (first, first + 1, first + 2)
+    yield 'street', (0, 1, 2)
+    yield 'street', (0, 2, 3)
+    for number in range(1, 33):
+        if number % 3:
+            yield 'corner', (number, number + 1, number + 3, number + 4)
+    yield 'corner', (0, 1, 2, 3)
+    for first in range(1, 32, 3):
+        yield 'six_line', tuple(range(first, first + 6))
+
+
+def _outside_bets():
+    """Every outside bet: (bet, target, pockets covered)"""
+    numbers = range(1, 37)
+    for target in (1, 2, 3):
+        yield 'dozen', target, [number for number in numbers if (number - 1) // 12 + 1 == target]
+        yield 'column', target, [number for number in numbers if (number - 1) % 3 + 1 == target]
+    yield 'red', None, [number for number in numbers if number in RED_NUMBERS]
+    yield 'black', None, [number for number in numbers if number not in RED_NUMBERS]
+    yield 'odd', None, [number for number in numbers if number % 2]
+    yield 'even', None, [number for number in numbers if not number % 2]
+    yield 'low', None, range(1, 19)
+    yield 'high', None, range(19, 37)
+
+
+def compile_bet_masks():
+    """
+    Coverage mask of every bet on the layout
+
+    Returns:
+        dict: (bet, selection) -> mask, where selection is the sorted tuple
+        of pockets for inside bets, the dozen or column (1-3), or None
+    """
+    masks = {(bet, numbers): coverage_mask(numbers) for bet, numbers in _inside_bets()}
+    masks.update({(bet, target): coverage_mask(numbers) for bet, target, numbers in _outside_bets()})
+    return masks
+
+
+BET_MASKS = compile_bet_masks()
+
+
+def chip_key(chip):
+    """
+    The BET_MASKS key of a chip
+
+    Raises:
+        ValueError: If the chip isn't a bet on the layout
+    """
+    bet = chip.get('bet')
+    if bet in INSIDE_BETS:
+        key = (bet, tuple(sorted(int(number) for number in chip.get('numbers') or ())))
+    elif bet in ('dozen', 'column'):
+        key = (bet, int(chip.get('target') or 0))
+    else:
+        key = (bet, None)
+    if key not in BET_MASKS:
+        raise ValueError(f'Not a roulette bet: {chip}')
+    return key
+
+
+def spin_wheel():
+    """The pocket the ball lands in, 0-36"""
+    return random.randrange(POCKETS)
+
+
+class Roulette:
+    """
+    Roulette Game Implementation
+    
+    Features:
+    - European single-zero wheel
+    - Every inside (straight, split, street, corner, six line) and outside
+      (dozen, column, red/black, odd/even, low/high) bet
+    - Many chips per spin, settled together
+    """
+    
+    def __init__(self):
+        self.bet_pays = BET_PAYS
+        self.bet_masks = BET_MASKS
+    
+    def get_game(self):
+        """Get the roulette game from database"""
+        try:
+            return Game.query.filter_by(code='ROULETTE').first()
+        except Exception as e:
+            return None
+    
+    def get_active_round(self):
+        """Get the current active round"""
+        try:
+            game = self.get_game()
+            if not game:
+                return None
+            # Get the most recent round that hasn't ended
+            return Round.query.filter_by(game_id=game.game_id).filter(Round.ended_at.is_(None)).first()
+        except Exception as e:
+            return None
+    
+    def validate_game_setup(self):
+        """Validate that the game is properly set up"""
+        try:
+            game = self.get_game()
+            if not game:
+                return {'valid': False, 'message': 'Roulette game not found'}
+            if not game.is_active:
+                return {'valid': False, 'message': 'Roulette game is not active'}
+            wheel = (game.payout_rule_json or {}).get('wheel', 'single-zero')
+            if wheel != 'single-zero':
+                return {'valid': False, 'message': f'Unsupported roulette wheel: {wheel}'}
+            return {'valid': True}
+        except Exception as e:
+            return {'valid': False, 'message': f'Error validating game setup: {str(e)}'}
+    
+    def start_new_round(self):
+        """Start a new round of roulette"""
+        try:
+            # Check for existing active round
+            active_round = self.get_active_round()
+            if active_round:
+                return {'success': False, 'message': 'Round already in progress'}
+            
+            # Create new round
+            game = self.get_game()
+            if not game:
+                return {'success': False, 'message': 'Game not found'}
+            
+            round = Round(
+                game_id=game.game_id,
+                started_at=datetime.now()
+            )
+            db.session.add(round)
+            db.session.commit()
+            
+            return {'success': True, 'round_id': round.round_id}
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error starting round: {str(e)}'}
+    
+    def resolve_chips(self, keys, number):
+        """
+        Payout multiplier (stake included) of each chip on a spin
+        
+        Args:
+            keys (list): BET_MASKS key of each chip
+            number (int): The winning pocket
+        
+        Returns:
+            list: 0 or pays + 1 for each chip
+        """
+        return [self.bet_pays[key[0]] + 1 if self.bet_masks[key] >> number & 1 else 0 for key in keys]
+    
+    def place_bet(self, user_id, chips, wallet_id=None):
+        """
+        Put chips on the table and spin the wheel
+        
+        Every chip is its own bet, but they all settle together: one wallet
+        update, one outcome for the spin and one insert of every bet.
+        
+        Args:
+            user_id (int): The player
+            chips (list): {'bet', 'amount', and 'numbers' or 'target'} per chip
+            wallet_id (int, optional): Wallet to play from (default: primary)
+        """
+        try:
+            if not chips:
+                return {'success': False, 'message': 'Place at least one chip'}
+            if len(chips) > MAX_CHIPS_PER_SPIN:
+                return {'success': False, 'message': f'At most {MAX_CHIPS_PER_SPIN} chips per spin'}
+            
+            # Get game
+            game = self.get_game()
+            if not game:
+                return {'success': False, 'message': 'Game not found'}
+            
+            try:
+                keys = [chip_key(chip) for chip in chips]
+            except (TypeError, ValueError) as e:
+                return {'success': False, 'message': str(e)}
+            amounts = [Decimal(str(chip.get('amount', 0))) for chip in chips]
+            if any(amount < game.min_bet or amount > game.max_bet for amount in amounts):
+                return {'success': False,
+                        'message': f'Each chip must be between {game.min_bet:.2f} and {game.max_bet:.2f}'}
+            
+            # Get or create active round
+            active_round = self.get_active_round()
+            if not active_round:
+                result = self.start_new_round()
+                if not result['success']:
+                    return result
+                active_round = self.get_active_round()
+            
+            # Get user's wallet
+            user = User.query.get(user_id)
+            if not user or not user.wallets:
+                return {'success': False, 'message': 'User wallet not found'}
+            
+            # Use the specified wallet or primary wallet
+            if wallet_id:
+                wallet = Wallet.query.filter_by(wallet_id=wallet_id, user_id=user_id).first()
+                if not wallet:
+                    return {'success': False, 'message': 'Specified wallet not found'}
+            else:
+                wallet = user.get_primary_wallet()
+            
+            if wallet.balance < sum(amounts):
+                return {'success': False, 'message': 'Insufficient funds'}
+            
+            number = spin_wheel()
+            multipliers = self.resolve_chips(keys, number)
+            choices = [self._choice_data(key) for key in keys]
+            
+            settlement = settle_table_bets(
+                active_round.round_id, user_id, wallet.wallet_id,
+                {'number': number, 'color': pocket_color(number)},
+                list(zip(amounts, choices, multipliers))
+            )
+            if not settlement['success']:
+                db.session.rollback()
+                return settlement
+            
+            db.session.commit()
+            
+            return {
+                'success': True,
+                'number': number,
+                'color': pocket_color(number),
+                'chips': [
+                    dict(choice, amount=float(amount), payout_multiplier=multiplier, win_amount=float(win_amount))
+                    for choice, amount, multiplier, win_amount
+                    in zip(choices, amounts, multipliers, settlement['win_amounts'])
+                ],
+                'total_bet': float(settlement['total_bet']),
+                'win_amount': float(settlement['total_win']),
+                'wallet_balance': float(settlement['wallet_balance']),
+                'wallet_currency': wallet.currency
+            }
+        
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Error placing bet: {str(e)}'}
+    
+    def _choice_data(self, key):
+        """A chip's bet as stored in choice_data"""
+        bet, selection = key
+        if bet in INSIDE_BETS:
+            return {'bet_type': bet, 'numbers': list(selection)}
+        if selection is not None:
+            return {'bet_type': bet, 'target': selection}
+        return {'bet_type': bet}
+    
+    def get_layout(self):
+        """Pocket colors, wheel order and bet pays for the frontend"""
+        return {
+            'wheel_order': list(WHEEL_ORDER),
+            'colors': {number: pocket_color(number) for number in range(POCKETS)},
+            'bet_pays': self.bet_pays,
+            'max_chips': MAX_CHIPS_PER_SPIN
+        }
+    
+    def get_game_status(self):
+        """Get current game status"""
+        try:
+            game = self.get_game()
+            if not game:
+                return {'status': 'error', 'message': 'Game not found'}
+            
+            active_round = self.get_active_round()
+            if active_round:
+                return {'status': 'active', 'round_id': active_round.round_id}
+            
+            return {'status': 'ready'}
+        except Exception as e:
+            return {'status': 'error', 'message': f'Error getting game status: {str(e)}'}
@@ -0,0 +1,233 @@
+"""
+Multi-Line Slot Engine
+
+Reel-strip slot machine for the SLOT catalogue entry
+(payout_rule_json {"reels": 5, "paylines": 20}). Each reel is a strip of
+symbols; a spin picks one stop per reel and shows `rows` consecutive
+symbols of each strip. Every payline is a row index per reel, and a line
+pays when its leftmost symbols match: the paytable gives the pay (in line
+bets) for each symbol and run length.
+
+A spin's total pay is the sum over every payline, divided by the number of
+lines, so payout multipliers are per unit of the whole stake.
+
+Everything is compiled to arrays once per rule set (compile_slot_engine):
+strips are symbol indices, paylines an index array and the paytable a
+(symbols, reels + 1) lookup. Evaluating a batch of spins is then a handful
+of NumPy gathers and compares over (spins, lines, reels) with no Python
+loop per spin or per line.
+
+Optional payout_rule_json keys:
+- rows: symbols shown per reel (default 3)
+- strips: one list of symbol keys per reel (default: every reel laid out
+  from the symbols' weights)
+- paytable: symbol -> pays for 3, 4, ... `reels` of a kind
+
+Usage:
+    from games.slot_engine import compile_slot_engine
+
+    engine = compile_slot_engine(game.payout_rule_json, SYMBOLS)
+    spins = engine.spin(50)          # stops, window, line_pays, multipliers
+    engine.window_symbols(spins['window'][0])
+"""
+
+import json
+import threading
+
+import numpy as np
+
+# Standard 5x3 payline set: the row each line crosses on every reel
+PAYLINES = (
+    (1, 1, 1, 1, 1), (0, 0, 0, 0, 0), (2, 2, 2, 2, 2), (0, 1, 2, 1, 0),
+    (2, 1, 0, 1, 2), (0, 0, 1, 0, 0), (2, 2, 1, 2, 2), (1, 2, 2, 2, 1),
+    (1, 0, 0, 0, 1), (1, 0, 1, 0, 1), (1, 2, 1, 2, 1), (0, 1, 0, 1, 0),
+    (2, 1, 2, 1, 2), (1, 1, 0, 1, 1), (1, 1, 2, 1, 1), (0, 1, 1, 1, 0),
+    (2, 1, 1, 1, 2), (0, 2, 0, 2, 0), (2, 0, 2, 0, 2), (0, 2, 2, 2, 0),
+)
+REELS = 5
+ROWS = 3
+
+# Fewest matching symbols from the left that pay
+MIN_RUN = 3
+
+# Line pays, in line bets, for 3, 4 and 5 of a kind
+LINE_PAYS = {
+    'seven': (100, 400, 2000),
+    'cherry': (10, 45, 150),
+    'lemon': (10, 45, 150),
+    'orange': (10, 45, 150),
+    'grape': (20, 80, 400),
+    'diamond': (100, 400, 2000),
+    'slot_machine': (150, 750, 5000),
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class SlotConfigError(ValueError):
+    """A slot rule set the engine can't build"""
+
+
+def weighted_strip(symbols):
+    """
+    Lay out one reel from symbol weights, spreading each symbol's copies
+    evenly around the strip
+
+    Args:
+        symbols (dict): symbol key -> {'weight': ...}
+
+    Returns:
+        list: Symbol keys in strip order
+    """
+    return [symbol for _, _, symbol in sorted(
+        ((copy + 0.5) / data['weight'], index, symbol)
+        for index, (symbol, data) in enumerate(symbols.items())
+        for copy in range(data['weight'])
+    )]
+
+
+class SlotEngine:
+    """Compiled reel strips, paylines and paytable for one slot rule set"""
+
+    def __init__(self, symbols, strips, paylines, paytable, rows=ROWS):
+        """
+        Args:
+            symbols (list): Symbol keys; array values index into this
+            strips (list): One list of symbol keys per reel
+            paylines (list): One row index per reel for each line
+            paytable (dict): symbol -> pays for MIN_RUN up to every reel of a kind
+            rows (int): Symbols shown per reel
+        """
+        self.symbols = list(symbols)
+        self.reels = len(strips)
+        self.rows = rows
+        self.paylines = len(paylines)
+
+        index = {symbol: position for position, symbol in enumerate(self.symbols)}
+        self.strip_lengths = np.array([len(strip) for strip in strips])
+        self.strips = np.zeros((self.reels, self.strip_lengths.max()), dtype=np.int16)
+        for reel, strip in enumerate(strips):
+            self.strips[reel, :len(strip)] = [index[symbol] for symbol in strip]
+
+        self.lines = np.array(paylines, dtype=np.intp)
+
+        # pays[symbol, run]: line pay for a leftmost run of `run` symbols
+        self.pays = np.zeros((len(self.symbols), self.reels + 1))
+        for symbol, pays in paytable.items():
+            self.pays[index[symbol], MIN_RUN:MIN_RUN + len(pays)] = pays
+
+        # Row offsets from each stop, and reel numbers, for fancy indexing
+        self._row_offsets = np.arange(rows)[:, None]
+        self._reel_index = np.arange(self.reels)
+
+    def windows(self, stops):
+        """
+        Symbols on screen for each set of stops
+
+        Args:
+            stops (ndarray): (spins, reels) stop positions
+
+        Returns:
+            ndarray: (spins, rows, reels) symbol indices
+        """
+        positions = (stops[:, None, :] + self._row_offsets) % self.strip_lengths
+        return self.strips[self._reel_index, positions]
+
+    def evaluate(self, windows):
+        """
+        Pay every line of every window
+
+        Args:
+            windows (ndarray): (spins, rows, reels) symbol indices
+
+        Returns:
+            tuple: (line_pays (spins, paylines) in line bets, runs (spins,
+            paylines) leftmost run lengths, multipliers (spins,) per unit staked)
+        """
+        line_symbols = windows[:, self.lines, self._reel_index]
+        first = line_symbols[..., 0]
+        runs = np.cumprod(line_symbols == first[..., None], axis=-1).sum(axis=-1)
+        line_pays = self.pays[first, runs]
+        return line_pays, runs, line_pays.sum(axis=-1) / self.paylines
+
+    def spin(self, count=1, rng=None):
+        """
+        Spin the reels `count` times
+
+        Args:
+            count (int): Number of spins
+            rng (numpy.random.Generator, optional): Random source
+
+        Returns:
+            dict: stops (count, reels), window (count, rows, reels),
+            line_pays and runs (count, paylines), multipliers (count,)
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        stops = rng.integers(0, self.strip_lengths, size=(count, self.reels))
+        window = self.windows(stops)
+        line_pays, runs, multipliers = self.evaluate(window)
+        return {
+            'stops': stops,
+            'window': window,
+            'line_pays': line_pays,
+            'runs': runs,
+            'multipliers': multipliers
+        }
+
+    def window_symbols(self, window):
+        """One spin's window as symbol keys, reel by reel (top row first)"""
+        return [[self.symbols[symbol] for symbol in reel] for reel in window.T.tolist()]
+
+    def line_wins(self, window, line_pays, runs):
+        """One spin's winning lines: line number, symbol, run length and pay in line bets"""
+        return [
+            {
+                'line': int(line) + 1,
+                'symbol': self.symbols[int(window[self.lines[line, 0], 0])],
+                'count': int(runs[line]),
+                'pay': float(line_pays[line])
+            }
+            for line in np.flatnonzero(line_pays)
+        ]
+
+
+def compile_slot_engine(payout_rules, symbols):
+    """
+    Build (or reuse) the engine for a payout_rule_json rule set
+
+    Args:
+        payout_rules (dict): The game's payout_rule_json; needs 'paylines'
+        symbols (dict): symbol key -> {'weight': ...}, for the default strips
+
+    Returns:
+        SlotEngine: Shared by every caller with the same rules
+
+    Raises:
+        SlotConfigError: If the rules ask for something the engine can't do
+    """
+    key = json.dumps(payout_rules, sort_keys=True)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    reels = payout_rules.get('reels', REELS)
+    rows = payout_rules.get('rows', ROWS)
+    paylines = payout_rules['paylines']
+    if not MIN_RUN <= reels <= REELS:
+        raise SlotConfigError(f'Slot engine supports {MIN_RUN} to {REELS} reels, not {reels}')
+    if rows != ROWS:
+        raise SlotConfigError(f'Slot paylines are laid out for {ROWS} rows, not {rows}')
+    if not 1 <= paylines <= len(PAYLINES):
+        raise SlotConfigError(f'Slot engine supports 1 to {len(PAYLINES)} paylines, not {paylines}')
+
+    strips = payout_rules.get('strips') or [weighted_strip(symbols)] * reels
+    paytable = payout_rules.get('paytable') or {symbol: pays[:reels - MIN_RUN + 1]
+                                                for symbol, pays in LINE_PAYS.items()}
+    unknown = ({symbol for strip in strips for symbol in strip} | set(paytable)) - set(symbols)
+    if len(strips) != reels or unknown:
+        raise SlotConfigError(f'Slot strips must list {reels} reels of known symbols')
+
+    engine = SlotEngine(symbols, strips, [line[:reels] for line in PAYLINES[:paylines]], paytable, rows)
+    with _engines_lock:
+        return _engines.setdefault(key, engine)
@@ -0,0 +1,236 @@
+"""
+Slot RTP Calculator
+
+Exact return-to-player, hit frequency and variance of a slot
+configuration, worked out from its reels and paytable rather than from the
+bet history:
+
+- classic 3-reel machine: every symbol triple, weighted by the symbols'
+  weights and scored by the machine's own payout function
+- multi-line engine: every combination of reel stops, evaluated by the
+  engine in chunks. Configurations with more than EXACT_COMBINATION_LIMIT
+  combinations are sampled instead (SAMPLE_SPINS spins in vectorized
+  batches from a fixed seed) and report a standard error.
+
+Both also give the chance a spin hits the progressive jackpot (the
+jackpot symbol on every reel, of a payline for the engine), which
+check_slot_rtp uses to count the house money the pot is reseeded with.
+
+Results are cached by a hash of the configuration (reels, paylines and
+paytable): in process, and as a small JSON file in the temp directory that
+every worker on the host reuses, so only the first worker to start after a
+paytable edit enumerates it (about a second for 5 reels of 14 stops). The
+app refuses to start with a configuration that pays back more than 100% -
+the game's house edge.
+
+Usage:
+    from games.slot_rtp import classic_stats, engine_stats, check_slot_rtp
+
+    stats = engine_stats(engine, 'slot_machine')    # rtp, hit_rate, jackpot_hit_rate, ...
+    check_slot_rtp(stats, float(game.house_edge))   # raises SlotPaytableError
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# Largest stop-combination count enumerated exactly
+EXACT_COMBINATION_LIMIT = 4_000_000
+# Spins sampled for larger configurations, and per vectorized batch
+SAMPLE_SPINS = 2_000_000
+CHUNK_SPINS = 65_536
+SAMPLE_SEED = 96
+
+# Bump when the way stats are computed changes, so stale files are ignored
+RTP_CACHE_VERSION = 2
+
+RTP_CACHE_DIR = tempfile.gettempdir()
+
+_stats_cache = {}
+_stats_cache_lock = threading.Lock()
+
+
+class SlotPaytableError(ValueError):
+    """A slot configuration pays back more than the game's house edge allows"""
+
+
+def paytable_hash(config):
+    """Stable hash of a JSON-serialisable slot configuration"""
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(RTP_CACHE_DIR, f'sarcastic-casino-slot-rtp-{key}-v{RTP_CACHE_VERSION}.json')
+
+
+def _cached(key, compute):
+    """Stats for a configuration hash: from memory, then the shared file, then compute()"""
+    with _stats_cache_lock:
+        if key in _stats_cache:
+            return _stats_cache[key]
+
+    path = _cache_path(key)
+    try:
+        with open(path) as handle:
+            stats = json.load(handle)
+    except (OSError, ValueError):
+        stats = compute()
+        # Write so other workers never read a half-written file
+        partial = f'{path}.{os.getpid()}.tmp'
+        with open(partial, 'w') as handle:
+            json.dump(stats, handle)
+        os.replace(partial, path)
+
+    with _stats_cache_lock:
+        return _stats_cache.setdefault(key, stats)
+
+
+def _summary(total, total_squares, hits, jackpots, spins, exact, combinations):
+    rtp = float(total / spins)
+    variance = max(float(total_squares / spins) - rtp * rtp, 0.0)
+    return {
+        'rtp': rtp,
+        'variance': variance,
+        'std_dev': math.sqrt(variance),
+        'hit_rate': float(hits / spins),
+        'jackpot_hit_rate': float(jackpots / spins),
+        'exact': exact,
+        'combinations': combinations,
+        'standard_error': 0.0 if exact else math.sqrt(variance / spins)
+    }
+
+
+def classic_stats(symbols, payout, jackpot_symbol=None):
+    """
+    Exact returns of the classic 3-reel machine
+
+    Args:
+        symbols (dict): symbol key -> {'weight', 'payout', ...}
+        payout (callable): Payout multiplier for a list of three symbol keys
+        jackpot_symbol (str, optional): Symbol that wins the jackpot on every reel
+
+    Returns:
+        dict: rtp, variance, std_dev, hit_rate per unit staked,
+        jackpot_hit_rate per spin, exact (True), combinations and
+        standard_error (0)
+    """
+    config = {'classic': {symbol: [data['weight'], data['payout']] for symbol, data in symbols.items()},
+              'jackpot': jackpot_symbol}
+
+    def compute():
+        total_weight = sum(data['weight'] for data in symbols.values())
+        total = total_squares = hits = jackpots = 0.0
+        for reels in itertools.product(symbols, repeat=3):
+            chance = math.prod(symbols[symbol]['weight'] for symbol in reels) / total_weight ** 3
+            multiplier = payout(list(reels))
+            total += chance * multiplier
+            total_squares += chance * multiplier * multiplier
+            hits += chance if multiplier > 0 else 0.0
+            jackpots += chance if all(symbol == jackpot_symbol for symbol in reels) else 0.0
+        return _summary(total, total_squares, hits, jackpots, 1.0, True, len(symbols) ** 3)
+
+    return _cached(paytable_hash(config), compute)
+
+
+def engine_stats(engine, jackpot_symbol=None, samples=SAMPLE_SPINS):
+    """
+    Returns of a multi-line engine, exact when its stop combinations can be
+    enumerated and sampled otherwise
+
+    Args:
+        engine (SlotEngine): The compiled engine
+        jackpot_symbol (str, optional): Symbol that wins the jackpot on every reel of a payline
+        samples (int): Spins to sample for configurations too large to enumerate
+
+    Returns:
+        dict: rtp, variance, std_dev, hit_rate per unit staked,
+        jackpot_hit_rate per spin, exact, combinations and standard_error
+    """
+    lengths = tuple(engine.strip_lengths.tolist())
+    combinations = math.prod(lengths)
+    exact = combinations <= EXACT_COMBINATION_LIMIT
+    config = {
+        'strips': [strip[:length] for strip, length in zip(engine.strips.tolist(), lengths)],
+        'lines': engine.lines.tolist(),
+        'pays': engine.pays.tolist(),
+        'rows': engine.rows,
+        'samples': None if exact else samples,
+        'jackpot': jackpot_symbol
+    }
+    jackpot_index = engine.symbols.index(jackpot_symbol) if jackpot_symbol in engine.symbols else -1
+
+    def jackpot_spins(windows, runs):
+        # Spins with a payline of the jackpot symbol across every reel
+        first = windows[:, engine.lines[:, 0], 0]
+        return np.count_nonzero(((runs == engine.reels) & (first == jackpot_index)).any(axis=1))
+
+    def compute():
+        total = total_squares = hits = jackpots = 0.0
+        if exact:
+            for start in range(0, combinations, CHUNK_SPINS):
+                stops = np.stack(np.unravel_index(np.arange(start, min(start + CHUNK_SPINS, combinations)),
+                                                  lengths), axis=1)
+                windows = engine.windows(stops)
+                _, runs, multipliers = engine.evaluate(windows)
+                total += multipliers.sum()
+                total_squares += (multipliers * multipliers).sum()
+                hits += np.count_nonzero(multipliers)
+                jackpots += jackpot_spins(windows, runs)
+            return _summary(total, total_squares, hits, jackpots, combinations, True, combinations)
+
+        rng = np.random.default_rng(SAMPLE_SEED)
+        for start in range(0, samples, CHUNK_SPINS):
+            spins = engine.spin(min(CHUNK_SPINS, samples - start), rng)
+            multipliers = spins['multipliers']
+            total += multipliers.sum()
+            total_squares += (multipliers * multipliers).sum()
+            hits += np.count_nonzero(multipliers)
+            jackpots += jackpot_spins(spins['window'], spins['runs'])
+        return _summary(total, total_squares, hits, jackpots, samples, False, combinations)
+
+    return _cached(paytable_hash(config), compute)
+
+
+def jackpot_rtp(stats, rate, seed, qualifying_bet):
+    """
+    Most the progressive jackpot can pay back per unit staked
+
+    Every stake feeds `rate` of itself to the pot, and every full win
+    reseeds it with `seed` of house money. Only a stake of at least
+    qualifying_bet wins the full pot (smaller stakes win their share of
+    it), so the reseeding costs at most seed x jackpot hit rate /
+    qualifying_bet per unit staked.
+
+    Args:
+        stats (dict): From classic_stats or engine_stats
+        rate (float): Share of each stake paid into the pot
+        seed (float): What the pot restarts at after a full win
+        qualifying_bet (float): Stake that wins the whole pot
+    """
+    return rate + seed * stats['jackpot_hit_rate'] / qualifying_bet
+
+
+def check_slot_rtp(stats, house_edge, jackpot=0.0, label='Slot paytable'):
+    """
+    Refuse a configuration whose RTP, plus what the progressive jackpot
+    pays back, is above 100% - house_edge
+
+    Args:
+        stats (dict): From classic_stats or engine_stats
+        house_edge (float): The game's house edge, e.g. 0.04
+        jackpot (float): The jackpot's return per unit staked (jackpot_rtp)
+        label (str): What to call the configuration in the error
+
+    Raises:
+        SlotPaytableError: If the configuration pays back too much
+    """
+    max_rtp = 1 - house_edge
+    if stats['rtp'] + jackpot > max_rtp:
+        raise SlotPaytableError(f"{label} pays back {stats['rtp'] + jackpot:.2%} "
+                                f"(jackpot included), more than {max_rtp:.2%}")
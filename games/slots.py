@@ -1,29 +1,87 @@
 import random
 from datetime import datetime
 from decimal import Decimal
+from flask import current_app
+from sqlalchemy import update
 from models import db, Game, Round, Bet, Outcome, Wallet, Transaction, User
+from .instant_settlement import settle_instant_bets
+from .jackpot import jackpot_ready, contribute, jackpot_total, award_jackpot
+from .slot_engine import compile_slot_engine
+from .slot_rtp import classic_stats, engine_stats, check_slot_rtp, jackpot_rtp
+
+SYMBOLS = {
+    'seven': {'weight': 1, 'payout': 10, 'image': 'seven.png', 'name': 'Lucky Seven'},
+    'cherry': {'weight': 3, 'payout': 2, 'image': 'cherry.png', 'name': 'Cherry'}, 
+    'lemon': {'weight': 3, 'payout': 2, 'image': 'lemon.png', 'name': 'Lemon'},
+    'orange': {'weight': 3, 'payout': 2, 'image': 'orange.png', 'name': 'Orange'},
+    'grape': {'weight': 2, 'payout': 6, 'image': 'grape.png', 'name': 'Grape'},
+    'diamond': {'weight': 1, 'payout': 15, 'image': 'diamond.png', 'name': 'Diamond'},
+    'slot_machine': {'weight': 1, 'payout': 25, 'image': 'seven.png', 'name': 'Jackpot Seven'}  # Using seven as fallback since no slot machine image
+}
+
+# Most spins one autospin request can resolve
+MAX_SPINS_PER_REQUEST = 100
+
+# The progressive jackpot goes to a line of this symbol on every reel
+JACKPOT_SYMBOL = 'slot_machine'
+DEFAULT_JACKPOT_SHARDS = 16
+DEFAULT_JACKPOT_RATE = 0.01    # slice of every stake fed to the pot
+DEFAULT_JACKPOT_SEED = 1000    # what the pot restarts at after a win
+
+
+def build_alias_table(weights):
+    """
+    Walker/Vose alias table for integer weights
+    
+    Column i keeps its own outcome for draws below cuts[i] (out of
+    sum(weights)) and gives the rest to alias[i]; every column carries the
+    same total, so one uniform draw over len(weights) * sum(weights) picks
+    an outcome with exactly its weight's odds.
+    
+    Returns:
+        tuple: (cuts, alias) lists, one entry per weight
+    """
+    total = sum(weights)
+    scaled = [weight * len(weights) for weight in weights]
+    cuts = [total] * len(weights)
+    alias = list(range(len(weights)))
+    small = [index for index, weight in enumerate(scaled) if weight < total]
+    large = [index for index, weight in enumerate(scaled) if weight >= total]
+    while small and large:
+        short, tall = small.pop(), large.pop()
+        cuts[short] = scaled[short]
+        alias[short] = tall
+        scaled[tall] -= total - scaled[short]
+        (small if scaled[tall] < total else large).append(tall)
+    return cuts, alias
+
+
+# The reel strip, compiled once: symbol order, alias table and draw range
+REEL_SYMBOLS = tuple(SYMBOLS)
+REEL_TOTAL = sum(data['weight'] for data in SYMBOLS.values())
+REEL_CUTS, REEL_ALIAS = build_alias_table([SYMBOLS[symbol]['weight'] for symbol in REEL_SYMBOLS])
+
+
+def sample_symbol():
+    """One reel stop, weighted by the symbols' weights, from a single draw"""
+    column, draw = divmod(random.randrange(len(REEL_SYMBOLS) * REEL_TOTAL), REEL_TOTAL)
+    return REEL_SYMBOLS[column if draw < REEL_CUTS[column] else REEL_ALIAS[column]]
+
 
 class Slots:
     """
     Slot Machine Game Implementation
     
     Features:
-    - 3 reels with standard symbols
-    - Single payline
-    - Standard RTP (96%)
+    - 3 reels with standard symbols and a single payline, or the
+      multi-line engine when payout_rule_json has paylines
+    - RTP worked out exactly from the paytable (get_statistics) and kept
+      within the game's house edge
     - Multiple symbol combinations with different payouts
     """
     
     def __init__(self):
-        self.symbols = {
-            'seven': {'weight': 1, 'payout': 10, 'image': 'seven.png', 'name': 'Lucky Seven'},
-            'cherry': {'weight': 3, 'payout': 5, 'image': 'cherry.png', 'name': 'Cherry'}, 
-            'lemon': {'weight': 3, 'payout': 5, 'image': 'lemon.png', 'name': 'Lemon'},
-            'orange': {'weight': 3, 'payout': 5, 'image': 'orange.png', 'name': 'Orange'},
-            'grape': {'weight': 2, 'payout': 7, 'image': 'grape.png', 'name': 'Grape'},
-            'diamond': {'weight': 1, 'payout': 15, 'image': 'diamond.png', 'name': 'Diamond'},
-            'slot_machine': {'weight': 1, 'payout': 20, 'image': 'seven.png', 'name': 'Jackpot Seven'}  # Using seven as fallback since no slot machine image
-        }
+        self.symbols = SYMBOLS
         
     def get_game(self):
         """Get the slot machine game from database"""
@@ -32,6 +90,95 @@ class Slots:
         except Exception as e:
             return None
     
+    def get_engine(self, game):
+        """
+        The multi-line engine for the game's payout_rule_json, or None for the
+        classic 3-reel single-line machine (rules without paylines)
+        """
+        rules = game.payout_rule_json or {}
+        if 'paylines' not in rules:
+            return None
+        return compile_slot_engine(rules, self.symbols)
+    
+    def jackpot_config(self):
+        """(shards, contribution rate, seed) of the progressive jackpot"""
+        config = current_app.config
+        return (config.get('SLOT_JACKPOT_SHARDS', DEFAULT_JACKPOT_SHARDS),
+                config.get('SLOT_JACKPOT_RATE', DEFAULT_JACKPOT_RATE),
+                config.get('SLOT_JACKPOT_SEED', DEFAULT_JACKPOT_SEED))
+    
+    def open_jackpot(self, game=None):
+        """
+        Open the jackpot's shard rows if they don't exist yet
+        
+        Returns:
+            bool: False if the jackpot can't be played (no game, or no
+            jackpot_shards table yet)
+        """
+        game = game or self.get_game()
+        if not game:
+            return False
+        shards, _, seed = self.jackpot_config()
+        return jackpot_ready(game.game_id, shards, seed)
+    
+    def qualifying_bet(self, game):
+        """Stake that wins the whole jackpot; smaller stakes win their share of it"""
+        return game.max_bet
+    
+    def jackpot_return(self, stats, game):
+        """Most the jackpot pays back per unit staked (see slot_rtp.jackpot_rtp)"""
+        _, rate, seed = self.jackpot_config()
+        return jackpot_rtp(stats, rate, seed, float(self.qualifying_bet(game)))
+    
+    def get_jackpot(self):
+        """The current pot (cached for a couple of seconds)"""
+        game = self.get_game()
+        if not game or not self.open_jackpot(game):
+            return Decimal('0')
+        return jackpot_total(game.game_id)
+    
+    def get_statistics(self, game=None):
+        """
+        Exact (or, for very large reel sets, sampled) returns of the
+        configuration the game plays
+        
+        Returns:
+            dict: rtp, variance, std_dev and hit_rate per unit staked, exact,
+            combinations and standard_error (see games/slot_rtp.py)
+        """
+        game = game or self.get_game()
+        engine = self.get_engine(game) if game else None
+        if engine:
+            return engine_stats(engine, JACKPOT_SYMBOL)
+        return classic_stats(self.symbols, self._calculate_payout, JACKPOT_SYMBOL)
+    
+    def get_rtp_report(self):
+        """
+        Returns of the classic machine and, if the game uses it, the
+        multi-line engine, for admins
+        
+        Returns:
+            list: One dict per configuration, with jackpot_rtp (what the
+            progressive jackpot adds) and within_edge False for one that
+            pays back more than 100% - house_edge, jackpot included
+        """
+        game = self.get_game()
+        max_rtp = 1 - float(game.house_edge) if game else None
+        engine = self.get_engine(game) if game else None
+        
+        configurations = [('3 reels, 1 line', classic_stats(self.symbols, self._calculate_payout, JACKPOT_SYMBOL),
+                           not engine)]
+        if engine:
+            configurations.append((f'{engine.reels} reels, {engine.paylines} lines',
+                                   engine_stats(engine, JACKPOT_SYMBOL), True))
+        
+        report = []
+        for name, stats, in_play in configurations:
+            jackpot = self.jackpot_return(stats, game) if game else 0.0
+            report.append(dict(stats, configuration=name, in_play=in_play, max_rtp=max_rtp, jackpot_rtp=jackpot,
+                               within_edge=max_rtp is None or stats['rtp'] + jackpot <= max_rtp))
+        return report
+    
     def get_active_round(self):
         """Get the current active round"""
         try:
@@ -51,6 +198,8 @@ class Slots:
                 return {'valid': False, 'message': 'Slot machine game not found'}
             if not game.is_active:
                 return {'valid': False, 'message': 'Slot machine game is not active'}
+            stats = self.get_statistics(game)
+            check_slot_rtp(stats, float(game.house_edge), self.jackpot_return(stats, game))
             return {'valid': True}
         except Exception as e:
             return {'valid': False, 'message': f'Error validating game setup: {str(e)}'}
@@ -83,13 +232,85 @@ class Slots:
     
     def _spin_reels(self):
         """Generate a random spin result"""
-        # Create weighted list of symbols
-        symbols_list = []
-        for symbol, data in self.symbols.items():
-            symbols_list.extend([symbol] * data['weight'])
+        return [sample_symbol() for _ in range(3)]
+    
+    def _spin_classic(self, spins):
+        """(choice_data, outcome_data, payout multiplier) for each spin of the 3-reel machine"""
+        results = []
+        for _ in range(spins):
+            reels = self._spin_reels()
+            results.append(({'reels': reels}, {'reels': reels}, self._calculate_payout(reels)))
+        return results
+    
+    def _spin_lines(self, engine, spins):
+        """(choice_data, outcome_data, payout multiplier) for each spin of the multi-line engine"""
+        spun = engine.spin(spins)
+        results = []
+        for window, line_pays, runs, multiplier in zip(spun['window'], spun['line_pays'],
+                                                       spun['runs'], spun['multipliers']):
+            results.append((
+                {'paylines': engine.paylines},
+                {'window': engine.window_symbols(window), 'line_wins': engine.line_wins(window, line_pays, runs)},
+                float(multiplier)
+            ))
+        return results
+    
+    def _hits_jackpot(self, outcome_data, engine):
+        """Whether a spin landed JACKPOT_SYMBOL on every reel (of a payline, for the engine)"""
+        if engine:
+            return any(win['symbol'] == JACKPOT_SYMBOL and win['count'] == engine.reels
+                       for win in outcome_data['line_wins'])
+        return all(symbol == JACKPOT_SYMBOL for symbol in outcome_data['reels'])
+    
+    def _settle_jackpot(self, game, wallet_id, settlement, spin_results, engine):
+        """
+        Pay the progressive jackpot for every spin in a settled batch that hit
+        it, then feed the batch's slice of the stakes into the pot
+        
+        A stake of qualifying_bet or more wins the whole pot; a smaller one
+        wins stake / qualifying_bet of it, so a hit is never worth more per
+        unit staked than it is at the qualifying bet.
+        
+        Runs after the batch's wallet update, so the wallet is always locked
+        before the jackpot shards. Doesn't commit.
+        
+        Returns:
+            Decimal: Total jackpot won (also added to the bets, the wallet
+            and the settlement's win amounts)
+        """
+        shards, rate, seed = self.jackpot_config()
+        share = min(settlement['total_bet'] / len(spin_results) / self.qualifying_bet(game), Decimal('1'))
+        won = Decimal('0')
+        for index, (bet_id, (_, outcome_data, _)) in enumerate(zip(settlement['bet_ids'], spin_results)):
+            if not self._hits_jackpot(outcome_data, engine):
+                continue
+            amount = award_jackpot(game.game_id, seed, share)
+            won += amount
+            outcome_data['jackpot'] = float(amount)
+            settlement['win_amounts'][index] += amount
+            db.session.execute(
+                update(Bet)
+                .where(Bet.bet_id == bet_id)
+                .values(payout_amount=Bet.payout_amount + amount)
+            )
+            db.session.execute(
+                update(Outcome)
+                .where(Outcome.outcome_id == db.select(Bet.outcome_id).where(Bet.bet_id == bet_id).scalar_subquery())
+                .values(outcome_data=outcome_data)
+            )
+        
+        contribute(game.game_id, settlement['total_bet'] * Decimal(str(rate)), shards)
         
-        # Spin three reels
-        return [random.choice(symbols_list) for _ in range(3)]
+        if won:
+            settlement['total_win'] += won
+            settlement['wallet_balance'] = db.session.execute(
+                update(Wallet)
+                .where(Wallet.wallet_id == wallet_id)
+                .values(balance=Wallet.balance + won)
+                .returning(Wallet.balance)
+            ).scalar()
+            db.session.add(Transaction(wallet_id=wallet_id, amount=won, txn_type='win'))
+        return won
     
     def _calculate_payout(self, reels):
         """Calculate payout multiplier based on spin results"""
@@ -114,11 +335,21 @@ class Slots:
         """Get all symbols data for frontend display"""
         return self.symbols
     
-    def place_bet(self, user_id, bet_amount, wallet_id=None):
-        """Place a bet and spin the reels"""
+    def place_bet(self, user_id, bet_amount, wallet_id=None, spins=1):
+        """
+        Place a bet and spin the reels
+        
+        With spins > 1 (autospin), resolves that many spins at bet_amount
+        each and settles them together: one wallet update and one insert of
+        all the bets and outcomes, instead of a request and a commit per spin.
+        """
         try:
             if bet_amount <= 0:
                 return {'success': False, 'message': 'Bet amount must be positive'}
+            if not 1 <= spins <= MAX_SPINS_PER_REQUEST:
+                return {'success': False, 'message': f'You can autospin between 1 and {MAX_SPINS_PER_REQUEST} spins at a time'}
+            
+            bet_amount = Decimal(str(bet_amount))
             
             # Get game and check limits
             game = self.get_game()
@@ -127,6 +358,15 @@ class Slots:
             
             # No betting limits - user can bet any amount they can afford
             
+            # Never play a paytable that pays back more than the house edge allows
+            stats = self.get_statistics(game)
+            if stats['rtp'] + self.jackpot_return(stats, game) > 1 - float(game.house_edge):
+                return {'success': False, 'message': 'This machine is closed for maintenance'}
+            
+            # Without a jackpot table (migration not run yet) the machine plays without a jackpot;
+            # opening the pot commits, so it happens before any wallet writes
+            jackpot_on = self.open_jackpot(game)
+            
             # Get or create active round
             active_round = self.get_active_round()
             if not active_round:
@@ -148,65 +388,70 @@ class Slots:
             else:
                 wallet = user.get_primary_wallet()
             
-            if wallet.balance < bet_amount:
+            if wallet.balance < bet_amount * spins:
                 return {'success': False, 'message': 'Insufficient funds'}
             
             # Spin the reels
-            reels = self._spin_reels()
-            payout_multiplier = self._calculate_payout(reels)
-            
-            # Create bet
-            bet = Bet(
-                round_id=active_round.round_id,
-                user_id=user_id,
-                amount=bet_amount,
-                choice_data={'reels': reels},
-                settled_at=datetime.now()
-            )
-            db.session.add(bet)
+            engine = self.get_engine(game)
+            spin_results = self._spin_lines(engine, spins) if engine else self._spin_classic(spins)
             
-            # Create outcome
-            outcome = Outcome(
-                round_id=active_round.round_id,
-                outcome_data={'reels': reels},
-                payout_multiplier=Decimal(str(payout_multiplier))
+            settlement = settle_instant_bets(
+                active_round.round_id, user_id, wallet.wallet_id, bet_amount,
+                [(choice_data, outcome_data, payout_multiplier)
+                 for choice_data, outcome_data, payout_multiplier in spin_results]
             )
-            db.session.add(outcome)
+            if not settlement['success']:
+                db.session.rollback()
+                return settlement
             
-            # Update wallet balance
-            wallet.balance -= bet_amount
-            
-            # Create bet transaction (money going out of wallet)
-            bet_transaction = Transaction(
-                wallet_id=wallet.wallet_id,
-                amount=bet_amount,
-                txn_type='bet'
-            )
-            db.session.add(bet_transaction)
-            
-            # Handle winnings if any
-            if payout_multiplier > 0:
-                win_amount = bet_amount * Decimal(str(payout_multiplier))
-                wallet.balance += win_amount
-                
-                # Create win transaction (money coming into wallet)
-                win_transaction = Transaction(
-                    wallet_id=wallet.wallet_id,
-                    amount=win_amount,
-                    txn_type='win'
-                )
-                db.session.add(win_transaction)
+            jackpot_won = Decimal('0')
+            if jackpot_on:
+                jackpot_won = self._settle_jackpot(game, wallet.wallet_id, settlement, spin_results, engine)
             
             db.session.commit()
             
-            return {
+            if spins == 1:
+                _, outcome_data, payout_multiplier = spin_results[0]
+                if engine:
+                    response = {
+                        'window': outcome_data['window'],
+                        'line_wins': outcome_data['line_wins'],
+                        'paylines': engine.paylines
+                    }
+                else:
+                    reels = outcome_data['reels']
+                    response = {
+                        'reels': reels,
+                        'reel_images': [self.symbols[symbol]['image'] for symbol in reels],
+                        'reel_names': [self.symbols[symbol]['name'] for symbol in reels]
+                    }
+                response.update({
+                    'payout_multiplier': payout_multiplier,
+                    'win_amount': float(settlement['total_win'])
+                })
+            else:
+                # Symbol keys only; the page already has every symbol's image and name
+                shown = 'window' if engine else 'reels'
+                response = {
+                    'spins': [
+                        {shown: outcome_data[shown], 'payout_multiplier': payout_multiplier,
+                         'win_amount': float(win_amount)}
+                        for (_, outcome_data, payout_multiplier), win_amount
+                        in zip(spin_results, settlement['win_amounts'])
+                    ],
+                    'total_bet': float(settlement['total_bet']),
+                    'win_amount': float(settlement['total_win'])
+                }
+            response.update({
                 'success': True,
-                'reels': reels,
-                'reel_images': [self.symbols[symbol]['image'] for symbol in reels],
-                'reel_names': [self.symbols[symbol]['name'] for symbol in reels],
-                'payout_multiplier': payout_multiplier,
-                'win_amount': float(bet_amount * Decimal(str(payout_multiplier))) if payout_multiplier > 0 else 0
-            }
+                'wallet_balance': float(settlement['wallet_balance']),
+                'wallet_currency': wallet.currency
+            })
+            if jackpot_on:
+                response['jackpot'] = float(jackpot_total(game.game_id))
+            if jackpot_won:
+                response['jackpot_win'] = float(jackpot_won)
+            return response
             
         except Exception as e:
             db.session.rollback()
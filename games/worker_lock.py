@@ -0,0 +1,130 @@
+"""
+Cross-worker Locks
+
+Gunicorn runs several worker processes, so anything that must happen
+exactly once (starting a race, running it) needs a lock that every worker
+can see. On PostgreSQL this is a session-level advisory lock; on SQLite,
+where every worker runs on the same machine, it is an exclusive flock on a
+lock file.
+
+Locks are always non-blocking: a worker that can't get the lock simply
+skips the work because another worker is already doing it.
+
+Usage:
+    from games.worker_lock import WorkerLock
+
+    with WorkerLock('horse-race') as acquired:
+        if acquired:
+            ...  # only one worker at a time gets here
+"""
+
+import os
+import tempfile
+import threading
+import zlib
+
+from sqlalchemy import text
+
+from models import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process lock
+    fcntl = None
+
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+class WorkerLock:
+    """Non-blocking named lock shared by all workers using the same database"""
+
+    def __init__(self, name):
+        self.name = name
+        # Advisory locks take a 64-bit key; derive a stable one from the name
+        self.key = zlib.crc32(name.encode('utf-8'))
+        self._connection = None
+        self._file = None
+        self._thread_lock = None
+        self.acquired = False
+
+    def acquire(self):
+        """
+        Try to take the lock without waiting
+
+        Returns:
+            bool: True if this caller now holds the lock
+        """
+        if self.acquired:
+            return True
+
+        if db.engine.dialect.name == 'postgresql':
+            self.acquired = self._acquire_advisory()
+        elif fcntl is not None:
+            self.acquired = self._acquire_file()
+        else:
+            self.acquired = self._acquire_thread()
+        return self.acquired
+
+    def release(self):
+        """Release the lock if it is held"""
+        if not self.acquired:
+            return
+
+        try:
+            if self._connection is not None:
+                self._connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.key})
+                self._connection.close()
+            elif self._file is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._file.close()
+            elif self._thread_lock is not None:
+                self._thread_lock.release()
+        finally:
+            self._connection = None
+            self._file = None
+            self._thread_lock = None
+            self.acquired = False
+
+    def _acquire_advisory(self):
+        """Take a PostgreSQL session-level advisory lock on a dedicated connection"""
+        connection = db.engine.connect()
+        try:
+            locked = connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': self.key}).scalar()
+        except Exception:
+            connection.close()
+            raise
+
+        if not locked:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def _acquire_file(self):
+        """Take an exclusive flock on a lock file shared by all local workers"""
+        path = os.path.join(tempfile.gettempdir(), f'sarcastic-casino-{self.name}.lock')
+        lock_file = open(path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def _acquire_thread(self):
+        """Fallback for platforms without flock: only guards this process"""
+        with _process_locks_guard:
+            lock = _process_locks.setdefault(self.name, threading.Lock())
+        if not lock.acquire(blocking=False):
+            return False
+        self._thread_lock = lock
+        return True
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
@@ -80,9 +80,19 @@ class Round(db.Model):
     started_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     ended_at = db.Column(db.DateTime(timezone=True))
     rng_seed = db.Column(db.String)
+    track_id = db.Column(db.Integer, db.ForeignKey('horse_tracks.track_id'))  # Horse racing only
     game = db.relationship('Game', back_populates='rounds')
+    track = db.relationship('HorseTrack', back_populates='rounds')
     bets = db.relationship('Bet', back_populates='round')
     outcome = db.relationship('Outcome', back_populates='round', uselist=False)
+    
+    __table_args__ = (
+        db.Index('ix_rounds_game_track_ended', 'game_id', 'track_id', 'ended_at'),
+        # At most one open race per track
+        db.Index('uq_rounds_open_track', 'track_id', unique=True,
+                 postgresql_where=db.text('ended_at IS NULL'),
+                 sqlite_where=db.text('ended_at IS NULL')),
+    )
 
 class Outcome(db.Model):
     __tablename__ = 'outcomes'
@@ -107,6 +117,14 @@ class Bet(db.Model):
     user = db.relationship('User', back_populates='bets')
     round = db.relationship('Round', back_populates='bets')
     outcome = db.relationship('Outcome', back_populates='bets')
+    
+    __table_args__ = (
+        db.Index('ix_bets_round_user', 'round_id', 'user_id'),
+        # Open bets by age, for the blackjack hand sweeper
+        db.Index('ix_bets_unsettled_placed', 'placed_at',
+                 postgresql_where=db.text('settled_at IS NULL'),
+                 sqlite_where=db.text('settled_at IS NULL')),
+    )
 
 class SarcasTemp(db.Model):
     __tablename__ = 'sarcastemps'
@@ -117,6 +135,20 @@ class SarcasTemp(db.Model):
 
 
 # Horse Racing specific models
+class HorseTrack(db.Model):
+    """A racecourse that runs its own sequence of races"""
+    __tablename__ = 'horse_tracks'
+    track_id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(20), unique=True, nullable=False)
+    name = db.Column(db.String(60), nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    race_interval_sec = db.Column(db.Integer)   # NULL: use HORSE_RACE_INTERVAL
+    betting_window_sec = db.Column(db.Integer)  # NULL: use HORSE_BETTING_WINDOW
+    
+    # Relationships
+    rounds = db.relationship('Round', back_populates='track')
+
+
 class Horse(db.Model):
     __tablename__ = 'horses'
     horse_id = db.Column(db.Integer, primary_key=True)
@@ -134,7 +166,9 @@ class HorseRunner(db.Model):
     round_id = db.Column(db.BigInteger, db.ForeignKey('rounds.round_id', ondelete='CASCADE'), primary_key=True)
     horse_id = db.Column(db.Integer, db.ForeignKey('horses.horse_id'), primary_key=True)
     lane_no = db.Column(db.SmallInteger, db.CheckConstraint('lane_no BETWEEN 1 AND 6'), nullable=False)
-    odds = db.Column(NUMERIC(6,3), nullable=False)
+    odds = db.Column(NUMERIC(6,3), nullable=False)  # Win odds
+    place_odds = db.Column(NUMERIC(6,3))
+    show_odds = db.Column(NUMERIC(6,3))
     
     # Relationships
     round = db.relationship('Round', backref='horse_runners')
@@ -159,3 +193,53 @@ class HorseResult(db.Model):
     # Relationships
     runner = db.relationship('HorseRunner', back_populates='result')
     horse = db.relationship('Horse', primaryjoin='HorseResult.horse_id == Horse.horse_id')
+
+
+class HorsePool(db.Model):
+    """Running pari-mutuel pool total for one bet type on one runner"""
+    __tablename__ = 'horse_pools'
+    round_id = db.Column(db.BigInteger, primary_key=True)
+    horse_id = db.Column(db.Integer, primary_key=True)
+    bet_type = db.Column(db.String(10), primary_key=True)
+    total_amount = db.Column(NUMERIC, nullable=False, default=0)
+    bet_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.ForeignKeyConstraint(['round_id', 'horse_id'], ['horse_runners.round_id', 'horse_runners.horse_id'], ondelete='CASCADE'),
+        db.CheckConstraint("bet_type IN ('win', 'place', 'show')"),
+    )
+
+
+class HorseForm(db.Model):
+    """Running form rollup for one horse, maintained as races are run"""
+    __tablename__ = 'horse_form'
+    horse_id = db.Column(db.Integer, db.ForeignKey('horses.horse_id', ondelete='CASCADE'), primary_key=True)
+    races_run = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    top3_finishes = db.Column(db.Integer, nullable=False, default=0)
+    total_finish_places = db.Column(db.Integer, nullable=False, default=0)
+    best_time = db.Column(NUMERIC(6,3))
+    total_race_time = db.Column(NUMERIC(12,3), nullable=False, default=0)
+    recent_finishes = db.Column(JSON, nullable=False, default=list)  # Newest first, capped at FORM_WINDOW
+    last_round_id = db.Column(db.BigInteger)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
+    
+    # Relationships
+    horse = db.relationship('Horse', backref=db.backref('form', uselist=False))
+
+
+class HorseReplay(db.Model):
+    """Encoded position frames for one race (see games/race_replay.py)"""
+    __tablename__ = 'horse_replays'
+    round_id = db.Column(db.BigInteger, db.ForeignKey('rounds.round_id', ondelete='CASCADE'), primary_key=True)
+    fps = db.Column(db.SmallInteger, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+
+
+class JackpotShard(db.Model):
+    """One slice of a game's progressive jackpot (see games/jackpot.py)"""
+    __tablename__ = 'jackpot_shards'
+    game_id = db.Column(db.Integer, db.ForeignKey('games.game_id', ondelete='CASCADE'), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    amount = db.Column(NUMERIC, nullable=False, default=0)
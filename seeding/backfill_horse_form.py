@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Horse Form Backfill
+
+Rebuilds the horse_form rollup from every row in horse_results. Run it once
+after migrations/add_horse_form.py, and again after seeding or editing race
+history outside the game. Safe to re-run at any time.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from games.horse_form import rebuild_horse_form
+
+def backfill_horse_form():
+    """Recompute form for every horse from its race history"""
+    with app.app_context():
+        print("🐎 Rebuilding horse form from race history...")
+        try:
+            horses = rebuild_horse_form()
+            print(f"✅ Form rebuilt for {horses} horses")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error rebuilding horse form: {str(e)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    backfill_horse_form()
@@ -10,8 +10,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
-from models import User, UserSettings, Wallet, Transaction, Game, Round, Outcome, Bet, SarcasTemp, Horse, HorseRunner, HorseResult
+from models import User, UserSettings, Wallet, Transaction, Game, Round, Outcome, Bet, SarcasTemp, Horse, HorseRunner, HorseResult, HorseTrack
+from games.horse_form import rebuild_horse_form
 from games.horse_racing import HorseRacing
+from games.race_engine import simulate_races, race_times_by_horse
 from werkzeug.security import generate_password_hash
 from decimal import Decimal
 import random
@@ -58,6 +60,10 @@ def comprehensive_seed():
         seed_user_settings(users)
         
         db.session.commit()
+        
+        # Seeded race results bypass run_race, so rebuild the horse form rollup
+        rebuild_horse_form()
+        
         print("✅ Comprehensive seeding completed successfully!")
         print_seeding_summary()
 
@@ -364,6 +370,9 @@ def seed_completed_horse_races(users):
         print("   ⚠️  Not enough horses found! Need at least 6 horses.")
         return
     
+    # Spread the history across the tracks (older databases may have none)
+    tracks = HorseTrack.query.filter_by(is_active=True).all()
+    
     races_created = 0
     total_bets = 0
     
@@ -376,6 +385,7 @@ def seed_completed_horse_races(users):
             
             race_round = Round(
                 game_id=horse_game.game_id,
+                track_id=random.choice(tracks).track_id if tracks else None,
                 started_at=start_time,
                 ended_at=end_time,
                 rng_seed=f"horse_seed_{random.randint(100000, 999999)}"
@@ -648,19 +658,9 @@ def generate_outcome_for_game(game_code):
         if len(all_horses) >= 6:
             race_horses = random.sample(all_horses, 6)
             
-            # Create mock horse runners for the simulation
-            mock_runners = []
-            for i, horse in enumerate(race_horses, 1):
-                mock_runner = type('MockRunner', (), {
-                    'horse_id': horse.horse_id,
-                    'horse': horse,
-                    'lane_no': i
-                })()
-                mock_runners.append(mock_runner)
-            
             # Use realistic race simulation
-            horse_racing = HorseRacing()
-            race_times = horse_racing._simulate_race_times(mock_runners)
+            times = simulate_races([race_horses])[0]
+            race_times = race_times_by_horse([horse.horse_id for horse in race_horses], times)
             
             # Sort by race time to get finish order (lowest time = first place)
             sorted_results = sorted(race_times.items(), key=lambda x: x[1])
@@ -4,7 +4,7 @@ sys.path.insert(0, '/app')
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
-from models import Game
+from models import Game, HorseTrack
 
 def seed_games():
     games = [
@@ -17,9 +17,22 @@ def seed_games():
     ]
     db.session.bulk_save_objects(games)
     db.session.commit()
+    seed_horse_tracks()
+
+def seed_horse_tracks():
+    """Tracks run independent races; NULL intervals use the app's HORSE_* settings"""
+    if HorseTrack.query.count() > 0:
+        return
+    tracks = [
+        HorseTrack(code='MAIN', name='Main Track', is_active=True),
+        HorseTrack(code='DOWNS', name='Sarcastic Downs', is_active=True),
+        HorseTrack(code='MUDDY', name='Muddy Mile', is_active=True, race_interval_sec=120, betting_window_sec=90),
+    ]
+    db.session.bulk_save_objects(tracks)
+    db.session.commit()
 
 if __name__ == '__main__':
     with app.app_context():
-        with db.session.begin():
-            seed_games()
+        # seed_games commits the games and then the tracks itself
+        seed_games()
         print('Seeded games table.') 
\ No newline at end of file
@@ -20,13 +20,16 @@ from decimal import Decimal
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
-from models import Game, Round, Horse, HorseRunner, HorseResult, User, Wallet, Bet
+from models import Game, Round, Horse, HorseRunner, HorseResult, HorseTrack, User, Wallet, Bet
+from games.race_engine import simulate_races
+from games.horse_form import rebuild_horse_form
 from sqlalchemy import func
 
-def create_race_round(game_id, start_time):
+def create_race_round(game_id, start_time, track_id=None):
     """Create a new race round"""
     round = Round(
         game_id=game_id,
+        track_id=track_id,
         started_at=start_time,
         ended_at=start_time + timedelta(minutes=2)
     )
@@ -73,48 +76,31 @@ def create_race_runners(round_id, horses):
     db.session.flush()
     return runners
 
-def simulate_race_results(round_id, runners):
-    """Simulate race results based on horse characteristics"""
-    race_times = []
-    for runner in runners:
-        horse = Horse.query.get(runner.horse_id)
-        
-        # Base time calculation (faster base_speed = lower time)
-        base_time = 120 - float(horse.base_speed) * 5
-        
-        # Age factor (horses around age 7 perform best)
-        age_factor = abs(7 - horse.age) * 0.5
-        
-        # Temperament factor
-        temperament_factors = {
-            'calm': -1,
-            'confident': -0.5,
-            'aggressive': random.uniform(-2, 2),
-            'nervous': random.uniform(0, 2),
-            'unpredictable': random.uniform(-3, 3)
-        }
-        
-        # Random factor for excitement
-        random_factor = random.uniform(-2, 2)
-        
-        # Calculate final race time
-        race_time = base_time + age_factor + temperament_factors.get(horse.temperament, 0) + random_factor
-        race_times.append((runner.horse_id, race_time, runner.lane_no))
+def simulate_race_results(round_id, runners, race_times):
+    """
+    Record race results for a race simulated by the shared race engine
     
-    # Sort by race time and create results
-    race_times.sort(key=lambda x: x[1])
-    for place, (horse_id, time, lane_no) in enumerate(race_times, 1):
+    Args:
+        round_id (int): Race round ID
+        runners (list): HorseRunner objects in lane order
+        race_times (ndarray): Finish times in seconds, in the same order as runners
+    """
+    results = sorted(
+        ((runner.horse_id, float(time), runner.lane_no) for runner, time in zip(runners, race_times)),
+        key=lambda x: x[1]
+    )
+    for place, (horse_id, time, lane_no) in enumerate(results, 1):
         result = HorseResult(
             round_id=round_id,
             horse_id=horse_id,
             lane_no=lane_no,
             finish_place=place,
-            race_time_sec=Decimal(str(round(time, 2)))
+            race_time_sec=Decimal(str(time))
         )
         db.session.add(result)
     
     db.session.flush()
-    return race_times
+    return results
 
 def create_bets_for_race(round_id, runners, num_bets=20):
     """Create realistic betting patterns for the race"""
@@ -179,18 +165,25 @@ def seed_horse_races(num_races=50):
     # Start time for first race
     start_time = datetime.now() - timedelta(days=30)
     
+    # Spread the races across the tracks
+    tracks = HorseTrack.query.filter_by(is_active=True).all()
+    
+    # Pick every lineup up front and run all races in one engine call
+    lineups = [select_horses_for_race() for _ in range(num_races)]
+    all_race_times = simulate_races(lineups)
+    
     races_created = 0
-    for i in range(num_races):
+    for i, horses in enumerate(lineups):
         try:
             # Create race round
-            round = create_race_round(game.game_id, start_time)
+            track_id = tracks[i % len(tracks)].track_id if tracks else None
+            round = create_race_round(game.game_id, start_time, track_id)
             
-            # Select and create runners
-            horses = select_horses_for_race()
+            # Create runners
             runners = create_race_runners(round.round_id, horses)
             
-            # Simulate race results
-            simulate_race_results(round.round_id, runners)
+            # Record race results
+            simulate_race_results(round.round_id, runners, all_race_times[i])
             
             # Create bets
             create_bets_for_race(round.round_id, runners)
@@ -213,6 +206,9 @@ def seed_horse_races(num_races=50):
         db.session.commit()
         print(f"🎉 Successfully seeded {races_created} horse races!")
         
+        # Seeded results bypass run_race, so rebuild the form rollup
+        rebuild_horse_form()
+        
         # Print summary statistics
         print("\n📊 Race Statistics:")
         print(f"   Total races: {Round.query.filter_by(game_id=game.game_id).count()}")